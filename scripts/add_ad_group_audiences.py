@@ -9,22 +9,14 @@ Audience types supported:
 - CUSTOM_AUDIENCE: Custom segments (search terms, URLs, purchase intent)
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_client, get_googleads_service, search
+from reconcile import AD_GROUP_USER_LISTS, reconcile
 import csv
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def get_ad_group_ids():
     """Get ad group IDs for Search - NonBrand campaign"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
     query = '''
     SELECT ad_group.id, ad_group.name
     FROM ad_group
@@ -32,7 +24,7 @@ def get_ad_group_ids():
     AND ad_group.status = 'ENABLED'
     '''
 
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+    response = search(query)
 
     ids = {}
     for row in response:
@@ -56,42 +48,6 @@ def load_audience_mapping(filepath):
 
     return mapping
 
-def check_existing_targeting(ad_group_ids):
-    """Check what audience targeting already exists at ad group level"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
-    query = '''
-    SELECT
-        ad_group.id,
-        ad_group.name,
-        ad_group_criterion.criterion_id,
-        ad_group_criterion.type,
-        ad_group_criterion.user_list.user_list
-    FROM ad_group_criterion
-    WHERE campaign.name = 'Search - NonBrand'
-    AND ad_group_criterion.type = 'USER_LIST'
-    '''
-
-    try:
-        response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
-
-        existing = set()
-        for row in response:
-            ag_id = str(row.ad_group.id)
-            agc = row.ad_group_criterion
-
-            # Extract the audience ID from the resource name
-            if agc.user_list and agc.user_list.user_list:
-                # Format: customers/123/userLists/456
-                parts = agc.user_list.user_list.split('/')
-                if len(parts) >= 4:
-                    existing.add((ag_id, 'USER_LIST', parts[-1]))
-
-        return existing
-    except Exception as e:
-        print(f"  Note: Could not check existing targeting - {e}")
-        return set()
-
 def get_campaign_level_user_lists():
     """Get user lists already targeted at campaign level for NonBrand"""
     ga_service = get_googleads_service('GoogleAdsService')
@@ -117,10 +73,10 @@ def get_campaign_level_user_lists():
 
     return campaign_lists
 
-def add_audiences_to_ad_groups(client, mapping, ad_group_ids, existing_targeting, campaign_level_lists, dry_run=True):
+def add_audiences_to_ad_groups(client, mapping, ad_group_ids, campaign_level_lists, dry_run=True, batch=False):
     """Add audiences to ad groups in observation mode"""
-    operations = []
-    to_add = []
+    desired = {}
+    by_key = {}
     skipped = []
 
     for item in mapping:
@@ -152,41 +108,24 @@ def add_audiences_to_ad_groups(client, mapping, ad_group_ids, existing_targeting
             })
             continue
 
-        # Check if this combination already exists at ad group level
-        if (ag_id, audience_type, audience_id) in existing_targeting:
-            skipped.append({
-                'ad_group': ag_name,
-                'audience_name': item['audience_name'],
-                'reason': 'Already exists at ad group level'
-            })
-            continue
-
-        # Create the operation
-        operation = client.get_type("AdGroupCriterionOperation")
-        criterion = operation.create
-
-        # Set ad group
-        criterion.ad_group = client.get_service("AdGroupService").ad_group_path(
-            CUSTOMER_ID, ag_id
-        )
-
-        # Set status to ENABLED
-        criterion.status = client.enums.AdGroupCriterionStatusEnum.ENABLED
-
-        # Set bid modifier to 0% (no adjustment initially - gather data first)
-        # Use 1.0 for no adjustment, >1.0 for positive, <1.0 for negative
-        criterion.bid_modifier = 1.0
-
-        # Set the audience - only USER_LIST supported here
-        criterion.user_list.user_list = client.get_service("UserListService").user_list_path(
-            CUSTOMER_ID, audience_id
-        )
-
-        operations.append(operation)
-        to_add.append(item)
+        # Bid modifier 1.0 = no adjustment initially - gather data first
+        key = (ag_id, audience_id)
+        desired[key] = {'bid_modifier': 1.0}
+        by_key.setdefault(key, item)
+
+    # Diff against existing ad group-level targeting; only missing criteria are created
+    diff, response = reconcile(AD_GROUP_USER_LISTS, desired, where="campaign.name = 'Search - NonBrand'",
+                               dry_run=dry_run, batch=batch)
+    to_add = [by_key[key] for key, _ in diff.creates]
+    for key in diff.unchanged:
+        skipped.append({
+            'ad_group': by_key[key]['ad_group'],
+            'audience_name': by_key[key]['audience_name'],
+            'reason': 'Already exists at ad group level'
+        })
 
     if dry_run:
-        print(f"\n[DRY RUN] Would add {len(operations)} audience targeting criteria:")
+        print(f"\n[DRY RUN] Would add {len(to_add)} audience targeting criteria:")
 
         # Group by ad group
         by_ag = {}
@@ -203,29 +142,23 @@ def add_audiences_to_ad_groups(client, mapping, ad_group_ids, existing_targeting
                 print(f"      Rationale: {item['rationale']}")
 
         if skipped:
-            print(f"\n  Skipped {len(skipped)} (already exist):")
+            print(f"\n  Skipped {len(skipped)}:")
             for s in skipped:
-                print(f"    - {s['ad_group']}: {s['audience_name']}")
+                print(f"    - {s['ad_group']}: {s['audience_name']} ({s['reason']})")
 
         return None
     else:
-        if not operations:
+        if response is None:
             print("\n  No new audiences to add (all already exist)")
             return None
 
-        # Execute the operations
-        ad_group_criterion_service = client.get_service("AdGroupCriterionService")
-        response = ad_group_criterion_service.mutate_ad_group_criteria(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
-
         return response, to_add, skipped
 
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--execute', action='store_true', help='Execute (default is dry run)')
+    parser.add_argument('--batch', action='store_true', help='Run as an async batch job (large rollouts)')
     args = parser.parse_args()
 
     print("=" * 70)
@@ -234,7 +167,7 @@ if __name__ == '__main__':
     print("Mode: Observation (no reach restriction)")
     print("=" * 70)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     # Get ad group IDs
     print("\nFetching ad group IDs...")
@@ -248,11 +181,6 @@ if __name__ == '__main__':
     mapping = load_audience_mapping(mapping_file)
     print(f"  Loaded {len(mapping)} audience assignments")
 
-    # Check existing targeting
-    print("\nChecking existing ad group-level targeting...")
-    existing = check_existing_targeting(ad_group_ids)
-    print(f"  Found {len(existing)} existing audience criteria")
-
     # Check campaign-level targeting (to avoid conflicts)
     print("\nChecking campaign-level targeting (to avoid conflicts)...")
     campaign_lists = get_campaign_level_user_lists()
@@ -263,18 +191,24 @@ if __name__ == '__main__':
         print("ADDING AUDIENCE TARGETING")
         print("=" * 70)
 
-        result = add_audiences_to_ad_groups(client, mapping, ad_group_ids, existing, campaign_lists, dry_run=False)
+        result = add_audiences_to_ad_groups(client, mapping, ad_group_ids, campaign_lists, dry_run=False,
+                                            batch=args.batch)
 
         if result:
             response, added, skipped = result
-            print(f"\nSuccessfully added {len(response.results)} audience criteria!")
+            print(f"\nSuccessfully added {response.succeeded} audience criteria!")
 
             for i, res in enumerate(response.results):
-                if i < len(added):
+                if res is not None and i < len(added):
                     print(f"  + {added[i]['ad_group']}: {added[i]['audience_name']}")
 
+            if response.failed:
+                print(f"\nFailed to add {response.failed}:")
+                for i, message in sorted(response.errors.items()):
+                    print(f"  x {added[i]['ad_group']}: {added[i]['audience_name']} - {message}")
+
             if skipped:
-                print(f"\nSkipped {len(skipped)} (already existed)")
+                print(f"\nSkipped {len(skipped)} (already existed or not applicable)")
 
             print("\n" + "-" * 70)
             print("Verification:")
@@ -285,7 +219,7 @@ if __name__ == '__main__':
         print("DRY RUN MODE (use --execute to add audiences)")
         print("=" * 70)
 
-        add_audiences_to_ad_groups(client, mapping, ad_group_ids, existing, campaign_lists, dry_run=True)
+        add_audiences_to_ad_groups(client, mapping, ad_group_ids, campaign_lists, dry_run=True)
 
         print("\n" + "-" * 70)
         print("Next steps:")
@@ -3,16 +3,14 @@ Add 33 gap keywords as Broad match with keyword-level URLs
 Plus ad group-level negative keywords for traffic shaping
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
+from ads_client import get_client, get_googleads_service, search
+from analyze_search_terms_v2 import get_ad_group_negatives
+from mutate_pool import mutate
+from negative_matcher import NegativeMatcher
+from negative_simulator import SearchTermIndex, simulate_negatives
 from google.protobuf import field_mask_pb2
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 # Ad group IDs from the account
 AD_GROUP_IDS = {
@@ -79,9 +77,6 @@ NEGATIVES_TO_ADD = {
 
 def get_ad_group_ids(client):
     """Get ad group IDs dynamically"""
-    from ads_mcp.utils import get_googleads_service
-    ga_service = get_googleads_service('GoogleAdsService')
-
     query = '''
     SELECT ad_group.id, ad_group.name
     FROM ad_group
@@ -89,7 +84,7 @@ def get_ad_group_ids(client):
     AND ad_group.name IN ('OMS', 'NB - General B2B')
     '''
 
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+    response = search(query)
 
     ids = {}
     for row in response:
@@ -112,7 +107,7 @@ def add_keywords(client, ad_group_ids, dry_run=True):
         operation = client.get_type("AdGroupCriterionOperation")
         criterion = operation.create
 
-        criterion.ad_group = client.get_service("AdGroupService").ad_group_path(
+        criterion.ad_group = get_googleads_service("AdGroupService").ad_group_path(
             CUSTOMER_ID, ag_id
         )
 
@@ -145,12 +140,7 @@ def add_keywords(client, ad_group_ids, dry_run=True):
                 print(f"    ... +{len(kws)-5} more")
         return None
     else:
-        ad_group_criterion_service = client.get_service("AdGroupCriterionService")
-        response = ad_group_criterion_service.mutate_ad_group_criteria(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
-        return response
+        return mutate("AdGroupCriterionService", "mutate_ad_group_criteria", operations)
 
 def add_negatives(client, ad_group_ids, dry_run=True):
     """Add ad group level negative keywords"""
@@ -168,7 +158,7 @@ def add_negatives(client, ad_group_ids, dry_run=True):
             operation = client.get_type("AdGroupCriterionOperation")
             criterion = operation.create
 
-            criterion.ad_group = client.get_service("AdGroupService").ad_group_path(
+            criterion.ad_group = get_googleads_service("AdGroupService").ad_group_path(
                 CUSTOMER_ID, ag_id
             )
 
@@ -186,15 +176,19 @@ def add_negatives(client, ad_group_ids, dry_run=True):
                     print(f"\n  {ag_name}:")
                     for neg in negatives:
                         print(f"    - {neg}")
+
+            print("\n  Simulated impact (last 60 days):")
+            index = SearchTermIndex.from_store(days=60)
+            # Existing negatives, so traffic is not shown moving into ad groups that block it
+            negative_matcher = NegativeMatcher(get_ad_group_negatives())
+            for ag_name, negatives in NEGATIVES_TO_ADD.items():
+                if negatives:
+                    simulate_negatives(ag_name, [{'keyword': n, 'match_type': 'PHRASE'} for n in negatives],
+                                       index=index, negative_matcher=negative_matcher)
         return None
     else:
         if operations:
-            ad_group_criterion_service = client.get_service("AdGroupCriterionService")
-            response = ad_group_criterion_service.mutate_ad_group_criteria(
-                customer_id=CUSTOMER_ID,
-                operations=operations
-            )
-            return response
+            return mutate("AdGroupCriterionService", "mutate_ad_group_criteria", operations)
         return None
 
 if __name__ == '__main__':
@@ -209,7 +203,7 @@ if __name__ == '__main__':
     print("Match Type: BROAD")
     print("=" * 70)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     print("\nGetting ad group IDs...")
     ad_group_ids = get_ad_group_ids(client)
@@ -222,13 +216,19 @@ if __name__ == '__main__':
 
         response = add_keywords(client, ad_group_ids, dry_run=False)
         if response:
-            print(f"\nSuccessfully added {len(response.results)} keywords!")
+            print(f"\nSuccessfully added {response.succeeded} keywords!")
+            if response.failed:
+                print(f"{response.failed} keywords failed:")
+                response.print_errors()
 
         if not args.skip_negatives:
             print("\nAdding negative keywords...")
             neg_response = add_negatives(client, ad_group_ids, dry_run=False)
             if neg_response:
-                print(f"Added {len(neg_response.results)} negative keywords")
+                print(f"Added {neg_response.succeeded} negative keywords")
+                if neg_response.failed:
+                    print(f"{neg_response.failed} negative keywords failed:")
+                    neg_response.print_errors()
     else:
         print("\n" + "=" * 70)
         print("DRY RUN MODE (use --execute to apply changes)")
@@ -0,0 +1,123 @@
+"""
+Shared Google Ads client for Kibo Commerce scripts
+
+Parses google-ads.yaml once per process and hands out cached service
+clients, so every query and mutate in a run reuses the same service stub
+(and its gRPC channel) instead of reloading credentials per function.
+
+Usage:
+    from ads_client import get_client, get_googleads_service, search_stream
+
+    ga_service = get_googleads_service('GoogleAdsService')
+    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+
+    for row in search_stream(query):  # large reports, rows arrive lazily
+        ...
+
+    rows = search(query)  # cached per gaql_cache TTLs
+    rows = search(query, use_cache=False)  # read-your-writes after a mutate
+
+Set KIBO_ADS_FAKE=<data dir> (or call install()) to run against the
+offline fixtures in fake_ads instead of the live API.
+"""
+
+import sys
+sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
+import os
+os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
+
+import threading
+
+import gaql_cache
+
+CUSTOMER_ID = '9948697111'
+YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
+
+_client = None
+_services = {}
+_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide GoogleAdsClient, loading the YAML on first use"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                fake_data_dir = os.environ.get('KIBO_ADS_FAKE')
+                if fake_data_dir:
+                    import fake_ads
+                    _client = fake_ads.FakeGoogleAdsClient.from_data_dir(fake_data_dir)
+                else:
+                    from google.ads.googleads.client import GoogleAdsClient
+                    _client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    return _client
+
+
+def get_googleads_service(service_name):
+    """Return a cached service client (e.g. 'GoogleAdsService') for this run"""
+    service = _services.get(service_name)
+    if service is None:
+        client = get_client()
+        with _lock:
+            service = _services.get(service_name)
+            if service is None:
+                service = client.get_service(service_name)
+                _services[service_name] = service
+    return service
+
+
+def install(client):
+    """Use `client` (e.g. a fake_ads.FakeGoogleAdsClient) for the rest of the run"""
+    global _client
+    with _lock:
+        _client = client
+        _services.clear()
+
+
+def reset():
+    """Drop the cached client and services (e.g. after switching credentials)"""
+    global _client
+    with _lock:
+        _client = None
+        _services.clear()
+
+
+def search_stream(query, customer_id=CUSTOMER_ID):
+    """
+    Yield GoogleAdsRow objects from GoogleAdsService.search_stream as each
+    batch arrives, so callers can process large reports without holding
+    the full result set in memory.
+    """
+    ga_service = get_googleads_service('GoogleAdsService')
+    stream = ga_service.search_stream(customer_id=customer_id, query=query)
+    for batch in stream:
+        for row in batch.results:
+            yield row
+
+
+def search(query, customer_id=CUSTOMER_ID, use_cache=True):
+    """
+    Run a GAQL query and return the rows as a list.
+    Results are served from the on-disk gaql_cache while fresh; pass
+    use_cache=False to always hit the API (e.g. when checking state
+    right before or after a mutate).
+    """
+    client = get_client()
+    row_type = type(client.get_type('GoogleAdsRow'))
+
+    # Never mix fixture rows into the on-disk cache of live results
+    use_cache = use_cache and not getattr(client, 'is_fake', False)
+
+    if use_cache:
+        cached = gaql_cache.get(query, customer_id)
+        if cached is not None:
+            return [row_type.deserialize(data) for data in cached]
+
+    ga_service = get_googleads_service('GoogleAdsService')
+    rows = list(ga_service.search(customer_id=customer_id, query=query))
+
+    if use_cache:
+        gaql_cache.put(query, customer_id, [row_type.serialize(row) for row in rows])
+
+    return rows
@@ -6,16 +6,12 @@ Analyzes search query reports for last 60 days to identify:
 3. Generate negative keyword recommendations
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from intent_rules import INTENT_CLASSIFIER, INTENT_RULES
+import search_term_store
+import term_cache
 import csv
 import re
 from collections import defaultdict
-from datetime import datetime, timedelta
 
 CUSTOMER_ID = '9948697111'
 OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
@@ -32,137 +28,86 @@ BRAND_PATTERNS = [
 # Compile brand patterns for efficiency
 BRAND_REGEX = re.compile('|'.join(BRAND_PATTERNS), re.IGNORECASE)
 
-# Intent mapping rules for NonBrand campaign
-# Maps term patterns to expected ad groups
-INTENT_RULES = {
-    'B2B EComm': [
-        r'\bb2b\b(?!.*\b(d2c|b2c|consumer)\b)',
-        r'\benterprise\s*(ecommerce|commerce|platform)',
-        r'\bwholesale\s*ecommerce\b',
-    ],
-    'B2C EComm': [
-        r'\bb2c\b',
-        r'\bd2c\b',
-        r'\bdirect\s*to\s*consumer',
-        r'\bconsumer\s*(ecommerce|commerce)',
-        r'\bretail\s*(ecommerce|platform)',
-    ],
-    'OMS': [
-        r'\boms\b',
-        r'\border\s*management',
-        r'\bfulfillment',
-        r'\binventory\s*management',
-        r'\bwarehouse\s*management',
-        r'\border\s*orchestration',
-    ],
-    'NB - Manufacturers': [
-        r'\bmanufacturer',
-        r'\bmanufacturing\s*(ecommerce|commerce|platform)',
-    ],
-    'NB - Wholesalers': [
-        r'\bwholesaler',
-        r'\bwholesale\s*(platform|software|distribution)',
-    ],
-    'NB - Distributors': [
-        r'\bdistributor',
-        r'\bdistribution\s*(ecommerce|commerce|platform)',
-    ],
-    'B2B Other Keywords': [
-        r'\bunified\s*commerce',
-        r'\bcomposable\s*commerce',
-        r'\bheadless\s*(commerce|ecommerce)',
-        r'\bmach\s*(architecture|platform)',
-        r'\bapi\s*first\s*commerce',
-    ],
-    'Agentic Commerce': [
-        r'\bagentic',
-        r'\bai\s*commerce',
-        r'\bai\s*powered\s*(commerce|ecommerce)',
-    ],
-}
-
-# Compile intent rules
-COMPILED_INTENT_RULES = {}
-for ad_group, patterns in INTENT_RULES.items():
-    COMPILED_INTENT_RULES[ad_group] = [re.compile(p, re.IGNORECASE) for p in patterns]
-
-
+@term_cache.memoize('brand', BRAND_PATTERNS)
 def is_brand_term(search_term):
     """Check if search term contains brand keywords"""
     return bool(BRAND_REGEX.search(search_term))
 
 
-def get_expected_ad_group(search_term):
-    """Determine expected ad group based on search term patterns"""
-    for ad_group, patterns in COMPILED_INTENT_RULES.items():
-        for pattern in patterns:
-            if pattern.search(search_term):
-                return ad_group
-    return None  # No clear intent detected
+@term_cache.memoize('intent', INTENT_RULES)
+def classify_intent(search_term):
+    """(expected ad group, matching rule) for a term, cached across runs"""
+    return INTENT_CLASSIFIER.classify(search_term)
 
 
-def pull_search_term_report():
-    """Pull search term report for last 60 days from both campaigns"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
-    # Calculate date range (last 60 days)
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=60)
-    start_str = start_date.strftime('%Y-%m-%d')
-    end_str = end_date.strftime('%Y-%m-%d')
-
-    query = f'''
-    SELECT
-        search_term_view.search_term,
-        search_term_view.status,
-        campaign.id,
-        campaign.name,
-        ad_group.id,
-        ad_group.name,
-        segments.keyword.info.text,
-        segments.keyword.info.match_type,
-        metrics.impressions,
-        metrics.clicks,
-        metrics.cost_micros,
-        metrics.conversions,
-        metrics.conversions_value
-    FROM search_term_view
-    WHERE segments.date BETWEEN '{start_str}' AND '{end_str}'
-    AND campaign.advertising_channel_type = 'SEARCH'
-    AND metrics.impressions > 0
-    '''
-
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
-
-    search_terms = []
-    for row in response:
-        cost = row.metrics.cost_micros / 1_000_000
-        clicks = row.metrics.clicks
-        impressions = row.metrics.impressions
+def get_expected_ad_group(search_term):
+    """Determine expected ad group based on search term patterns (see intent_rules.INTENT_RULES)"""
+    return classify_intent(search_term)[0]
+
+
+def iter_search_term_report():
+    """
+    Stream the last 60 days of search terms, one dict per row.
+    Syncs the local date-partitioned store first, so only new days (plus a
+    short trailing window for late conversions) are fetched from the API.
+    """
+    search_term_store.sync(days=60)
+
+    for row in search_term_store.iter_window(days=60):
+        cost = row['cost_micros'] / 1_000_000
+        clicks = row['clicks']
+        impressions = row['impressions']
         ctr = (clicks / impressions * 100) if impressions > 0 else 0
         cpc = (cost / clicks) if clicks > 0 else 0
 
-        term_data = {
-            'search_term': row.search_term_view.search_term,
-            'status': row.search_term_view.status.name if row.search_term_view.status else 'UNKNOWN',
-            'campaign_id': row.campaign.id,
-            'campaign_name': row.campaign.name,
-            'ad_group_id': row.ad_group.id,
-            'ad_group_name': row.ad_group.name,
-            'keyword_text': row.segments.keyword.info.text if row.segments.keyword.info.text else '',
-            'match_type': row.segments.keyword.info.match_type.name if row.segments.keyword.info.match_type else '',
+        yield {
+            'search_term': row['search_term'],
+            'status': row['status'],
+            'campaign_id': row['campaign_id'],
+            'campaign_name': row['campaign_name'],
+            'ad_group_id': row['ad_group_id'],
+            'ad_group_name': row['ad_group_name'],
+            'keyword_text': row['keyword_text'],
+            'match_type': row['match_type'],
             'impressions': impressions,
             'clicks': clicks,
             'cost': round(cost, 2),
-            'conversions': row.metrics.conversions,
-            'conversion_value': round(row.metrics.conversions_value, 2),
+            'conversions': row['conversions'],
+            'conversion_value': round(row['conversions_value'], 2),
             'ctr': round(ctr, 2),
             'cpc': round(cpc, 2),
-            'is_brand_term': is_brand_term(row.search_term_view.search_term),
+            'is_brand_term': is_brand_term(row['search_term']),
         }
-        search_terms.append(term_data)
 
-    return search_terms
+
+def pull_search_term_report():
+    """Pull search term report for last 60 days from both campaigns"""
+    return list(iter_search_term_report())
+
+
+def check_cross_contamination(term):
+    """Return a cross-contamination issue for a single term, or None"""
+    campaign_name = term['campaign_name'].lower()
+
+    # Check for brand terms in NonBrand campaign
+    if 'nonbrand' in campaign_name and term['is_brand_term']:
+        return {
+            **term,
+            'issue_type': 'BRAND_IN_NONBRAND',
+            'priority': 'HIGH',
+            'recommendation': f'Add [{term["search_term"]}] as EXACT negative to Search - NonBrand campaign',
+        }
+
+    # Check for non-brand terms in Brand campaign
+    if 'brand' in campaign_name and 'nonbrand' not in campaign_name and not term['is_brand_term']:
+        return {
+            **term,
+            'issue_type': 'NONBRAND_IN_BRAND',
+            'priority': 'MEDIUM',
+            'recommendation': f'Add [{term["search_term"]}] as PHRASE negative to Search - Brand campaign',
+        }
+
+    return None
 
 
 def analyze_cross_contamination(search_terms):
@@ -170,27 +115,41 @@ def analyze_cross_contamination(search_terms):
     issues = []
 
     for term in search_terms:
-        campaign_name = term['campaign_name'].lower()
+        issue = check_cross_contamination(term)
+        if issue:
+            issues.append(issue)
 
-        # Check for brand terms in NonBrand campaign
-        if 'nonbrand' in campaign_name and term['is_brand_term']:
-            issues.append({
-                **term,
-                'issue_type': 'BRAND_IN_NONBRAND',
-                'priority': 'HIGH',
-                'recommendation': f'Add [{term["search_term"]}] as EXACT negative to Search - NonBrand campaign',
-            })
+    return issues
 
-        # Check for non-brand terms in Brand campaign
-        elif 'brand' in campaign_name and 'nonbrand' not in campaign_name and not term['is_brand_term']:
-            issues.append({
-                **term,
-                'issue_type': 'NONBRAND_IN_BRAND',
-                'priority': 'MEDIUM',
-                'recommendation': f'Add [{term["search_term"]}] as PHRASE negative to Search - Brand campaign',
-            })
 
-    return issues
+def check_intent_mapping(term):
+    """Return an intent mapping issue for a single NonBrand term, or None"""
+    campaign_name = term['campaign_name'].lower()
+
+    # Only analyze NonBrand campaign terms
+    if 'nonbrand' not in campaign_name:
+        return None
+
+    # Skip brand terms (should be negated anyway)
+    if term['is_brand_term']:
+        return None
+
+    expected_ad_group, intent_rule = classify_intent(term['search_term'])
+    actual_ad_group = term['ad_group_name']
+
+    # If we have an expected ad group and it doesn't match actual
+    if expected_ad_group and expected_ad_group.lower() not in actual_ad_group.lower():
+        return {
+            **term,
+            'expected_ad_group': expected_ad_group,
+            'intent_rule': intent_rule,
+            'actual_ad_group': actual_ad_group,
+            'issue_type': 'INTENT_MISMATCH',
+            'priority': 'LOW',
+            'recommendation': f'Consider adding [{term["search_term"]}] as negative to [{actual_ad_group}] to route to [{expected_ad_group}]',
+        }
+
+    return None
 
 
 def analyze_intent_mapping(search_terms):
@@ -198,29 +157,9 @@ def analyze_intent_mapping(search_terms):
     issues = []
 
     for term in search_terms:
-        campaign_name = term['campaign_name'].lower()
-
-        # Only analyze NonBrand campaign terms
-        if 'nonbrand' not in campaign_name:
-            continue
-
-        # Skip brand terms (should be negated anyway)
-        if term['is_brand_term']:
-            continue
-
-        expected_ad_group = get_expected_ad_group(term['search_term'])
-        actual_ad_group = term['ad_group_name']
-
-        # If we have an expected ad group and it doesn't match actual
-        if expected_ad_group and expected_ad_group.lower() not in actual_ad_group.lower():
-            issues.append({
-                **term,
-                'expected_ad_group': expected_ad_group,
-                'actual_ad_group': actual_ad_group,
-                'issue_type': 'INTENT_MISMATCH',
-                'priority': 'LOW',
-                'recommendation': f'Consider adding [{term["search_term"]}] as negative to [{actual_ad_group}] to route to [{expected_ad_group}]',
-            })
+        issue = check_intent_mapping(term)
+        if issue:
+            issues.append(issue)
 
     return issues
 
@@ -298,7 +237,20 @@ def save_csv(data, filename, fieldnames=None):
     print(f"  Saved: {filename} ({len(data)} rows)")
 
 
-def print_summary(search_terms, cross_contamination, intent_issues, recommendations):
+def tally_campaign(totals, term):
+    """Accumulate term count and spend per campaign type (Brand / NonBrand)"""
+    campaign_name = term['campaign_name'].lower()
+    if 'nonbrand' in campaign_name:
+        bucket = totals['nonbrand']
+    elif 'brand' in campaign_name:
+        bucket = totals['brand']
+    else:
+        return
+    bucket['terms'] += 1
+    bucket['cost'] += term['cost']
+
+
+def print_summary(campaign_totals, cross_contamination, intent_issues, recommendations):
     """Print console summary of analysis"""
     print("\n" + "=" * 50)
     print("SEARCH TERM ANALYSIS - Kibo Commerce")
@@ -306,15 +258,12 @@ def print_summary(search_terms, cross_contamination, intent_issues, recommendati
     print("Period: Last 60 Days\n")
 
     # Campaign summary
-    brand_terms = [t for t in search_terms if 'brand' in t['campaign_name'].lower() and 'nonbrand' not in t['campaign_name'].lower()]
-    nonbrand_terms = [t for t in search_terms if 'nonbrand' in t['campaign_name'].lower()]
-
-    brand_spend = sum(t['cost'] for t in brand_terms)
-    nonbrand_spend = sum(t['cost'] for t in nonbrand_terms)
+    brand = campaign_totals['brand']
+    nonbrand = campaign_totals['nonbrand']
 
     print("CAMPAIGN SUMMARY")
-    print(f"  Search - Brand: {len(brand_terms)} terms, ${brand_spend:,.2f} spend")
-    print(f"  Search - NonBrand: {len(nonbrand_terms)} terms, ${nonbrand_spend:,.2f} spend")
+    print(f"  Search - Brand: {brand['terms']} terms, ${brand['cost']:,.2f} spend")
+    print(f"  Search - NonBrand: {nonbrand['terms']} terms, ${nonbrand['cost']:,.2f} spend")
     print()
 
     # Cross-contamination issues
@@ -366,16 +315,32 @@ def print_summary(search_terms, cross_contamination, intent_issues, recommendati
 
 
 def main():
-    print("Pulling search term report for last 60 days...")
-    search_terms = pull_search_term_report()
-    print(f"Retrieved {len(search_terms)} search terms\n")
-
-    print("Analyzing cross-contamination...")
-    cross_contamination = analyze_cross_contamination(search_terms)
-    print(f"Found {len(cross_contamination)} cross-contamination issues\n")
-
-    print("Analyzing intent mapping...")
-    intent_issues = analyze_intent_mapping(search_terms)
+    # Rows are streamed: each one is written to the report CSV, tallied and
+    # classified as it arrives, so only the (much smaller) issue lists are
+    # held in memory.
+    print("Streaming search term report for last 60 days...")
+    campaign_totals = {
+        'brand': {'terms': 0, 'cost': 0.0},
+        'nonbrand': {'terms': 0, 'cost': 0.0},
+    }
+    cross_contamination = []
+    intent_issues = []
+    term_count = 0
+
+    for term in search_term_store.tee_csv(iter_search_term_report(), f'{OUTPUT_DIR}/search_term_report_60d.csv'):
+        term_count += 1
+        tally_campaign(campaign_totals, term)
+
+        issue = check_cross_contamination(term)
+        if issue:
+            cross_contamination.append(issue)
+
+        issue = check_intent_mapping(term)
+        if issue:
+            intent_issues.append(issue)
+
+    print(f"Retrieved {term_count} search terms")
+    print(f"Found {len(cross_contamination)} cross-contamination issues")
     print(f"Found {len(intent_issues)} intent mapping issues\n")
 
     print("Generating negation recommendations...")
@@ -384,13 +349,12 @@ def main():
 
     # Save output files
     print("Saving output files...")
-    save_csv(search_terms, 'search_term_report_60d.csv')
     save_csv(cross_contamination, 'cross_contamination_issues.csv')
     save_csv(intent_issues, 'intent_mapping_issues.csv')
     save_csv(recommendations, 'negation_recommendations.csv')
 
     # Print summary
-    print_summary(search_terms, cross_contamination, intent_issues, recommendations)
+    print_summary(campaign_totals, cross_contamination, intent_issues, recommendations)
 
 
 if __name__ == '__main__':
@@ -3,20 +3,25 @@ Search Term Report Analysis v2 - With Traffic Shaping Context
 Analyzes search query reports accounting for intentional cross-ad-group negatives
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
+from intent_rules import ROUTING_CLASSIFIER, ROUTING_RULES
+from negative_matcher import NegativeMatcher
+import search_term_store
+import term_cache
 import csv
+import heapq
+import os
 import re
-from collections import defaultdict
-from datetime import datetime, timedelta
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 CUSTOMER_ID = '9948697111'
 OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
 
+# Terms per shard sent to each worker in parallel routing
+ROUTING_CHUNK_SIZE = 5000
+
 # Brand detection patterns
 BRAND_PATTERNS = [
     r'\bkibo\b',
@@ -28,10 +33,17 @@ BRAND_PATTERNS = [
 BRAND_REGEX = re.compile('|'.join(BRAND_PATTERNS), re.IGNORECASE)
 
 
+@term_cache.memoize('brand', BRAND_PATTERNS)
 def is_brand_term(search_term):
     return bool(BRAND_REGEX.search(search_term))
 
 
+@term_cache.memoize('routing_intent', ROUTING_RULES)
+def detect_intent(search_term):
+    """(natural ad group, matching rule) for a term, cached across runs"""
+    return ROUTING_CLASSIFIER.classify(search_term)
+
+
 def get_ad_group_negatives():
     """Pull existing ad group level negatives for traffic shaping analysis"""
     ga_service = get_googleads_service('GoogleAdsService')
@@ -50,159 +62,84 @@ def get_ad_group_negatives():
 
     response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
 
-    # Group negatives by ad group
+    # Group negatives by ad group, keeping match type for blocking semantics
     negatives_by_ag = defaultdict(set)
     for row in response:
         ag_name = row.ad_group.name
         kw = row.ad_group_criterion.keyword.text.lower()
-        negatives_by_ag[ag_name].add(kw)
+        match_type = row.ad_group_criterion.keyword.match_type.name
+        negatives_by_ag[ag_name].add((kw, match_type))
 
     return negatives_by_ag
 
 
-def pull_search_term_report():
-    """Pull search term report for last 60 days"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=60)
-    start_str = start_date.strftime('%Y-%m-%d')
-    end_str = end_date.strftime('%Y-%m-%d')
-
-    query = f'''
-    SELECT
-        search_term_view.search_term,
-        search_term_view.status,
-        campaign.id,
-        campaign.name,
-        ad_group.id,
-        ad_group.name,
-        segments.keyword.info.text,
-        segments.keyword.info.match_type,
-        metrics.impressions,
-        metrics.clicks,
-        metrics.cost_micros,
-        metrics.conversions,
-        metrics.conversions_value
-    FROM search_term_view
-    WHERE segments.date BETWEEN '{start_str}' AND '{end_str}'
-    AND campaign.advertising_channel_type = 'SEARCH'
-    AND metrics.impressions > 0
-    '''
-
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+def iter_search_term_report():
+    """
+    Stream the last 60 days of search terms, one dict per row.
+    Syncs the local date-partitioned store first, so only new days (plus a
+    short trailing window for late conversions) are fetched from the API.
+    """
+    search_term_store.sync(days=60)
 
-    search_terms = []
-    for row in response:
-        cost = row.metrics.cost_micros / 1_000_000
-        clicks = row.metrics.clicks
-        impressions = row.metrics.impressions
+    for row in search_term_store.iter_window(days=60):
+        cost = row['cost_micros'] / 1_000_000
+        clicks = row['clicks']
+        impressions = row['impressions']
         ctr = (clicks / impressions * 100) if impressions > 0 else 0
         cpc = (cost / clicks) if clicks > 0 else 0
 
-        search_terms.append({
-            'search_term': row.search_term_view.search_term,
-            'status': row.search_term_view.status.name if row.search_term_view.status else 'UNKNOWN',
-            'campaign_id': row.campaign.id,
-            'campaign_name': row.campaign.name,
-            'ad_group_id': row.ad_group.id,
-            'ad_group_name': row.ad_group.name,
-            'keyword_text': row.segments.keyword.info.text if row.segments.keyword.info.text else '',
-            'match_type': row.segments.keyword.info.match_type.name if row.segments.keyword.info.match_type else '',
+        yield {
+            'search_term': row['search_term'],
+            'status': row['status'],
+            'campaign_id': row['campaign_id'],
+            'campaign_name': row['campaign_name'],
+            'ad_group_id': row['ad_group_id'],
+            'ad_group_name': row['ad_group_name'],
+            'keyword_text': row['keyword_text'],
+            'match_type': row['match_type'],
             'impressions': impressions,
             'clicks': clicks,
             'cost': round(cost, 2),
-            'conversions': row.metrics.conversions,
-            'conversion_value': round(row.metrics.conversions_value, 2),
+            'conversions': row['conversions'],
+            'conversion_value': round(row['conversions_value'], 2),
             'ctr': round(ctr, 2),
             'cpc': round(cpc, 2),
-            'is_brand_term': is_brand_term(row.search_term_view.search_term),
-        })
+            'is_brand_term': is_brand_term(row['search_term']),
+        }
 
-    return search_terms
 
+def pull_search_term_report():
+    """Pull search term report for last 60 days"""
+    return list(iter_search_term_report())
 
-def check_blocked_by_negative(search_term, ad_group_negatives):
-    """Check if a search term would be blocked by any negative in an ad group"""
-    search_lower = search_term.lower()
-    blocked_by = []
 
-    for ag_name, negatives in ad_group_negatives.items():
-        for neg in negatives:
-            # Check phrase/broad match (negative contains in search term)
-            if neg in search_lower:
-                blocked_by.append((ag_name, neg))
+def check_blocked_by_negative(search_term, ad_group_negatives):
+    """
+    Check if a search term would be blocked by any negative in an ad group,
+    using exact/phrase/broad negative match semantics.
+    Returns (ad_group, negative, match_type) tuples.
+    Pass a NegativeMatcher when checking many terms so the negatives are
+    compiled once; a plain {ad_group: negatives} dict is compiled per call.
+    """
+    if not isinstance(ad_group_negatives, NegativeMatcher):
+        ad_group_negatives = NegativeMatcher(ad_group_negatives)
 
-    return blocked_by
+    return ad_group_negatives.find(search_term)
 
 
-def analyze_traffic_routing(search_terms, ad_group_negatives):
+def iter_traffic_routing(search_terms, ad_group_negatives, workers=1, chunk_size=ROUTING_CHUNK_SIZE):
     """
-    Analyze where traffic is routing and why.
+    Analyze where traffic is routing and why, yielding one result per NonBrand term.
     Categorizes each term's routing as:
     - CORRECT_BY_INTENT: Term naturally belongs in this ad group
     - CORRECT_BY_NEGATIVE: Term routed here because blocked elsewhere
     - POTENTIAL_MISMATCH: Term might belong elsewhere, review needed
 
-    Priority order for intent detection (highest to lowest):
-    1. OMS - order management, fulfillment, inventory terms
-    2. Industry verticals - wholesale, distributor, manufacturer
-    3. B2C - consumer/d2c terms
-    4. B2B Other - composable, headless, unified
-    5. Agentic - AI commerce terms
-    6. B2B EComm - generic b2b ecommerce/commerce/platform
-    7. NB - General B2B - catch-all b2b
+    Intent detection uses the priority-ordered intent_rules.ROUTING_RULES.
+    With workers != 1 terms are classified in chunk_size shards across
+    worker processes (None = one per CPU); output order is unchanged.
     """
 
-    def detect_intent(search_term):
-        """Determine expected ad group with priority-based matching"""
-        term = search_term.lower()
-
-        # Priority 1: OMS terms (most specific)
-        oms_patterns = ['oms', 'order management', 'fulfillment', 'inventory management',
-                       'inventory software', 'inventory system', 'warehouse management',
-                       'returns management', 'reverse logistics', 'distributed order',
-                       'order orchestration', 'ship from store']
-        for pattern in oms_patterns:
-            if pattern in term:
-                return 'OMS'
-
-        # Priority 2: Industry verticals (wholesale, distributor, manufacturer)
-        # These take precedence over generic B2B
-        if any(w in term for w in ['wholesaler', 'wholesale']):
-            return 'NB - Wholesalers'
-        if any(w in term for w in ['distributor', 'distribution']):
-            return 'NB - Distributors'
-        if any(w in term for w in ['manufacturer', 'manufacturing']):
-            return 'NB - Manufacturers'
-
-        # Priority 3: B2C/D2C terms
-        if any(w in term for w in ['b2c', 'd2c', 'direct to consumer', 'consumer ecommerce']):
-            return 'B2C EComm'
-
-        # Priority 4: B2B Other (composable, headless, unified)
-        if any(w in term for w in ['unified commerce', 'composable', 'headless', 'mach ']):
-            return 'B2B Other Keywords'
-
-        # Priority 5: Agentic Commerce
-        if any(w in term for w in ['agentic', 'ai commerce', 'ai-powered commerce']):
-            return 'Agentic Commerce'
-
-        # Priority 6: B2B EComm - specific B2B ecommerce terms
-        b2b_ecomm_patterns = ['b2b ecommerce', 'b2b e-commerce', 'b2b commerce platform',
-                              'b2b ecommerce platform', 'enterprise ecommerce',
-                              'business to business ecommerce', 'b2b online store']
-        for pattern in b2b_ecomm_patterns:
-            if pattern in term:
-                return 'B2B EComm'
-
-        # Priority 7: General B2B catch-all
-        if 'b2b' in term:
-            return 'NB - General B2B'
-
-        # No clear intent
-        return None
-
     # Define ad group themes for intent detection (legacy - kept for reference)
     AD_GROUP_THEMES = {
         'OMS': ['oms', 'order management', 'fulfillment', 'inventory', 'warehouse',
@@ -219,47 +156,136 @@ def analyze_traffic_routing(search_terms, ad_group_negatives):
         'NB - General B2B': ['b2b'],  # Catch-all for general B2B terms
     }
 
-    analysis = []
+    # Compile every ad group's negatives once for the whole run; blocking
+    # results are cached per term until the negatives change
+    negative_matcher = NegativeMatcher(ad_group_negatives)
 
+    if workers != 1:
+        yield from _iter_traffic_routing_parallel(search_terms, negative_matcher, workers, chunk_size)
+        return
+
+    blocked_cache = term_cache.TermCache('negative_blocks', term_cache.rules_version(ad_group_negatives))
     for term in search_terms:
-        if 'nonbrand' not in term['campaign_name'].lower():
-            continue
-        if term['is_brand_term']:
-            continue
-
-        search_lower = term['search_term'].lower()
-        actual_ag = term['ad_group_name']
-
-        # Find which ad groups this term is blocked from
-        blocked_from = check_blocked_by_negative(term['search_term'], ad_group_negatives)
-        blocked_ag_names = [b[0] for b in blocked_from]
-
-        # Determine natural intent using priority-based detection
-        natural_intent_ag = detect_intent(term['search_term'])
-
-        if natural_intent_ag == actual_ag:
-            routing_status = 'CORRECT_BY_INTENT'
-            routing_reason = f'Term matches {actual_ag} theme'
-        elif natural_intent_ag and natural_intent_ag in blocked_ag_names:
-            routing_status = 'CORRECT_BY_NEGATIVE'
-            neg_used = [b[1] for b in blocked_from if b[0] == natural_intent_ag][0]
-            routing_reason = f'Blocked from {natural_intent_ag} by negative [{neg_used}]'
-        elif natural_intent_ag and natural_intent_ag != actual_ag:
-            routing_status = 'POTENTIAL_MISMATCH'
-            routing_reason = f'Expected {natural_intent_ag}, but in {actual_ag}'
-        else:
-            routing_status = 'NO_CLEAR_INTENT'
-            routing_reason = 'No strong theme match detected'
-
-        analysis.append({
-            **term,
-            'routing_status': routing_status,
-            'routing_reason': routing_reason,
-            'natural_intent': natural_intent_ag or 'UNCLEAR',
-            'blocked_from': ', '.join(blocked_ag_names) if blocked_from else '',
-        })
-
-    return analysis
+        item = route_term(term, negative_matcher, blocked_cache)
+        if item:
+            yield item
+
+
+def route_term(term, negative_matcher, blocked_cache):
+    """Routing result for one search term, or None if it is not a NonBrand term"""
+    if 'nonbrand' not in term['campaign_name'].lower():
+        return None
+    if term['is_brand_term']:
+        return None
+
+    actual_ag = term['ad_group_name']
+
+    # Find which ad groups this term is blocked from
+    blocked_from = blocked_cache.lookup(term['search_term'], negative_matcher.find)
+    blocked_ag_names = [b[0] for b in blocked_from]
+
+    # Determine natural intent using priority-based detection
+    natural_intent_ag, intent_rule = detect_intent(term['search_term'])
+
+    if natural_intent_ag == actual_ag:
+        routing_status = 'CORRECT_BY_INTENT'
+        routing_reason = f'Term matches {actual_ag} theme'
+    elif natural_intent_ag and natural_intent_ag in blocked_ag_names:
+        routing_status = 'CORRECT_BY_NEGATIVE'
+        neg_used = [b[1] for b in blocked_from if b[0] == natural_intent_ag][0]
+        routing_reason = f'Blocked from {natural_intent_ag} by negative [{neg_used}]'
+    elif natural_intent_ag and natural_intent_ag != actual_ag:
+        routing_status = 'POTENTIAL_MISMATCH'
+        routing_reason = f'Expected {natural_intent_ag}, but in {actual_ag}'
+    else:
+        routing_status = 'NO_CLEAR_INTENT'
+        routing_reason = 'No strong theme match detected'
+
+    return {
+        **term,
+        'routing_status': routing_status,
+        'routing_reason': routing_reason,
+        'natural_intent': natural_intent_ag or 'UNCLEAR',
+        'intent_rule': intent_rule or '',
+        'blocked_from': ', '.join(blocked_ag_names) if blocked_from else '',
+    }
+
+
+# Per-process state for parallel routing workers, set once by the initializer
+_worker_matcher = None
+_worker_blocked = None
+
+
+def _init_routing_worker(negative_matcher):
+    global _worker_matcher, _worker_blocked
+    # Workers exit without running atexit hooks, so never write the on-disk
+    # term caches from them; lookups are memoized in memory instead
+    os.environ['KIBO_TERM_CACHE'] = '0'
+    _worker_matcher = negative_matcher
+    _worker_blocked = term_cache.TermCache('negative_blocks', 'worker')
+
+
+def _route_chunk(terms):
+    return [item for item in (route_term(t, _worker_matcher, _worker_blocked) for t in terms) if item]
+
+
+def _iter_traffic_routing_parallel(search_terms, negative_matcher, workers, chunk_size):
+    """
+    Shard terms into chunks across worker processes. The compiled
+    negatives are sent to each worker once, when it starts. Results are
+    yielded in input order, so output matches a single-process run.
+    Only a few chunks per worker are in flight, to bound memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    terms = iter(search_terms)
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_routing_worker,
+                             initargs=(negative_matcher,)) as pool:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(terms, chunk_size))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_route_chunk, chunk))
+            if not pending:
+                break
+            yield from pending.popleft().result()
+
+
+def analyze_traffic_routing(search_terms, ad_group_negatives, workers=1):
+    """
+    Analyze traffic routing for all NonBrand terms (see iter_traffic_routing).
+    workers > 1 (or None for one per CPU) classifies in parallel processes.
+    """
+    return list(iter_traffic_routing(search_terms, ad_group_negatives, workers=workers))
+
+
+def refined_recommendation(item):
+    """Build a recommendation for a true mismatch, or None"""
+    if item['routing_status'] != 'POTENTIAL_MISMATCH':
+        return None
+
+    # Check if it's high-value enough to warrant action
+    if item['cost'] < 10 and item['clicks'] < 2:
+        return None
+
+    return {
+        'priority': 'REVIEW',
+        'search_term': item['search_term'],
+        'current_ad_group': item['ad_group_name'],
+        'expected_ad_group': item['natural_intent'],
+        'clicks': item['clicks'],
+        'cost': item['cost'],
+        'conversions': item['conversions'],
+        'reason': item['routing_reason'],
+        'action': f'Consider adding to {item["ad_group_name"]} negative list to route to {item["natural_intent"]}',
+    }
+
+
+def recommendation_sort_key(rec):
+    """Highest spend first; ties broken by term and ad group so order is deterministic"""
+    return (-rec['cost'], rec['search_term'], rec['current_ad_group'])
 
 
 def generate_refined_recommendations(analysis):
@@ -267,27 +293,67 @@ def generate_refined_recommendations(analysis):
     recommendations = []
 
     for item in analysis:
-        if item['routing_status'] == 'POTENTIAL_MISMATCH':
-            # Check if it's high-value enough to warrant action
-            if item['cost'] >= 10 or item['clicks'] >= 2:
-                recommendations.append({
-                    'priority': 'REVIEW',
-                    'search_term': item['search_term'],
-                    'current_ad_group': item['ad_group_name'],
-                    'expected_ad_group': item['natural_intent'],
-                    'clicks': item['clicks'],
-                    'cost': item['cost'],
-                    'conversions': item['conversions'],
-                    'reason': item['routing_reason'],
-                    'action': f'Consider adding to {item["ad_group_name"]} negative list to route to {item["natural_intent"]}',
-                })
-
-    recommendations.sort(key=lambda x: -x['cost'])
+        rec = refined_recommendation(item)
+        if rec:
+            recommendations.append(rec)
+
+    recommendations.sort(key=recommendation_sort_key)
     return recommendations
 
 
-def print_traffic_shaping_summary(analysis, ad_group_negatives):
-    """Print comprehensive traffic shaping analysis"""
+def new_routing_summary(top_n=10):
+    """Empty accumulator for the traffic shaping summary"""
+    return {
+        'top_n': top_n,
+        'seen': 0,
+        'status_counts': defaultdict(int),
+        'status_spend': defaultdict(float),
+        'shaped_top': [],
+        'mismatch_top': [],
+        'ag_stats': defaultdict(lambda: {'terms': 0, 'clicks': 0, 'cost': 0, 'conv': 0}),
+    }
+
+
+def _push_top(heap, item, seq, top_n):
+    """Keep the top_n items by cost; ties keep the earliest item (like a stable sort)"""
+    entry = (item['cost'], -seq, item)
+    if len(heap) < top_n:
+        heapq.heappush(heap, entry)
+    elif entry[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, entry)
+
+
+def update_routing_summary(summary, item):
+    """Fold one routing analysis row into the summary accumulator"""
+    seq = summary['seen']
+    summary['seen'] += 1
+
+    status = item['routing_status']
+    summary['status_counts'][status] += 1
+    summary['status_spend'][status] += item['cost']
+
+    if status == 'CORRECT_BY_NEGATIVE':
+        _push_top(summary['shaped_top'], item, seq, summary['top_n'])
+    elif status == 'POTENTIAL_MISMATCH':
+        _push_top(summary['mismatch_top'], item, seq, summary['top_n'])
+
+    ag = summary['ag_stats'][item['ad_group_name']]
+    ag['terms'] += 1
+    ag['clicks'] += item['clicks']
+    ag['cost'] += item['cost']
+    ag['conv'] += item['conversions']
+
+
+def summarize_routing(analysis):
+    """Build a traffic shaping summary from routing analysis rows"""
+    summary = new_routing_summary()
+    for item in analysis:
+        update_routing_summary(summary, item)
+    return summary
+
+
+def print_traffic_shaping_summary(summary, ad_group_negatives):
+    """Print comprehensive traffic shaping analysis from a routing summary"""
 
     print("\n" + "=" * 60)
     print("TRAFFIC SHAPING ANALYSIS - Kibo Commerce NonBrand")
@@ -300,11 +366,8 @@ def print_traffic_shaping_summary(analysis, ad_group_negatives):
         print(f"  {ag_name}: {len(negs)} negatives")
 
     # Routing status breakdown
-    status_counts = defaultdict(int)
-    status_spend = defaultdict(float)
-    for item in analysis:
-        status_counts[item['routing_status']] += 1
-        status_spend[item['routing_status']] += item['cost']
+    status_counts = summary['status_counts']
+    status_spend = summary['status_spend']
 
     print("\nROUTING STATUS BREAKDOWN")
     print("-" * 40)
@@ -321,8 +384,7 @@ def print_traffic_shaping_summary(analysis, ad_group_negatives):
     print(f"     These terms are correctly blocked from wrong ad groups")
 
     # Show examples of successful traffic shaping
-    shaped_examples = [a for a in analysis if a['routing_status'] == 'CORRECT_BY_NEGATIVE']
-    shaped_examples.sort(key=lambda x: -x['cost'])
+    shaped_examples = [entry[2] for entry in sorted(summary['shaped_top'], reverse=True)]
 
     if shaped_examples:
         print("\nTOP TRAFFIC SHAPING EXAMPLES (working as intended):")
@@ -335,8 +397,7 @@ def print_traffic_shaping_summary(analysis, ad_group_negatives):
             print()
 
     # Show potential mismatches
-    mismatches = [a for a in analysis if a['routing_status'] == 'POTENTIAL_MISMATCH']
-    mismatches.sort(key=lambda x: -x['cost'])
+    mismatches = [entry[2] for entry in sorted(summary['mismatch_top'], reverse=True)]
 
     if mismatches:
         print("\n[!] POTENTIAL MISMATCHES (need review):")
@@ -350,14 +411,7 @@ def print_traffic_shaping_summary(analysis, ad_group_negatives):
     # Ad group distribution analysis
     print("\nAD GROUP TRAFFIC DISTRIBUTION")
     print("-" * 40)
-    ag_stats = defaultdict(lambda: {'terms': 0, 'clicks': 0, 'cost': 0, 'conv': 0})
-    for item in analysis:
-        ag = item['ad_group_name']
-        ag_stats[ag]['terms'] += 1
-        ag_stats[ag]['clicks'] += item['clicks']
-        ag_stats[ag]['cost'] += item['cost']
-        ag_stats[ag]['conv'] += item['conversions']
-
+    ag_stats = summary['ag_stats']
     for ag, stats in sorted(ag_stats.items(), key=lambda x: -x[1]['cost']):
         cpa = stats['cost'] / stats['conv'] if stats['conv'] > 0 else 0
         print(f"  {ag}")
@@ -380,32 +434,41 @@ def save_csv(data, filename, fieldnames=None):
     print(f"  Saved: {filename} ({len(data)} rows)")
 
 
-def main():
+def main(workers=1):
     print("Pulling ad group negatives for traffic shaping context...")
     ad_group_negatives = get_ad_group_negatives()
     total_negs = sum(len(v) for v in ad_group_negatives.values())
     print(f"Found {total_negs} ad group level negatives across {len(ad_group_negatives)} ad groups\n")
 
-    print("Pulling search term report for last 60 days...")
-    search_terms = pull_search_term_report()
-    print(f"Retrieved {len(search_terms)} search terms\n")
+    # Stream: fetch -> classify -> write CSV -> summarize, one row at a time
+    print("Streaming search term report (last 60 days) through traffic routing analysis...")
+    summary = new_routing_summary()
+    recommendations = []
 
-    print("Analyzing traffic routing with shaping context...")
-    analysis = analyze_traffic_routing(search_terms, ad_group_negatives)
-    print(f"Analyzed {len(analysis)} NonBrand terms\n")
+    routed = iter_traffic_routing(iter_search_term_report(), ad_group_negatives, workers=workers)
+    for item in search_term_store.tee_csv(routed, f'{OUTPUT_DIR}/traffic_routing_analysis.csv'):
+        update_routing_summary(summary, item)
+        rec = refined_recommendation(item)
+        if rec:
+            recommendations.append(rec)
+    print(f"Analyzed {summary['seen']} NonBrand terms\n")
 
-    print("Generating refined recommendations...")
-    recommendations = generate_refined_recommendations(analysis)
+    recommendations.sort(key=recommendation_sort_key)
     print(f"Found {len(recommendations)} items needing review\n")
 
     # Save outputs
     print("Saving output files...")
-    save_csv(analysis, 'traffic_routing_analysis.csv')
     save_csv(recommendations, 'refined_recommendations.csv')
 
     # Print summary
-    print_traffic_shaping_summary(analysis, ad_group_negatives)
+    print_traffic_shaping_summary(summary, ad_group_negatives)
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for routing analysis (0 = one per CPU, default: 1)')
+    args = parser.parse_args()
+
+    main(workers=args.workers or None)
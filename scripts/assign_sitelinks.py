@@ -7,22 +7,13 @@ This script:
 3. Uses field_type = SITELINK for proper assignment
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_client, get_googleads_service, search
 import csv
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def get_ad_group_ids():
     """Get ad group IDs for Search - NonBrand campaign"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
     query = '''
     SELECT ad_group.id, ad_group.name
     FROM ad_group
@@ -30,7 +21,7 @@ def get_ad_group_ids():
     AND ad_group.status = 'ENABLED'
     '''
 
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+    response = search(query)
 
     ids = {}
     for row in response:
@@ -70,7 +61,7 @@ def assign_sitelinks_to_ad_groups(client, assets, ad_group_ids, dry_run=True):
         ad_group_asset = operation.create
 
         # Set ad group resource name
-        ad_group_asset.ad_group = client.get_service("AdGroupService").ad_group_path(
+        ad_group_asset.ad_group = get_googleads_service("AdGroupService").ad_group_path(
             CUSTOMER_ID, ag_id
         )
 
@@ -107,7 +98,7 @@ def assign_sitelinks_to_ad_groups(client, assets, ad_group_ids, dry_run=True):
         return None
     else:
         # Execute the operations
-        ad_group_asset_service = client.get_service("AdGroupAssetService")
+        ad_group_asset_service = get_googleads_service("AdGroupAssetService")
         response = ad_group_asset_service.mutate_ad_group_assets(
             customer_id=CUSTOMER_ID,
             operations=operations
@@ -125,7 +116,7 @@ if __name__ == '__main__':
     print("Assign Sitelink Assets to Ad Groups")
     print("=" * 70)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     # Load created assets
     print("\nLoading created sitelink assets...")
@@ -9,12 +9,8 @@ This script audits:
 5. Available Google audiences (affinity, in-market)
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
+from query_pool import run_concurrently
 import csv
 from datetime import datetime
 
@@ -267,6 +263,18 @@ def query_ad_group_info():
     return ad_groups
 
 if __name__ == '__main__':
+    # The audit queries are independent - run them all at once
+    (user_lists, custom_audiences, combined, audiences, ad_groups,
+     campaign_targeting, ag_targeting) = run_concurrently([
+        query_user_lists,
+        query_custom_audiences,
+        query_combined_audiences,
+        query_audience_info,
+        query_ad_group_info,
+        query_campaign_audience_targeting,
+        query_ad_group_audience_targeting,
+    ])
+
     print("=" * 80)
     print("Kibo Commerce Audience Audit Report")
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -276,7 +284,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("1. FIRST-PARTY AUDIENCES (Remarketing, Customer Match)")
     print("=" * 80)
-    user_lists = query_user_lists()
     if user_lists:
         print(f"\nFound {len(user_lists)} first-party audience(s):\n")
         for ul in user_lists:
@@ -296,7 +303,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("2. CUSTOM SEGMENTS (Search Terms, URLs, Apps)")
     print("=" * 80)
-    custom_audiences = query_custom_audiences()
     if custom_audiences:
         print(f"\nFound {len(custom_audiences)} custom segment(s):\n")
         for ca in custom_audiences:
@@ -314,7 +320,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("3. COMBINED AUDIENCES")
     print("=" * 80)
-    combined = query_combined_audiences()
     if combined:
         print(f"\nFound {len(combined)} combined audience(s):\n")
         for ca in combined:
@@ -331,7 +336,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("4. AUDIENCE RESOURCES (Created Audiences)")
     print("=" * 80)
-    audiences = query_audience_info()
     if audiences:
         print(f"\nFound {len(audiences)} audience resource(s):\n")
         for aud in audiences[:20]:  # Limit output
@@ -350,7 +354,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("5. SEARCH - NONBRAND AD GROUPS")
     print("=" * 80)
-    ad_groups = query_ad_group_info()
     print(f"\nFound {len(ad_groups)} enabled ad group(s):\n")
     for ag in ad_groups:
         print(f"  - {ag['name']} (ID: {ag['id']})")
@@ -359,7 +362,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("6. CAMPAIGN-LEVEL AUDIENCE TARGETING (Search - NonBrand)")
     print("=" * 80)
-    campaign_targeting = query_campaign_audience_targeting()
     if campaign_targeting:
         inclusions = [t for t in campaign_targeting if not t['is_exclusion']]
         exclusions = [t for t in campaign_targeting if t['is_exclusion']]
@@ -387,7 +389,6 @@ if __name__ == '__main__':
     print("\n" + "=" * 80)
     print("7. AD GROUP-LEVEL AUDIENCE TARGETING (Search - NonBrand)")
     print("=" * 80)
-    ag_targeting = query_ad_group_audience_targeting()
     if ag_targeting:
         # Group by ad group
         by_ag = {}
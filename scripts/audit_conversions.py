@@ -5,12 +5,7 @@ Pulls all conversion actions with metadata and metrics for last 90 days.
 Categorizes conversions as HEALTHY, BROKEN, LEGACY_UA, UNUSED, DUPLICATE, or MISCONFIGURED.
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
 from datetime import datetime, timedelta
 import csv
 from collections import defaultdict
@@ -0,0 +1,148 @@
+"""
+Async BatchJobService mode for very large mutations
+
+For rollouts of tens of thousands of operations, synchronous mutate
+calls are slow and use up request quota. A batch job instead takes the
+operations in a few large uploads, runs them server-side, and hands back
+one result per operation:
+1. create the batch job
+2. upload operations in chunks of MAX_OPERATIONS_PER_UPLOAD (chained by
+   sequence token)
+3. run it, then poll batch_job.status with backoff until DONE
+4. page through the results, passing each one to on_result as it arrives
+   so CSV logs are written while results stream in
+
+Returns the same MutateResult as mutate_pool.mutate, so callers switch
+with mutate(..., batch=True). Against fake_ads the job is simulated,
+advancing one step per status poll.
+
+Usage:
+    from batch_jobs import run_batch_job
+
+    result = run_batch_job('AdGroupCriterionService', operations,
+                           on_result=lambda index, result, error: ...)
+"""
+
+import time
+
+from ads_client import CUSTOMER_ID, get_client, get_googleads_service, search
+from mutate_pool import MutateResult, service_resource
+
+# AddBatchJobOperations accepts up to 10,000 operations per request
+MAX_OPERATIONS_PER_UPLOAD = 10000
+
+# Status polling: first interval, cap and overall limit in seconds
+POLL_INTERVAL = 5.0
+MAX_POLL_INTERVAL = 60.0
+POLL_TIMEOUT = 6 * 60 * 60
+
+RESULTS_PAGE_SIZE = 1000
+
+
+def operation_field(service_name):
+    """'AdGroupCriterionService' -> 'ad_group_criterion_operation' (MutateOperation field)"""
+    return f'{service_resource(service_name)}_operation'
+
+
+def create_batch_job(client, customer_id=CUSTOMER_ID):
+    batch_job_operation = client.get_type("BatchJobOperation")
+    client.copy_from(batch_job_operation.create, client.get_type("BatchJob"))
+    response = get_googleads_service("BatchJobService").mutate_batch_job(
+        customer_id=customer_id, operation=batch_job_operation
+    )
+    return response.result.resource_name
+
+
+def upload_operations(client, resource_name, service_name, operations):
+    """Wrap operations in MutateOperations and add them to the job in chunks"""
+    batch_job_service = get_googleads_service("BatchJobService")
+    field = operation_field(service_name)
+
+    sequence_token = None
+    for start in range(0, len(operations), MAX_OPERATIONS_PER_UPLOAD):
+        mutate_operations = []
+        for operation in operations[start:start + MAX_OPERATIONS_PER_UPLOAD]:
+            mutate_operation = client.get_type("MutateOperation")
+            client.copy_from(getattr(mutate_operation, field), operation)
+            mutate_operations.append(mutate_operation)
+
+        request = client.get_type("AddBatchJobOperationsRequest")
+        request.resource_name = resource_name
+        if sequence_token:
+            request.sequence_token = sequence_token
+        request.mutate_operations.extend(mutate_operations)
+        response = batch_job_service.add_batch_job_operations(request=request)
+        sequence_token = response.next_sequence_token
+
+
+def wait_for_batch_job(resource_name, customer_id=CUSTOMER_ID):
+    """Poll the job's status with exponential backoff until it is DONE"""
+    query = f'''
+    SELECT
+        batch_job.status,
+        batch_job.metadata.estimated_completion_ratio,
+        batch_job.metadata.executed_operation_count
+    FROM batch_job
+    WHERE batch_job.resource_name = '{resource_name}'
+    '''
+
+    interval = POLL_INTERVAL
+    deadline = time.monotonic() + POLL_TIMEOUT
+    while True:
+        rows = search(query, customer_id=customer_id, use_cache=False)
+        batch_job = rows[0].batch_job if rows else None
+        status = batch_job.status.name if batch_job else 'UNKNOWN'
+        if status == 'DONE':
+            return
+        if batch_job:
+            print(f"  Batch job {status}: {batch_job.metadata.executed_operation_count} operations executed "
+                  f"({batch_job.metadata.estimated_completion_ratio:.0%})")
+        if time.monotonic() + interval > deadline:
+            raise TimeoutError(f"Batch job {resource_name} not done after {POLL_TIMEOUT}s")
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
+def iter_batch_job_results(client, resource_name, service_name):
+    """Yield (operation index, result or None, error message or None) page by page"""
+    result_field = operation_field(service_name)[:-len('_operation')] + '_result'
+    # page_size is only settable on the request; resource_name is the sole flattened argument
+    request = client.get_type("ListBatchJobResultsRequest")
+    request.resource_name = resource_name
+    request.page_size = RESULTS_PAGE_SIZE
+    pages = get_googleads_service("BatchJobService").list_batch_job_results(request=request)
+    for batch_job_result in pages:
+        index = batch_job_result.operation_index
+        if batch_job_result.status.code:
+            yield index, None, batch_job_result.status.message
+        else:
+            yield index, getattr(batch_job_result.mutate_operation_response, result_field), None
+
+
+def run_batch_job(service_name, operations, customer_id=CUSTOMER_ID, on_result=None):
+    """
+    Run operations for service_name (e.g. 'AdGroupCriterionService') as one
+    batch job and return a MutateResult. on_result(index, result, error)
+    is called for every operation as its result is read back.
+    """
+    client = get_client()
+    result = MutateResult(len(operations))
+    if not operations:
+        return result
+
+    resource_name = create_batch_job(client, customer_id)
+    print(f"  Created batch job {resource_name}")
+    upload_operations(client, resource_name, service_name, operations)
+    print(f"  Uploaded {len(operations)} operations")
+
+    get_googleads_service("BatchJobService").run_batch_job(resource_name=resource_name)
+    wait_for_batch_job(resource_name, customer_id)
+
+    for index, op_result, error in iter_batch_job_results(client, resource_name, service_name):
+        if error:
+            result.errors[index] = error
+        else:
+            result.results[index] = op_result
+        if on_result:
+            on_result(index, op_result, error)
+    return result
@@ -0,0 +1,361 @@
+"""
+Consolidate repeated ad group negatives into shared negative keyword lists
+
+Shared negative keyword lists (SharedSet of type NEGATIVE_KEYWORDS) are
+attached to campaigns, so a list blocks a term in every ad group of the
+campaign. To reproduce the current blocking exactly, a negative (text +
+match type) can only move to a list if every ad group in the campaign
+already has it; everything else stays as an ad group negative
+(the residual).
+
+Negatives that are common to the same set of campaigns go into one list
+attached to all of them, so the plan uses one list per distinct campaign
+set - the fewest lists that reproduce the current state. Lists are split
+at SHARED_SET_MAX_KEYWORDS.
+
+Migration runs in an order that never leaves a gap in blocking:
+1. create the shared sets
+2. add their shared criteria
+3. attach them to the campaigns
+4. remove the now-redundant ad group negatives
+Steps 1-3 look up the existing lists (by name), their keywords and
+campaign links first and only create what is missing, so a run that
+stopped partway is finished by running it again.
+
+Negatives in most but not all of a campaign's ad groups are listed
+separately - moving them would add blocking to the ad groups missing
+them, so they are left for a manual decision.
+
+Usage:
+    python scripts/consolidate_negatives.py             # dry run, writes plan
+    python scripts/consolidate_negatives.py --execute   # apply migration
+    python scripts/consolidate_negatives.py --execute --batch  # via batch jobs
+"""
+
+from ads_client import get_client, get_googleads_service, search
+from mutate_pool import mutate
+from reconcile import (CAMPAIGN_SHARED_SETS, NEGATIVE_KEYWORD_SHARED_SETS, SHARED_NEGATIVE_KEYWORDS,
+                       build_operations, diff_state, fetch_actual, reconcile)
+import csv
+from collections import defaultdict
+
+CUSTOMER_ID = '9948697111'
+
+OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
+
+# Google Ads limit on keywords in one shared negative keyword list
+SHARED_SET_MAX_KEYWORDS = 5000
+
+# Report negatives present in at least this share of a campaign's ad groups
+NEAR_COMMON_SHARE = 0.5
+
+
+def get_ad_groups():
+    """{campaign_id: {'name', 'ad_groups': {ad_group_id: name}}} for NonBrand campaigns"""
+    query = '''
+    SELECT
+        campaign.id,
+        campaign.name,
+        ad_group.id,
+        ad_group.name
+    FROM ad_group
+    WHERE campaign.name LIKE '%NonBrand%'
+    AND ad_group.status != 'REMOVED'
+    '''
+
+    campaigns = {}
+    for row in search(query):
+        campaign = campaigns.setdefault(row.campaign.id, {'name': row.campaign.name, 'ad_groups': {}})
+        campaign['ad_groups'][row.ad_group.id] = row.ad_group.name
+    return campaigns
+
+
+def get_negatives():
+    """{ad_group_id: {(text, match_type): criterion_id}} for ad group negative keywords"""
+    query = '''
+    SELECT
+        ad_group.id,
+        ad_group_criterion.criterion_id,
+        ad_group_criterion.keyword.text,
+        ad_group_criterion.keyword.match_type
+    FROM ad_group_criterion
+    WHERE ad_group_criterion.type = 'KEYWORD'
+    AND ad_group_criterion.negative = TRUE
+    AND campaign.name LIKE '%NonBrand%'
+    '''
+
+    negatives = defaultdict(dict)
+    for row in search(query):
+        key = (row.ad_group_criterion.keyword.text.lower(), row.ad_group_criterion.keyword.match_type.name)
+        negatives[row.ad_group.id][key] = row.ad_group_criterion.criterion_id
+    return negatives
+
+
+def plan_consolidation(campaigns, negatives):
+    """
+    campaigns: {campaign_id: {'name', 'ad_groups': {ad_group_id: name}}}
+    negatives: {ad_group_id: {(text, match_type): criterion_id}}
+    Returns {'lists', 'removals', 'near_common'}.
+    """
+    # Negatives every ad group of the campaign has
+    common_campaigns = defaultdict(set)    # (text, match_type) -> campaign ids
+    near_common = []
+    for campaign_id, campaign in campaigns.items():
+        ad_group_ids = list(campaign['ad_groups'])
+        if not ad_group_ids:
+            continue
+
+        counts = defaultdict(int)
+        for ad_group_id in ad_group_ids:
+            for key in negatives.get(ad_group_id, {}):
+                counts[key] += 1
+
+        for key, count in counts.items():
+            if count == len(ad_group_ids):
+                common_campaigns[key].add(campaign_id)
+            elif count > 1 and count >= NEAR_COMMON_SHARE * len(ad_group_ids):
+                near_common.append({
+                    'campaign_name': campaign['name'],
+                    'keyword': key[0],
+                    'match_type': key[1],
+                    'ad_groups_with': count,
+                    'missing_from': ', '.join(sorted(
+                        name for ag_id, name in campaign['ad_groups'].items()
+                        if key not in negatives.get(ag_id, {})
+                    )),
+                })
+
+    # One list per distinct campaign set
+    by_campaign_set = defaultdict(list)
+    for key, campaign_ids in common_campaigns.items():
+        by_campaign_set[frozenset(campaign_ids)].append(key)
+
+    lists = []
+    for campaign_ids, keys in sorted(by_campaign_set.items(), key=lambda item: -len(item[1])):
+        keys.sort()
+        campaign_names = sorted(campaigns[c]['name'] for c in campaign_ids)
+        for start in range(0, len(keys), SHARED_SET_MAX_KEYWORDS):
+            part = f" ({start // SHARED_SET_MAX_KEYWORDS + 1})" if len(keys) > SHARED_SET_MAX_KEYWORDS else ''
+            lists.append({
+                'name': f"Traffic Shaping - {' + '.join(campaign_names)}{part}",
+                'campaign_ids': sorted(campaign_ids),
+                'keywords': keys[start:start + SHARED_SET_MAX_KEYWORDS],
+            })
+
+    removals = []
+    for key, campaign_ids in common_campaigns.items():
+        for campaign_id in campaign_ids:
+            for ad_group_id, ad_group_name in campaigns[campaign_id]['ad_groups'].items():
+                removals.append({
+                    'campaign_name': campaigns[campaign_id]['name'],
+                    'ad_group_id': ad_group_id,
+                    'ad_group_name': ad_group_name,
+                    'criterion_id': negatives[ad_group_id][key],
+                    'keyword': key[0],
+                    'match_type': key[1],
+                })
+    removals.sort(key=lambda r: (r['campaign_name'], r['ad_group_name'], r['keyword'], r['match_type']))
+
+    near_common.sort(key=lambda r: (r['campaign_name'], -r['ad_groups_with'], r['keyword']))
+    return {'lists': lists, 'removals': removals, 'near_common': near_common}
+
+
+def verify_plan(campaigns, negatives, plan):
+    """True if residual ad group negatives + attached lists equal the current negatives"""
+    removed = defaultdict(set)
+    for r in plan['removals']:
+        removed[r['ad_group_id']].add((r['keyword'], r['match_type']))
+    shared = defaultdict(set)
+    for shared_list in plan['lists']:
+        for campaign_id in shared_list['campaign_ids']:
+            shared[campaign_id].update(shared_list['keywords'])
+
+    for campaign_id, campaign in campaigns.items():
+        for ad_group_id in campaign['ad_groups']:
+            current = set(negatives.get(ad_group_id, {}))
+            residual = current - removed[ad_group_id]
+            if residual | shared[campaign_id] != current:
+                return False
+    return True
+
+
+def _gaql_strings(values):
+    """GAQL list literal: 'a', 'b'"""
+    return ', '.join("'" + str(v).replace('\\', '\\\\').replace("'", "\\'") + "'" for v in values)
+
+
+def removal_operations(client, plan):
+    """AdGroupCriterion remove operations for the redundant ad group negatives (step 4)"""
+    ad_group_criterion_service = get_googleads_service("AdGroupCriterionService")
+    remove_ops = []
+    for r in plan['removals']:
+        operation = client.get_type("AdGroupCriterionOperation")
+        operation.remove = ad_group_criterion_service.ad_group_criterion_path(
+            CUSTOMER_ID, r['ad_group_id'], r['criterion_id']
+        )
+        remove_ops.append(operation)
+    return remove_ops
+
+
+def ensure_shared_sets(client, plan, batch=False):
+    """
+    {list name: shared set resource name} for the plan's lists, creating
+    only those not already in the account (step 1). Names are unique, so a
+    re-run after a failed step reuses the lists it created. None on failure.
+    """
+    names = [shared_list['name'] for shared_list in plan['lists']]
+    actual = fetch_actual(NEGATIVE_KEYWORD_SHARED_SETS, f'shared_set.name IN ({_gaql_strings(names)})', fresh=True)
+    shared_sets = {name: resource_name for name, (resource_name, _) in actual.items()}
+    missing = [name for name in names if name not in shared_sets]
+    print(f"\n1. Creating {len(missing)} shared negative lists ({len(shared_sets)} already exist)...")
+    if not missing:
+        return shared_sets
+
+    operations, _ = build_operations(client, NEGATIVE_KEYWORD_SHARED_SETS, diff_state({n: {} for n in missing}, {}))
+    response = mutate(NEGATIVE_KEYWORD_SHARED_SETS.service_name, NEGATIVE_KEYWORD_SHARED_SETS.method, operations,
+                      batch=batch)
+    if response.failed:
+        response.print_errors()
+        return None
+    shared_sets.update(zip(missing, (result.resource_name for result in response.results)))
+    return shared_sets
+
+
+def execute_plan(client, plan, batch=False):
+    """
+    Run the migration steps in order. Steps 1-3 read what already exists
+    and send only what is missing, so after a failure the whole plan can
+    simply be re-run.
+    """
+    if not plan['lists']:
+        return
+
+    # Every step must fully succeed before the next; removing ad group
+    # negatives while a list is incomplete would open a gap in blocking
+    shared_sets = ensure_shared_sets(client, plan, batch=batch)
+    if shared_sets is None:
+        print("ERROR: shared list creation failed - stopping before any negatives are changed")
+        return
+    in_plan = _gaql_strings(shared_sets[shared_list['name']] for shared_list in plan['lists'])
+
+    keywords = {(shared_sets[shared_list['name']], text, match_type): {}
+                for shared_list in plan['lists'] for text, match_type in shared_list['keywords']}
+    links = {(str(campaign_id), shared_sets[shared_list['name']]): {}
+             for shared_list in plan['lists'] for campaign_id in shared_list['campaign_ids']}
+    steps = [
+        ("2. Adding {} shared negative keywords", SHARED_NEGATIVE_KEYWORDS, keywords,
+         f'shared_set.resource_name IN ({in_plan})'),
+        ("3. Attaching lists to {} campaigns", CAMPAIGN_SHARED_SETS, links,
+         f'campaign_shared_set.shared_set IN ({in_plan})'),
+    ]
+    for message, spec, desired, where in steps:
+        print(message.format(len(desired)) + "...")
+        diff, response = reconcile(spec, desired, where=where, dry_run=False, batch=batch)
+        print(f"  {diff.summary()}")
+        if response is not None and response.failed:
+            response.print_errors()
+            print(f"ERROR: {response.failed} operations failed - stopping here; "
+                  f"re-run once fixed (completed work is detected and skipped)")
+            return
+
+    remove_ops = removal_operations(client, plan)
+    print(f"4. Removing {len(remove_ops)} redundant ad group negatives...")
+    response = mutate("AdGroupCriterionService", "mutate_ad_group_criteria", remove_ops, batch=batch)
+    if response.failed:
+        response.print_errors()
+        print(f"ERROR: {response.failed} operations failed - stopping here; "
+              f"re-run once fixed (the plan is rebuilt from the remaining negatives)")
+        return
+    print("\nMigration complete.")
+
+
+def plan_rows(plan):
+    """Flat, ordered operation list for review (negative_list_migration.csv)"""
+    rows = []
+    for shared_list in plan['lists']:
+        rows.append({'step': 1, 'operation': 'CREATE_SHARED_SET', 'shared_set': shared_list['name']})
+    for shared_list in plan['lists']:
+        for text, match_type in shared_list['keywords']:
+            rows.append({'step': 2, 'operation': 'CREATE_SHARED_CRITERION', 'shared_set': shared_list['name'],
+                         'keyword': text, 'match_type': match_type})
+    for shared_list in plan['lists']:
+        for campaign_id in shared_list['campaign_ids']:
+            rows.append({'step': 3, 'operation': 'ATTACH_TO_CAMPAIGN', 'shared_set': shared_list['name'],
+                         'campaign_id': campaign_id})
+    for r in plan['removals']:
+        rows.append({'step': 4, 'operation': 'REMOVE_AD_GROUP_NEGATIVE', 'campaign_name': r['campaign_name'],
+                     'ad_group_name': r['ad_group_name'], 'criterion_id': r['criterion_id'],
+                     'keyword': r['keyword'], 'match_type': r['match_type']})
+    return rows
+
+
+def save_csv(rows, fieldnames, filename):
+    filepath = f'{OUTPUT_DIR}/{filename}'
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"  Saved: {filename} ({len(rows)} rows)")
+
+
+def main(execute=False, batch=False):
+    print("=" * 60)
+    print("NEGATIVE KEYWORD LIST CONSOLIDATION")
+    print("=" * 60)
+
+    client = get_client()
+
+    print("\nLoading ad groups and negatives...")
+    campaigns = get_ad_groups()
+    negatives = get_negatives()
+    before = sum(len(n) for n in negatives.values())
+    print(f"  {len(campaigns)} campaigns, "
+          f"{sum(len(c['ad_groups']) for c in campaigns.values())} ad groups, {before} ad group negatives")
+
+    plan = plan_consolidation(campaigns, negatives)
+    if not verify_plan(campaigns, negatives, plan):
+        print("ERROR: plan does not reproduce current blocking - aborting")
+        return
+
+    shared = sum(len(l['keywords']) for l in plan['lists'])
+    links = sum(len(l['campaign_ids']) for l in plan['lists'])
+    after = before - len(plan['removals']) + shared
+    print(f"\nPlan: {len(plan['lists'])} shared lists ({shared} keywords, {links} campaign links)")
+    print(f"  Ad group negatives removed: {len(plan['removals'])}")
+    print(f"  Criteria: {before} -> {after}")
+
+    for shared_list in plan['lists']:
+        print(f"\n  {shared_list['name']} ({len(shared_list['keywords'])} keywords)")
+        for text, match_type in shared_list['keywords'][:10]:
+            print(f"    - {text} ({match_type})")
+        if len(shared_list['keywords']) > 10:
+            print(f"    ... +{len(shared_list['keywords']) - 10} more")
+
+    if plan['near_common']:
+        print(f"\n{len(plan['near_common'])} negatives are in most but not all ad groups of their campaign "
+              f"(not moved - a shared list would add blocking to the rest):")
+        for r in plan['near_common'][:10]:
+            print(f"  {r['keyword']} ({r['match_type']}): missing from {r['missing_from']}")
+
+    print("\nSaving output files...")
+    save_csv(plan_rows(plan), ['step', 'operation', 'shared_set', 'campaign_id', 'campaign_name', 'ad_group_name',
+                               'criterion_id', 'keyword', 'match_type'], 'negative_list_migration.csv')
+    save_csv(plan['near_common'], ['campaign_name', 'keyword', 'match_type', 'ad_groups_with', 'missing_from'],
+             'negative_list_near_common.csv')
+
+    if not plan['lists']:
+        print("\nNo negatives are shared by every ad group of a campaign - nothing to consolidate.")
+    elif execute:
+        execute_plan(client, plan, batch=batch)
+    else:
+        print("\nDRY RUN - use --execute to apply the migration")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--execute', action='store_true', help='Apply the migration (default is dry run)')
+    parser.add_argument('--batch', action='store_true', help='Run the large steps as async batch jobs')
+    args = parser.parse_args()
+
+    main(execute=args.execute, batch=args.batch)
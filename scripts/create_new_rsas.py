@@ -7,22 +7,16 @@ Creates 1 new RSA per ad group in Search - NonBrand campaign with:
 - Conversion-focused messaging
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_client, get_googleads_service, search
+from mutate_pool import mutate
+from url_health import gate_final_urls
 import csv
+import sys
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def get_ad_group_ids():
     """Get ad group IDs for Search - NonBrand campaign"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
     query = '''
     SELECT ad_group.id, ad_group.name
     FROM ad_group
@@ -30,7 +24,7 @@ def get_ad_group_ids():
     AND ad_group.status = 'ENABLED'
     '''
 
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+    response = search(query)
 
     ids = {}
     for row in response:
@@ -98,7 +92,7 @@ def create_rsas(client, ad_group_ids, ad_copy, dry_run=True):
         ad_group_ad = operation.create
 
         # Set ad group
-        ad_group_ad.ad_group = client.get_service("AdGroupService").ad_group_path(
+        ad_group_ad.ad_group = get_googleads_service("AdGroupService").ad_group_path(
             CUSTOMER_ID, ag_id
         )
 
@@ -172,24 +166,22 @@ def create_rsas(client, ad_group_ids, ad_copy, dry_run=True):
             print(f"    URL: {c['url']}")
         return None
     else:
-        ad_group_ad_service = client.get_service("AdGroupAdService")
-        response = ad_group_ad_service.mutate_ad_group_ads(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
+        response = mutate("AdGroupAdService", "mutate_ad_group_ads", operations)
         return response, created
 
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--execute', action='store_true', help='Execute (default is dry run)')
+    parser.add_argument('--skip-url-check', action='store_true',
+                        help='Execute even if landing page URLs are broken or missing their #anchor')
     args = parser.parse_args()
 
     print("=" * 60)
     print("Create New RSA Ads from Recommendations")
     print("=" * 60)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     print("\nGetting ad group IDs...")
     ad_group_ids = get_ad_group_ids()
@@ -206,6 +198,10 @@ if __name__ == '__main__':
     print(f"  Filtered to NonBrand: {list(filtered_copy.keys())}")
 
     if args.execute:
+        if not args.skip_url_check and gate_final_urls([copy['final_url'] for copy in filtered_copy.values()]):
+            print("\nNot creating ads: fix the URLs above (or pass --skip-url-check)")
+            sys.exit(1)
+
         print("\n" + "=" * 60)
         print("CREATING RSA ADS")
         print("=" * 60)
@@ -213,11 +209,15 @@ if __name__ == '__main__':
         result = create_rsas(client, ad_group_ids, filtered_copy, dry_run=False)
         if result:
             response, created = result
-            print(f"\nSuccessfully created {len(response.results)} RSA ads!")
+            print(f"\nSuccessfully created {response.succeeded} RSA ads!")
             for i, res in enumerate(response.results):
+                if res is None:
+                    continue
                 print(f"  Created: {res.resource_name}")
                 if i < len(created):
                     print(f"    Ad Group: {created[i]['ad_group']}")
+            for i, message in sorted(response.errors.items()):
+                print(f"  FAILED: {created[i]['ad_group']} - {message}")
     else:
         print("\n" + "=" * 60)
         print("DRY RUN MODE (use --execute to create ads)")
@@ -7,19 +7,20 @@ Each asset includes:
 - Description 1 - 35 char limit
 - Description 2 - 35 char limit
 - Final URL
-"""
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
+Every asset and its result is journaled; --resume picks up an interrupted
+run without creating duplicates. Final URLs are health-checked (url_health)
+before --execute.
+"""
 
-from google.ads.googleads.client import GoogleAdsClient
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_client, search
+from mutate_pool import mutate
+from mutation_journal import journaled_mutate
+from url_health import gate_final_urls
 import csv
+import sys
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def load_sitelink_mapping(filepath):
     """Load sitelink definitions from CSV"""
@@ -53,8 +54,27 @@ def validate_sitelink(sitelink):
 
     return errors
 
-def create_sitelink_assets(client, sitelinks, dry_run=True):
-    """Create sitelink assets in Google Ads"""
+def sitelink_asset_name(sl):
+    """Asset name, also the journal key identifying the sitelink across runs"""
+    return f"Sitelink - {sl['ad_group']} - {sl['link_text']}"
+
+def find_created_sitelinks(names):
+    """{asset name: resource name} for the given names that already exist (one bulk read)"""
+    query = '''
+    SELECT asset.resource_name, asset.name
+    FROM asset
+    WHERE asset.type = 'SITELINK'
+    '''
+
+    wanted = set(names)
+    return {row.asset.name: row.asset.resource_name for row in search(query, use_cache=False)
+            if row.asset.name in wanted}
+
+def create_sitelink_assets(client, sitelinks, dry_run=True, journal_path=None, resume=False):
+    """
+    Create sitelink assets in Google Ads. journal_path records every asset
+    and its result; resume=True skips those an earlier run created.
+    """
     operations = []
     created = []
 
@@ -72,7 +92,7 @@ def create_sitelink_assets(client, sitelinks, dry_run=True):
         asset = operation.create
 
         # Set asset name for identification
-        asset.name = f"Sitelink - {sl['ad_group']} - {sl['link_text']}"
+        asset.name = sitelink_asset_name(sl)
 
         # Set sitelink asset fields
         asset.sitelink_asset.link_text = sl['link_text']
@@ -105,15 +125,21 @@ def create_sitelink_assets(client, sitelinks, dry_run=True):
         return None
     else:
         # Execute the operations
-        asset_service = client.get_service("AssetService")
-        response = asset_service.mutate_assets(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
+        if journal_path:
+            response = journaled_mutate("AssetService", "mutate_assets", operations,
+                                        [sitelink_asset_name(sl) for sl in created], journal_path,
+                                        resume=resume, verify=find_created_sitelinks)
+        else:
+            response = mutate("AssetService", "mutate_assets", operations)
+
+        for i, message in sorted(response.errors.items()):
+            print(f"  FAILED: {created[i]['ad_group']} - {created[i]['link_text']}: {message}")
 
         # Map resource names back to sitelinks
         results = []
         for i, result in enumerate(response.results):
+            if result is None:
+                continue
             results.append({
                 'resource_name': result.resource_name,
                 'ad_group': created[i]['ad_group'],
@@ -124,8 +150,6 @@ def create_sitelink_assets(client, sitelinks, dry_run=True):
 
 def get_ad_group_ids():
     """Get ad group IDs for Search - NonBrand campaign"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
     query = '''
     SELECT ad_group.id, ad_group.name
     FROM ad_group
@@ -133,7 +157,7 @@ def get_ad_group_ids():
     AND ad_group.status = 'ENABLED'
     '''
 
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
+    response = search(query)
 
     ids = {}
     for row in response:
@@ -144,13 +168,17 @@ if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--execute', action='store_true', help='Execute (default is dry run)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted --execute run from its journal (skips created assets)')
+    parser.add_argument('--skip-url-check', action='store_true',
+                        help='Execute even if sitelink URLs are broken or missing their #anchor')
     args = parser.parse_args()
 
     print("=" * 70)
     print("Create Ad Group-Level Sitelink Assets")
     print("=" * 70)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     print("\nLoading sitelink mapping...")
     mapping_file = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data/sitelink_mapping.csv'
@@ -178,11 +206,17 @@ if __name__ == '__main__':
         print(f"  {name}: {id}")
 
     if args.execute:
+        if not args.skip_url_check and gate_final_urls([sl['final_url'] for sl in sitelinks]):
+            print("\nNot creating sitelinks: fix the URLs above (or pass --skip-url-check)")
+            sys.exit(1)
+
         print("\n" + "=" * 70)
         print("CREATING SITELINK ASSETS")
         print("=" * 70)
 
-        results = create_sitelink_assets(client, sitelinks, dry_run=False)
+        journal_file = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data/sitelink_create_journal.jsonl'
+        results = create_sitelink_assets(client, sitelinks, dry_run=False, journal_path=journal_file,
+                                         resume=args.resume)
 
         if results:
             print(f"\nSuccessfully created {len(results)} sitelink assets!")
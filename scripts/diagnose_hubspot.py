@@ -8,12 +8,8 @@ Checks the status of HubSpot-Google Ads integration:
 4. Recommendations for optimizing the HubSpot integration
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
+from query_pool import run_concurrently
 from datetime import datetime, timedelta
 from collections import defaultdict
 
@@ -344,8 +340,11 @@ if __name__ == '__main__':
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("=" * 80)
 
-    get_hubspot_conversion_actions()
-    get_hubspot_conversion_data()
-    check_offline_upload_jobs()
-    analyze_hubspot_health()
+    # Sections query independently; output is replayed in section order
+    run_concurrently([
+        get_hubspot_conversion_actions,
+        get_hubspot_conversion_data,
+        check_offline_upload_jobs,
+        analyze_hubspot_health,
+    ])
     provide_hubspot_recommendations()
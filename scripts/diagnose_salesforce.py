@@ -7,12 +7,8 @@ Checks the status of Salesforce-Google Ads integration:
 3. Recent conversion data (if any)
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
+from query_pool import run_concurrently
 from datetime import datetime, timedelta
 
 CUSTOMER_ID = '9948697111'
@@ -317,9 +313,12 @@ if __name__ == '__main__':
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("=" * 80)
 
-    check_salesforce_link()
-    get_salesforce_conversion_details()
-    check_salesforce_conversion_data()
-    check_offline_conversion_uploads()
-    check_account_links()
+    # Sections query independently; output is replayed in section order
+    run_concurrently([
+        check_salesforce_link,
+        get_salesforce_conversion_details,
+        check_salesforce_conversion_data,
+        check_offline_conversion_uploads,
+        check_account_links,
+    ])
     provide_diagnosis()
@@ -5,12 +5,7 @@ This conversion action has include_in_conversions=True but 0 conversions,
 which pollutes Smart Bidding signals. This script disables it.
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service, _get_googleads_client as get_googleads_client
+from ads_client import get_client, get_googleads_service
 from google.protobuf import field_mask_pb2
 from datetime import datetime
 
@@ -28,8 +23,8 @@ def disable_conversion_action():
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("=" * 80)
 
-    client = get_googleads_client()
-    conversion_action_service = client.get_service("ConversionActionService")
+    client = get_client()
+    conversion_action_service = get_googleads_service("ConversionActionService")
 
     # Create the resource name
     resource_name = f"customers/{CUSTOMER_ID}/conversionActions/{CONVERSION_ACTION_ID}"
@@ -0,0 +1,968 @@
+"""
+Offline stand-in for the Google Ads API
+
+Serves GAQL queries from recorded fixtures (the CSV exports in data/)
+instead of the live API, so analyzers can be benchmarked and regression
+tested without credentials or network access.
+
+- Rows are protobuf-shaped: row.ad_group.name, row.metrics.cost_micros,
+  row.segments.keyword.info.match_type.name all work as they do on a
+  real GoogleAdsRow.
+- WHERE clauses are evaluated (=, !=, <, >, LIKE, IN, BETWEEN, DURING,
+  IS NULL), along with ORDER BY and LIMIT. Conditions on fields a fixture
+  does not record are treated as matching.
+- keyword_view has a row per keyword per day, with the metrics of the
+  search terms it matched; queries that do not select segments.date get
+  them summed per keyword, as from the API.
+- mutate_* calls are recorded on client.mutations and answered with
+  generated resource names; nothing is sent anywhere. Set
+  client.mutate_errors to fail chosen operations (see _record_mutate).
+- BatchJobService jobs are simulated: a running job advances one step
+  per batch_job status query and is DONE after client.batch_job_steps.
+- latency adds a sleep per search, per search_stream batch and per mutate
+  to approximate API round trips.
+
+Usage:
+    import ads_client, fake_ads
+
+    ads_client.install(fake_ads.FakeGoogleAdsClient.from_data_dir(latency=0.05))
+    ...  # any script's functions now read fixtures
+    print(ads_client.get_client().mutations)
+
+or set KIBO_ADS_FAKE=<data dir> so get_client() builds one on first use.
+
+Benchmark the traffic routing analysis at synthetic scale:
+    python scripts/fake_ads.py --search-terms 1000000
+"""
+
+import ast
+import csv
+import fnmatch
+import itertools
+import os
+import pickle
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+SEARCH_TERM_REPORT = 'search_term_report_60d.csv'
+KEYWORDS_REPORT = 'current_keywords_with_ids.csv'
+NEGATIVES_REPORT = 'ad_group_negatives.csv'
+
+# Days the recorded search term report covers; rows are spread over it
+SEARCH_TERM_DAYS = 60
+
+STREAM_BATCH_SIZE = 10000
+
+
+# ---------------------------------------------------------------------------
+# Protobuf-shaped values
+# ---------------------------------------------------------------------------
+
+class EnumValue(int):
+    """Enum member that behaves like a proto enum: an int with a .name"""
+
+    def __new__(cls, value, name):
+        obj = int.__new__(cls, value)
+        obj.name = name
+        return obj
+
+    def __repr__(self):
+        return self.name
+
+    def __reduce__(self):
+        return EnumValue, (int(self), self.name)
+
+
+# Members (after UNSPECIFIED = 0 and UNKNOWN = 1) of the enums the scripts and
+# fixtures use, in the API's order; they are numbered from 2 in this order
+ENUM_MEMBERS = {
+    'AdGroupAdStatusEnum': ('ENABLED', 'PAUSED', 'REMOVED'),
+    'AdGroupCriterionStatusEnum': ('ENABLED', 'PAUSED', 'REMOVED'),
+    'AdGroupStatusEnum': ('ENABLED', 'PAUSED', 'REMOVED'),
+    'AdvertisingChannelTypeEnum': ('SEARCH', 'DISPLAY', 'SHOPPING', 'HOTEL', 'VIDEO'),
+    'BatchJobStatusEnum': ('PENDING', 'RUNNING', 'DONE'),
+    'CampaignSharedSetStatusEnum': ('ENABLED', 'REMOVED'),
+    'CampaignStatusEnum': ('ENABLED', 'PAUSED', 'REMOVED'),
+    'ConversionActionStatusEnum': ('ENABLED', 'REMOVED', 'HIDDEN'),
+    'CriterionTypeEnum': ('KEYWORD', 'PLACEMENT'),
+    'KeywordMatchTypeEnum': ('EXACT', 'PHRASE', 'BROAD'),
+    'SearchTermTargetingStatusEnum': ('ADDED', 'EXCLUDED', 'ADDED_EXCLUDED', 'NONE'),
+    'SharedSetStatusEnum': ('ENABLED', 'REMOVED'),
+    'SharedSetTypeEnum': ('NEGATIVE_KEYWORDS', 'NEGATIVE_PLACEMENTS'),
+}
+
+_enum_values = {}
+
+
+def enum_value(enum_name, member):
+    """
+    EnumValue for enum_name.member: UNSPECIFIED is 0, UNKNOWN is 1, members
+    in ENUM_MEMBERS are numbered from 2 in their listed order and any other
+    member gets a number derived from its name, so the same member has the
+    same number in every run and process
+    """
+    key = (enum_name, member)
+    value = _enum_values.get(key)
+    if value is None:
+        members = ENUM_MEMBERS.get(enum_name, ())
+        if member == 'UNSPECIFIED':
+            number = 0
+        elif member == 'UNKNOWN':
+            number = 1
+        elif member in members:
+            number = 2 + members.index(member)
+        else:
+            number = 1000 + zlib.crc32(member.encode('utf-8')) % 1_000_000
+        value = _enum_values.setdefault(key, EnumValue(number, member))
+    return value
+
+
+class _Enum:
+    def __init__(self, enum_name):
+        self._enum_name = enum_name
+
+    def __getattr__(self, member):
+        if member.startswith('_'):
+            raise AttributeError(member)
+        return enum_value(self._enum_name, member)
+
+
+class _Enums:
+    """client.enums - any enum, any member (client.enums.KeywordMatchTypeEnum.BROAD)"""
+
+    def __getattr__(self, enum_name):
+        if enum_name.startswith('_'):
+            raise AttributeError(enum_name)
+        return _Enum(enum_name)
+
+
+class Message:
+    """
+    Auto-vivifying stand-in for a proto message. Reading an unset field
+    returns an empty (falsy) sub-message that can be assigned into, so
+    operation.create.keyword.text = 'x' works. A sub-message also acts as
+    a repeated field once append()/extend() is called on it.
+    """
+
+    def __init__(self, **fields):
+        object.__setattr__(self, '_items', None)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        child = Message()
+        object.__setattr__(self, name, child)
+        return child
+
+    def _fields(self):
+        return {k: v for k, v in self.__dict__.items() if k != '_items'}
+
+    # Repeated-field behaviour
+    def append(self, item):
+        if self._items is None:
+            object.__setattr__(self, '_items', [])
+        self._items.append(item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __iter__(self):
+        return iter(self._items or [])
+
+    def __len__(self):
+        return len(self._items or [])
+
+    def __getitem__(self, index):
+        return (self._items or [])[index]
+
+    def __contains__(self, name):
+        # Field presence, as on proto-plus messages ('quota_error' in error.error_code)
+        value = self.__dict__.get(name)
+        return value is not None and (not isinstance(value, Message) or bool(value))
+
+    def __bool__(self):
+        return bool(self._items) or any(
+            not isinstance(v, Message) or v for v in self._fields().values())
+
+    def __eq__(self, other):
+        if not isinstance(other, Message):
+            return NotImplemented
+        return self._fields() == other._fields() and (self._items or []) == (other._items or [])
+
+    def __repr__(self):
+        if self._items is not None:
+            return repr(self._items)
+        return 'Message(%s)' % ', '.join(f'{k}={v!r}' for k, v in self._fields().items())
+
+    def CopyFrom(self, other):
+        self.__dict__.clear()
+        object.__setattr__(self, '_items', None if other._items is None else list(other._items))
+        for name, value in other._fields().items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def serialize(cls, message):
+        return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def deserialize(cls, data):
+        return pickle.loads(data)
+
+
+def get_field(message, path):
+    """Read a dotted GAQL field (e.g. 'ad_group.name'); None if unset"""
+    value = message
+    for part in path.split('.'):
+        value = value.__dict__.get(part) if isinstance(value, Message) else None
+        if value is None:
+            return None
+    return value
+
+
+def set_field(message, path, value):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        message = getattr(message, part)
+    setattr(message, parts[-1], value)
+
+
+def make_row(fields):
+    """Build a GoogleAdsRow-shaped Message from {'ad_group.name': ..., ...}"""
+    row = Message()
+    for path, value in fields.items():
+        set_field(row, path, value)
+    return row
+
+
+# ---------------------------------------------------------------------------
+# GAQL evaluation
+# ---------------------------------------------------------------------------
+
+QUERY_REGEX = re.compile(
+    r'^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<resource>\w+)'
+    r'(?:\s+WHERE\s+(?P<where>.+?))?'
+    r'(?:\s+ORDER\s+BY\s+(?P<order>.+?))?'
+    r'(?:\s+LIMIT\s+(?P<limit>\d+))?'
+    r'(?:\s+PARAMETERS\s+.+?)?\s*$',
+    re.IGNORECASE | re.DOTALL,
+)
+
+_VALUE = r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|[-\w.]+"
+CONDITION_REGEX = re.compile(
+    r'\s*(?P<field>[\w.]+)\s*'
+    r'(?:(?P<null>IS\s+(?:NOT\s+)?NULL)'
+    r'|(?P<between>BETWEEN)\s+(?P<low>' + _VALUE + r')\s+AND\s+(?P<high>' + _VALUE + r')'
+    r'|(?P<list_op>NOT\s+IN|IN|CONTAINS\s+ANY|CONTAINS\s+ALL|CONTAINS\s+NONE)\s*\((?P<list>[^)]*)\)'
+    r'|(?P<op>=|!=|>=|<=|>|<|NOT\s+LIKE|LIKE|NOT\s+REGEXP_MATCH|REGEXP_MATCH|DURING)\s*(?P<value>' + _VALUE + r'))'
+    r'\s*(?:AND\b|$)',
+    re.IGNORECASE,
+)
+
+DURING_DAYS = {
+    'TODAY': 0, 'YESTERDAY': 1, 'LAST_7_DAYS': 7, 'LAST_14_DAYS': 14,
+    'LAST_30_DAYS': 30, 'THIS_WEEK_SUN_TODAY': 7, 'THIS_WEEK_MON_TODAY': 7,
+    'LAST_WEEK_SUN_SAT': 14, 'LAST_WEEK_MON_SUN': 14, 'LAST_BUSINESS_WEEK': 14,
+    'THIS_MONTH': 31, 'LAST_MONTH': 62,
+}
+
+
+class GaqlError(ValueError):
+    pass
+
+
+def _literal(text):
+    if text[:1] in ('"', "'"):
+        return re.sub(r'\\(.)', r'\1', text[1:-1])
+    upper = text.upper()
+    if upper == 'TRUE':
+        return True
+    if upper == 'FALSE':
+        return False
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _comparable(value):
+    if isinstance(value, EnumValue):
+        return value.name
+    return value
+
+
+def _like_regex(pattern):
+    return re.compile(fnmatch.translate(pattern.replace('*', '[*]').replace('%', '*').replace('_', '?')), re.DOTALL)
+
+
+def _compile_condition(match):
+    field = match.group('field')
+
+    if match.group('null'):
+        want_null = 'NOT' not in match.group('null').upper()
+        return field, lambda v: (v is None or v == '') == want_null
+
+    if match.group('between'):
+        low, high = _literal(match.group('low')), _literal(match.group('high'))
+        return field, lambda v: low <= _comparable(v) <= high
+
+    if match.group('list_op'):
+        op = ' '.join(match.group('list_op').upper().split())
+        items = {_literal(t.strip()) for t in re.findall(_VALUE, match.group('list'))}
+        if op == 'IN':
+            return field, lambda v: _comparable(v) in items
+        if op == 'NOT IN':
+            return field, lambda v: _comparable(v) not in items
+        if op == 'CONTAINS ANY':
+            return field, lambda v: any(_comparable(x) in items for x in v)
+        if op == 'CONTAINS ALL':
+            return field, lambda v: items <= {_comparable(x) for x in v}
+        return field, lambda v: not any(_comparable(x) in items for x in v)
+
+    op = ' '.join(match.group('op').upper().split())
+    value = _literal(match.group('value'))
+
+    if op == 'DURING':
+        days = DURING_DAYS.get(str(value).upper())
+        if days is None:
+            raise GaqlError(f'Unsupported DURING range: {value}')
+        today = datetime.now().date()
+        start = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+        end = (today if days == 0 else today - timedelta(days=1)).strftime('%Y-%m-%d')
+        return field, lambda v: start <= v <= end
+    if op in ('LIKE', 'NOT LIKE'):
+        regex = _like_regex(str(value))
+        negate = op == 'NOT LIKE'
+        return field, lambda v: bool(regex.match(str(v))) != negate
+    if op in ('REGEXP_MATCH', 'NOT REGEXP_MATCH'):
+        regex = re.compile(str(value))
+        negate = op == 'NOT REGEXP_MATCH'
+        return field, lambda v: bool(regex.fullmatch(str(v))) != negate
+
+    compare = {
+        '=': lambda v: _comparable(v) == value,
+        '!=': lambda v: _comparable(v) != value,
+        '>': lambda v: _comparable(v) > value,
+        '<': lambda v: _comparable(v) < value,
+        '>=': lambda v: _comparable(v) >= value,
+        '<=': lambda v: _comparable(v) <= value,
+    }[op]
+    return field, compare
+
+
+def compile_query(query):
+    """
+    Parse GAQL into (resource, fields, predicate, order_by, limit).
+    fields are the selected fields; predicate(row) applies the WHERE clause;
+    order_by is [(field, descending)].
+    """
+    match = QUERY_REGEX.match(query)
+    if not match:
+        raise GaqlError(f'Could not parse query: {" ".join(query.split())}')
+
+    conditions = []
+    where = (match.group('where') or '').strip()
+    pos = 0
+    while pos < len(where):
+        cond = CONDITION_REGEX.match(where, pos)
+        if not cond:
+            raise GaqlError(f'Unsupported WHERE clause near: {where[pos:pos + 60]}')
+        conditions.append(_compile_condition(cond))
+        pos = cond.end()
+
+    def predicate(row):
+        for field, test in conditions:
+            value = get_field(row, field)
+            if value is None:
+                continue
+            if not test(value):
+                return False
+        return True
+
+    order_by = []
+    for part in (match.group('order') or '').split(','):
+        tokens = part.split()
+        if tokens:
+            order_by.append((tokens[0], len(tokens) > 1 and tokens[1].upper() == 'DESC'))
+
+    limit = int(match.group('limit')) if match.group('limit') else None
+    fields = [f.strip() for f in match.group('select').split(',')]
+    return match.group('resource').lower(), fields, predicate, order_by, limit
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def _match_type(name):
+    return enum_value('KeywordMatchTypeEnum', name or 'UNSPECIFIED')
+
+
+def _spread_date(key, end_date, days):
+    """Deterministically assign a recorded row to one day of the window"""
+    offset = zlib.crc32('|'.join(key).encode('utf-8')) % (days + 1)
+    return (end_date - timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def _read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def search_term_rows(records, end_date=None, days=SEARCH_TERM_DAYS):
+    """search_term_view rows from search_term_report_60d.csv records"""
+    end_date = end_date or datetime.now().date()
+    for r in records:
+        key = (r['search_term'], r['campaign_id'], r['ad_group_id'], r['keyword_text'], r['match_type'])
+        yield make_row({
+            'search_term_view.search_term': r['search_term'],
+            'search_term_view.status': enum_value('SearchTermTargetingStatusEnum', r['status'] or 'UNKNOWN'),
+            'campaign.id': int(r['campaign_id']),
+            'campaign.name': r['campaign_name'],
+            'campaign.advertising_channel_type': enum_value('AdvertisingChannelTypeEnum', 'SEARCH'),
+            'ad_group.id': int(r['ad_group_id']),
+            'ad_group.name': r['ad_group_name'],
+            'segments.keyword.info.text': r['keyword_text'],
+            'segments.keyword.info.match_type': _match_type(r['match_type']),
+            'segments.date': _spread_date(key, end_date, days),
+            'metrics.impressions': int(r['impressions']),
+            'metrics.clicks': int(r['clicks']),
+            'metrics.cost_micros': int(round(float(r['cost']) * 1_000_000)),
+            'metrics.conversions': float(r['conversions']),
+            'metrics.conversions_value': float(r['conversion_value']),
+        })
+
+
+def _criterion_key(r):
+    return r['ad_group_id'], r['keyword'].lower(), r['match_type'].upper()
+
+
+def keyword_rows(records, negative_records=()):
+    """
+    ad_group_criterion rows from current_keywords_with_ids.csv; it has no
+    negative flag, so rows also in ad_group_negatives.csv are the negatives
+    """
+    negative_keys = {_criterion_key(r) for r in negative_records}
+    for r in records:
+        urls = ast.literal_eval(r['final_urls']) if r['final_urls'] else []
+        row = make_row({
+            'campaign.id': int(r['campaign_id']),
+            'campaign.name': r['campaign_name'],
+            'ad_group.id': int(r['ad_group_id']),
+            'ad_group.name': r['ad_group_name'],
+            'ad_group_criterion.criterion_id': int(r['criterion_id']),
+            'ad_group_criterion.type': enum_value('CriterionTypeEnum', 'KEYWORD'),
+            'ad_group_criterion.status': enum_value('AdGroupCriterionStatusEnum', 'ENABLED'),
+            'ad_group_criterion.negative': _criterion_key(r) in negative_keys,
+            'ad_group_criterion.keyword.text': r['keyword'],
+            'ad_group_criterion.keyword.match_type': _match_type(r['match_type']),
+        })
+        row.ad_group_criterion.final_urls.extend(urls)
+        yield row
+
+
+def negative_rows(records, keyword_records=(), first_criterion_id=900000000):
+    """
+    ad_group_criterion rows (negative keywords) from ad_group_negatives.csv,
+    less those keyword_rows already made from current_keywords_with_ids.csv
+    """
+    listed = {_criterion_key(r) for r in keyword_records}
+    records = [r for r in records if _criterion_key(r) not in listed]
+    for criterion_id, r in enumerate(records, start=first_criterion_id):
+        yield make_row({
+            'campaign.name': r['campaign_name'],
+            'ad_group.id': int(r['ad_group_id']),
+            'ad_group.name': r['ad_group_name'],
+            'ad_group_criterion.criterion_id': criterion_id,
+            'ad_group_criterion.type': enum_value('CriterionTypeEnum', 'KEYWORD'),
+            'ad_group_criterion.status': enum_value('AdGroupCriterionStatusEnum', 'ENABLED'),
+            'ad_group_criterion.negative': True,
+            'ad_group_criterion.keyword.text': r['keyword'],
+            'ad_group_criterion.keyword.match_type': _match_type(r['match_type']),
+        })
+
+
+KEYWORD_METRICS = ('impressions', 'clicks', 'cost_micros', 'conversions', 'conversions_value')
+
+
+def _keyword_metrics(totals):
+    """metrics.* fields for summed totals, with the derived ctr and average_cpc"""
+    fields = {f'metrics.{name}': totals[name] for name in KEYWORD_METRICS}
+    fields['metrics.ctr'] = totals['clicks'] / totals['impressions'] if totals['impressions'] else 0.0
+    fields['metrics.average_cpc'] = totals['cost_micros'] / totals['clicks'] if totals['clicks'] else 0.0
+    return fields
+
+
+def keyword_view_rows(criterion_rows, search_term_rows):
+    """
+    keyword_view rows, one per keyword per day: the positive ad_group_criterion
+    rows with the metrics of the search terms they matched on that day. A
+    keyword with no traffic gets a single zero-metric row with no date.
+    """
+    daily = {}
+    for row in search_term_rows:
+        info = row.segments.keyword.info
+        key = (row.ad_group.id, info.text.lower(), info.match_type.name)
+        totals = daily.setdefault(key, {}).setdefault(row.segments.date, dict.fromkeys(KEYWORD_METRICS, 0))
+        for name in KEYWORD_METRICS:
+            totals[name] += getattr(row.metrics, name)
+
+    for row in criterion_rows:
+        criterion = row.ad_group_criterion
+        if criterion.negative:
+            continue
+        fields = {
+            'campaign.id': row.campaign.id,
+            'campaign.name': row.campaign.name,
+            'ad_group.id': row.ad_group.id,
+            'ad_group.name': row.ad_group.name,
+            'ad_group_criterion.criterion_id': criterion.criterion_id,
+            'ad_group_criterion.type': criterion.type,
+            'ad_group_criterion.status': criterion.status,
+            'ad_group_criterion.keyword.text': criterion.keyword.text,
+            'ad_group_criterion.keyword.match_type': criterion.keyword.match_type,
+        }
+        days = daily.get((row.ad_group.id, criterion.keyword.text.lower(), criterion.keyword.match_type.name))
+        for date, totals in sorted((days or {None: dict.fromkeys(KEYWORD_METRICS, 0)}).items(),
+                                   key=lambda item: item[0] or ''):
+            view_row = make_row(dict(fields, **_keyword_metrics(totals)))
+            if date:
+                view_row.segments.date = date
+            view_row.ad_group_criterion.final_urls.extend(criterion.final_urls)
+            yield view_row
+
+
+def sum_keyword_rows(rows):
+    """
+    keyword_view rows summed per keyword, as the API returns them when a query
+    does not select segments.date
+    """
+    summed = {}
+    for row in rows:
+        key = (row.ad_group.id, row.ad_group_criterion.criterion_id)
+        entry = summed.get(key)
+        if entry is None:
+            entry = summed[key] = (row, dict.fromkeys(KEYWORD_METRICS, 0))
+        for name in KEYWORD_METRICS:
+            entry[1][name] += getattr(row.metrics, name)
+
+    for row, totals in summed.values():
+        fields = {k: v for k, v in row._fields().items() if k not in ('metrics', 'segments')}
+        summed_row = Message(**fields)
+        for path, value in _keyword_metrics(totals).items():
+            set_field(summed_row, path, value)
+        yield summed_row
+
+
+def structure_rows(keyword_records, negative_records):
+    """Distinct campaign and ad_group rows implied by the keyword fixtures"""
+    campaigns = {}
+    ad_groups = {}
+    campaign_ids = {r['campaign_name']: r['campaign_id'] for r in keyword_records}
+    for r in itertools.chain(keyword_records, negative_records):
+        campaign_id = r.get('campaign_id') or campaign_ids.get(r['campaign_name'])
+        fields = {
+            'campaign.name': r['campaign_name'],
+            'campaign.status': enum_value('CampaignStatusEnum', 'ENABLED'),
+            'campaign.advertising_channel_type': enum_value('AdvertisingChannelTypeEnum', 'SEARCH'),
+        }
+        if campaign_id:
+            fields['campaign.id'] = int(campaign_id)
+        campaigns.setdefault(r['campaign_name'], fields)
+        ad_groups.setdefault(r['ad_group_id'], dict(fields, **{
+            'ad_group.id': int(r['ad_group_id']),
+            'ad_group.name': r['ad_group_name'],
+            'ad_group.status': enum_value('AdGroupStatusEnum', 'ENABLED'),
+        }))
+    return [make_row(f) for f in campaigns.values()], [make_row(f) for f in ad_groups.values()]
+
+
+def synthesize_search_terms(records, count, seed=0):
+    """
+    Grow a recorded search term report to `count` rows for scale testing.
+    New terms recombine words from recorded terms and keep the campaign,
+    ad group and keyword of the row they were derived from.
+    """
+    rng = random.Random(seed)
+    words = sorted({w for r in records for w in r['search_term'].split()})
+    out = list(records)
+    seen = {r['search_term'] for r in records}
+    while len(out) < count:
+        base = rng.choice(records)
+        tokens = base['search_term'].split()
+        for _ in range(rng.randint(1, 3)):
+            tokens.insert(rng.randint(0, len(tokens)), rng.choice(words))
+        term = ' '.join(tokens)
+        if term in seen:
+            continue
+        seen.add(term)
+        clicks = rng.randint(0, 3)
+        cost = round(clicks * rng.uniform(2, 25), 2)
+        out.append(dict(base, search_term=term, impressions=str(rng.randint(clicks or 1, 40)),
+                        clicks=str(clicks), cost=str(cost),
+                        conversions='1.0' if clicks and rng.random() < 0.03 else '0.0',
+                        conversion_value='0.0'))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Services and client
+# ---------------------------------------------------------------------------
+
+def _collection(snake_name):
+    """'ad_group_criterion' -> 'adGroupCriteria' (resource name collection)"""
+    head, *rest = snake_name.split('_')
+    camel = head + ''.join(p.title() for p in rest)
+    if camel.endswith('criterion'):
+        return camel[:-len('criterion')] + 'criteria'
+    if camel.endswith('Criterion'):
+        return camel[:-len('Criterion')] + 'Criteria'
+    return camel + 's'
+
+
+class FakeMutateError(Exception):
+    """Raised by a fake mutate that fails without partial_failure"""
+
+
+class FakeService:
+    """
+    Any service: *_path() resource name helpers, recorded mutate_* calls,
+    and for GoogleAdsService, search/search_stream over the client's tables.
+    """
+
+    def __init__(self, client, service_name):
+        self._client = client
+        self._service_name = service_name
+
+    def __getattr__(self, name):
+        if name.endswith('_path'):
+            collection = _collection(name[:-len('_path')])
+
+            def path(customer_id, *ids):
+                return f"customers/{customer_id}/{collection}/{'~'.join(str(i) for i in ids)}"
+            return path
+
+        if name.startswith('mutate'):
+            def mutate(customer_id=None, operations=None, request=None, **kwargs):
+                if request is not None:
+                    customer_id = getattr(request, 'customer_id', customer_id)
+                    operations = getattr(request, 'operations', operations)
+                    if request.partial_failure:
+                        kwargs = dict(kwargs, partial_failure=True)
+                return self._client._record_mutate(self._service_name, name, customer_id,
+                                                   list(operations or []), kwargs)
+            return mutate
+
+        raise AttributeError(name)
+
+    def search(self, customer_id=None, query=None, request=None, **kwargs):
+        if request is not None:
+            customer_id, query = request.customer_id, request.query
+        self._client._sleep()
+        return self._client._execute(query, customer_id)
+
+    def search_stream(self, customer_id=None, query=None, request=None, **kwargs):
+        if request is not None:
+            customer_id, query = request.customer_id, request.query
+        rows = self._client._execute(query, customer_id)
+        batch_size = self._client.stream_batch_size
+        for start in range(0, max(len(rows), 1), batch_size):
+            self._client._sleep()
+            yield Message(results=rows[start:start + batch_size])
+
+
+class FakeBatchJobService(FakeService):
+    """
+    Local BatchJobService. Jobs accept chained uploads, run when their
+    status has been polled batch_job_steps times, and list one result per
+    operation (executed through the client's regular mutate recording).
+    Methods take the generated client's flattened arguments only, so an
+    unsupported one (e.g. page_size) raises TypeError as it would live.
+    """
+
+    def mutate_batch_job(self, request=None, *, customer_id=None, operation=None, retry=None, timeout=None,
+                         metadata=()):
+        if request is not None:
+            customer_id = request.customer_id
+        return Message(result=Message(resource_name=self._client._create_batch_job(customer_id)))
+
+    def add_batch_job_operations(self, request=None, *, resource_name=None, sequence_token=None,
+                                 mutate_operations=None, retry=None, timeout=None, metadata=()):
+        if request is not None:
+            resource_name, sequence_token = request.resource_name, request.sequence_token
+            mutate_operations = request.mutate_operations
+        job = self._client._batch_jobs[resource_name]
+        if (sequence_token or None) != job['sequence_token']:
+            raise FakeMutateError(f'Invalid sequence token for {resource_name}')
+        job['operations'].extend(mutate_operations or [])
+        job['sequence_token'] = f"token-{len(job['operations'])}"
+        return Message(total_operations=len(job['operations']), next_sequence_token=job['sequence_token'])
+
+    def run_batch_job(self, request=None, *, resource_name=None, retry=None, timeout=None, metadata=()):
+        if request is not None:
+            resource_name = request.resource_name
+        self._client._batch_jobs[resource_name]['status'] = 'PENDING'
+        return Message(name=f'{resource_name}/operation')
+
+    def list_batch_job_results(self, request=None, *, resource_name=None, retry=None, timeout=None, metadata=()):
+        if request is not None:
+            resource_name = request.resource_name
+        job = self._client._batch_jobs[resource_name]
+        if job['status'] != 'DONE':
+            raise FakeMutateError(f'Batch job {resource_name} is {job["status"]}')
+        return iter(job['results'])
+
+
+class FakeGoogleAdsClient:
+    """
+    Drop-in for GoogleAdsClient: get_service(), get_type() and enums.
+    tables maps a FROM resource (e.g. 'ad_group_criterion') to its rows.
+    """
+
+    is_fake = True
+
+    def __init__(self, tables=None, latency=0.0, stream_batch_size=STREAM_BATCH_SIZE):
+        self.tables = {k.lower(): list(v) for k, v in (tables or {}).items()}
+        self.latency = latency
+        self.stream_batch_size = stream_batch_size
+        self.enums = _Enums()
+        self.mutations = []
+        self.mutate_errors = None
+        self.batch_job_steps = 3
+        self._batch_jobs = {}
+        self.queries = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def from_data_dir(cls, data_dir=DATA_DIR, search_terms=None, seed=0, end_date=None, **kwargs):
+        """
+        Load the recorded CSV exports in data_dir. search_terms grows the
+        search term report to that many rows with synthetic terms.
+        """
+        tables = {}
+
+        path = os.path.join(data_dir, SEARCH_TERM_REPORT)
+        if os.path.exists(path):
+            records = _read_csv(path)
+            if search_terms and search_terms > len(records):
+                records = synthesize_search_terms(records, search_terms, seed)
+            tables['search_term_view'] = list(search_term_rows(records, end_date))
+
+        keyword_records, negative_records = [], []
+        path = os.path.join(data_dir, KEYWORDS_REPORT)
+        if os.path.exists(path):
+            keyword_records = _read_csv(path)
+        path = os.path.join(data_dir, NEGATIVES_REPORT)
+        if os.path.exists(path):
+            negative_records = _read_csv(path)
+
+        tables['ad_group_criterion'] = (list(keyword_rows(keyword_records, negative_records)) +
+                                        list(negative_rows(negative_records, keyword_records)))
+        tables['keyword_view'] = list(keyword_view_rows(tables['ad_group_criterion'],
+                                                        tables.get('search_term_view', [])))
+        tables['campaign'], tables['ad_group'] = structure_rows(keyword_records, negative_records)
+
+        return cls(tables, **kwargs)
+
+    def get_service(self, service_name, version=None):
+        if service_name == 'BatchJobService':
+            return FakeBatchJobService(self, service_name)
+        return FakeService(self, service_name)
+
+    @staticmethod
+    def copy_from(destination, source):
+        destination.CopyFrom(source)
+
+    def get_type(self, type_name, version=None):
+        return Message()
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _execute(self, query, customer_id):
+        resource, fields, predicate, order_by, limit = compile_query(query)
+        with self._lock:
+            self.queries.append((customer_id, ' '.join(query.split())))
+        if resource == 'batch_job':
+            self._advance_batch_jobs()
+
+        rows = [row for row in self.tables.get(resource, []) if predicate(row)]
+        if resource == 'keyword_view' and 'segments.date' not in fields:
+            rows = list(sum_keyword_rows(rows))
+        for field, descending in reversed(order_by):
+            rows.sort(key=lambda row: _comparable(get_field(row, field)), reverse=descending)
+        if limit is not None:
+            rows = rows[:limit]
+        return rows
+
+    def _create_batch_job(self, customer_id):
+        resource_name = f'customers/{customer_id}/batchJobs/{next(self._ids)}'
+        with self._lock:
+            self._batch_jobs[resource_name] = {
+                'customer_id': customer_id, 'operations': [], 'sequence_token': None,
+                'status': 'NOT_STARTED', 'steps': 0, 'results': [],
+            }
+        return resource_name
+
+    def _advance_batch_jobs(self):
+        """Move every started job one step on and refresh the batch_job table"""
+        rows = []
+        for resource_name, job in self._batch_jobs.items():
+            if job['status'] in ('PENDING', 'RUNNING'):
+                job['steps'] += 1
+                job['status'] = 'RUNNING'
+                if job['steps'] >= self.batch_job_steps:
+                    self._finish_batch_job(job)
+            total = len(job['operations'])
+            ratio = 1.0 if job['status'] == 'DONE' else min(job['steps'] / self.batch_job_steps, 1.0)
+            rows.append(make_row({
+                'batch_job.resource_name': resource_name,
+                'batch_job.status': enum_value('BatchJobStatusEnum', job['status']),
+                'batch_job.metadata.estimated_completion_ratio': ratio,
+                'batch_job.metadata.executed_operation_count': int(total * ratio),
+            }))
+        self.tables['batch_job'] = rows
+
+    def _finish_batch_job(self, job):
+        """Execute a job's operations, one recorded mutate per run of the same operation type"""
+        def field_of(mutate_operation):
+            return next(iter(mutate_operation._fields()))
+
+        index = 0
+        for field, group in itertools.groupby(job['operations'], key=field_of):
+            group = list(group)
+            snake = field[:-len('_operation')]
+            service_name = ''.join(p.title() for p in snake.split('_')) + 'Service'
+            response = self._record_mutate(service_name, 'batch_job', job['customer_id'],
+                                           [getattr(op, field) for op in group], {'partial_failure': True})
+            errors = {}
+            for detail in response.partial_failure_error.details or []:
+                for error in Message.deserialize(detail.value).errors:
+                    errors[error.location.field_path_elements[0].index] = error.message
+            for position, result in enumerate(response.results):
+                status = Message(code=3, message=errors[position]) if position in errors else Message()
+                job['results'].append(Message(
+                    operation_index=index,
+                    status=status,
+                    mutate_operation_response=Message(**{f'{snake}_result': result}),
+                ))
+                index += 1
+        job['status'] = 'DONE'
+
+    def _record_mutate(self, service_name, method, customer_id, operations, kwargs):
+        """
+        Answer a mutate with generated resource names. If mutate_errors is set,
+        mutate_errors(service_name, operation) returning (message, error_code
+        field) - e.g. ('Concurrent modification', 'database_error') - fails
+        that operation: reported per operation with partial_failure, otherwise
+        the whole request raises FakeMutateError.
+        """
+        self._sleep()
+        failures = []
+        if self.mutate_errors is not None:
+            failures = [(i, error) for i, op in enumerate(operations)
+                        for error in [self.mutate_errors(service_name, op)] if error]
+        if failures and not kwargs.get('partial_failure'):
+            raise FakeMutateError(failures[0][1][0])
+
+        results = []
+        failed = {i for i, _ in failures}
+        for index, op in enumerate(operations):
+            if index in failed:
+                results.append(Message())
+                continue
+            resource_name = None
+            for kind in ('update', 'create'):
+                target = op.__dict__.get(kind) if isinstance(op, Message) else None
+                if target:
+                    resource_name = target.__dict__.get('resource_name')
+                    if not resource_name and kind == 'create':
+                        collection = _collection(re.sub(r'(?<!^)(?=[A-Z])', '_', service_name[:-len('Service')]).lower())
+                        resource_name = f'customers/{customer_id}/{collection}/{next(self._ids)}'
+                    break
+            if resource_name is None and isinstance(op, Message):
+                remove = op.__dict__.get('remove')
+                resource_name = remove if isinstance(remove, str) else None
+            results.append(Message(resource_name=resource_name or ''))
+
+        with self._lock:
+            self.mutations.append({
+                'service': service_name,
+                'method': method,
+                'customer_id': customer_id,
+                'operations': operations,
+                'options': kwargs,
+            })
+
+        partial_failure_error = Message()
+        if failures:
+            errors = [
+                Message(message=message,
+                        error_code=Message(**{code: 1}),
+                        location=Message(field_path_elements=[Message(field_name='operations', index=i)]))
+                for i, (message, code) in failures
+            ]
+            partial_failure_error = Message(
+                code=3,
+                message=f'{len(failures)} operations failed',
+                details=[Message(value=Message.serialize(Message(errors=errors)))],
+            )
+        return Message(results=results, partial_failure_error=partial_failure_error)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark search term analysis against recorded fixtures')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--search-terms', type=int, default=None,
+                        help='Grow the search term report to this many rows')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added per API call')
+    args = parser.parse_args()
+
+    import ads_client
+    import analyze_search_terms_v2 as v2
+
+    start = time.perf_counter()
+    ads_client.install(FakeGoogleAdsClient.from_data_dir(args.data_dir, search_terms=args.search_terms,
+                                                         latency=args.latency))
+    fake = ads_client.get_client()
+    print(f"Loaded fixtures in {time.perf_counter() - start:.2f}s: "
+          + ', '.join(f'{k}={len(v)}' for k, v in fake.tables.items()))
+
+    query = '''
+    SELECT search_term_view.search_term, campaign.name, ad_group.name, metrics.cost_micros
+    FROM search_term_view
+    WHERE campaign.name LIKE '%NonBrand%'
+    '''
+    start = time.perf_counter()
+    search_terms = [{
+        'search_term': row.search_term_view.search_term,
+        'campaign_name': row.campaign.name,
+        'ad_group_name': row.ad_group.name,
+        'cost': row.metrics.cost_micros / 1_000_000,
+        'is_brand_term': v2.is_brand_term(row.search_term_view.search_term),
+    } for row in ads_client.search_stream(query)]
+    print(f"search_stream: {len(search_terms)} rows in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    negatives = v2.get_ad_group_negatives()
+    print(f"get_ad_group_negatives: {sum(len(n) for n in negatives.values())} negatives "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    results = v2.analyze_traffic_routing(search_terms, negatives)
+    print(f"analyze_traffic_routing: {len(results)} terms in {time.perf_counter() - start:.2f}s")
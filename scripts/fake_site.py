@@ -0,0 +1,192 @@
+"""
+Local static HTTP server standing in for kibocommerce.com
+
+Serves a dict of pages from 127.0.0.1 so the site crawler and URL health
+checker can be run and benchmarked without touching the live site:
+- HTTP/1.1 with keep-alive, Content-Length and gzip when asked for
+- ETag and Last-Modified on every page; If-None-Match and
+  If-Modified-Since are answered with 304
+- redirects (site.redirects[path] = target) and 404 for unknown paths
+- every request is recorded on site.requests as (method, path, status)
+
+from_inventory() builds one page per URL in site_crawl_inventory.csv,
+with its title, topic headings, anchor ids, CTA links and a nav linking
+every other page, so a crawl from / reaches the whole inventory.
+
+Usage:
+    from fake_site import FakeSite
+
+    with FakeSite.from_inventory() as site:
+        base_url = site.base_url          # http://127.0.0.1:<port>
+        site.set_page('/platform/cms/', '<html>...</html>')   # new ETag
+
+or serve it for manual runs:
+    python scripts/fake_site.py --port 8000
+"""
+
+import csv
+import gzip
+import hashlib
+import html
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+INVENTORY_FILE = 'site_crawl_inventory.csv'
+
+
+def inventory_page(row, nav_paths):
+    """HTML for one inventory row"""
+    path = urlsplit(row['URL']).path or '/'
+    anchors = [a.split('#', 1)[1] for a in row['Full URL with Anchors Available'].split(', ') if '#' in a]
+    topics = [t.strip() for t in row['Secondary Topics'].split(';') if t.strip()]
+    ctas = [c.strip() for c in row['CTA Type'].split(';') if c.strip()]
+
+    parts = [f'<!DOCTYPE html><html><head><title>{html.escape(row["Page Title"])}</title></head><body>',
+             '<nav>' + ''.join(f'<a href="{p}">{html.escape(p)}</a>' for p in nav_paths if p != path) + '</nav>',
+             f'<main><h1>{html.escape(row["Primary Topic"])}</h1>']
+    for i, anchor in enumerate(anchors):
+        heading = f'<h2>{html.escape(topics[i])}</h2>' if i < len(topics) else ''
+        parts.append(f'<section id="{html.escape(anchor)}">{heading}<p>...</p></section>')
+    for topic in topics[len(anchors):]:
+        parts.append(f'<h2>{html.escape(topic)}</h2>')
+    for cta in ctas:
+        parts.append(f'<a class="button" href="/request-a-demo/">{html.escape(cta)}</a>')
+    parts.append('</main></body></html>')
+    return ''.join(parts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        site = self.server.site
+        path = urlsplit(self.path).path
+        if site.latency:
+            time.sleep(site.latency)
+
+        if path in site.redirects:
+            self._send(301, {'Location': site.redirects[path]}, b'', send_body)
+            return
+        page = site.pages.get(path)
+        if page is None:
+            self._send(404, {'Content-Type': 'text/html; charset=utf-8'}, b'<h1>Not Found</h1>', send_body)
+            return
+
+        body, etag, modified = page
+        headers = {'ETag': etag, 'Last-Modified': formatdate(modified, usegmt=True),
+                   'Content-Type': 'text/html; charset=utf-8'}
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match:
+            not_modified = etag in [t.strip() for t in if_none_match.split(',')]
+        elif if_modified_since:
+            try:
+                not_modified = int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+        if not_modified:
+            self._send(304, {'ETag': etag}, b'', send_body)
+            return
+
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        self._send(200, headers, body, send_body)
+
+    def _send(self, status, headers, body, send_body):
+        self.server.site.record(self.command, self.path, status)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and status != 304:
+            self.wfile.write(body)
+
+
+class FakeSite:
+    """pages: {path: html}; serving starts on enter (or start()) on a free port"""
+
+    def __init__(self, pages=None, latency=0.0, port=0):
+        self.pages = {}
+        self.redirects = {}
+        self.requests = []
+        self.latency = latency
+        self.port = port
+        self._lock = threading.Lock()
+        self._server = None
+        for path, content in (pages or {}).items():
+            self.set_page(path, content)
+
+    @classmethod
+    def from_inventory(cls, path=os.path.join(DATA_DIR, INVENTORY_FILE), **kwargs):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        nav_paths = [urlsplit(r['URL']).path or '/' for r in rows]
+        return cls({p: inventory_page(r, nav_paths) for p, r in zip(nav_paths, rows)}, **kwargs)
+
+    def set_page(self, path, content, modified=None):
+        """Add or change a page; its ETag and Last-Modified change with the content"""
+        body = content.encode('utf-8')
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        self.pages[path] = (body, etag, int(modified if modified is not None else time.time()))
+
+    def record(self, method, path, status):
+        with self._lock:
+            self.requests.append((method, path, status))
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.site = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8000, help='Port to serve on (default: 8000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of delay per request')
+    args = parser.parse_args()
+
+    site = FakeSite.from_inventory(latency=args.latency, port=args.port).start()
+    print(f"Serving {len(site.pages)} pages at {site.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,181 @@
+"""
+On-disk TTL cache for GAQL query results
+
+Used by ads_client.search(). Entries are keyed by the whitespace-normalized
+GAQL text plus customer ID, expire after a per-resource TTL (the resource
+is taken from the FROM clause), and the oldest entries are evicted once
+the cache directory grows past MAX_CACHE_BYTES.
+
+Rows are stored as serialized GoogleAdsRow protobuf bytes, so cached
+results behave exactly like live ones.
+
+Set KIBO_GAQL_CACHE=0 in the environment to disable the cache entirely.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.kibo_gaql_cache')
+
+# Total size of cached results before least-recently-used entries are evicted
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+# Seconds a result stays fresh, by FROM resource. Account structure changes
+# rarely; anything with metrics changes throughout the day.
+RESOURCE_TTLS = {
+    'customer': 24 * 3600,
+    'campaign': 6 * 3600,
+    'ad_group': 6 * 3600,
+    'user_list': 6 * 3600,
+    'audience': 6 * 3600,
+    'custom_audience': 6 * 3600,
+    'combined_audience': 6 * 3600,
+    'conversion_action': 3600,
+    'asset': 3600,
+    'ad_group_asset': 3600,
+    'campaign_asset': 3600,
+    'customer_asset': 3600,
+    'ad_group_ad': 3600,
+    'ad_group_criterion': 3600,
+    'campaign_criterion': 3600,
+    'change_event': 0,
+    'change_status': 0,
+}
+DEFAULT_TTL = 15 * 60
+
+# Queries selecting metrics are never cached longer than this
+METRICS_TTL = 15 * 60
+
+FROM_REGEX = re.compile(r'\bFROM\s+(\w+)', re.IGNORECASE)
+
+
+def normalize_query(query):
+    """Collapse all whitespace so formatting differences share a cache entry"""
+    return ' '.join(query.split())
+
+
+def query_resource(query):
+    """Resource named in the FROM clause (e.g. 'ad_group')"""
+    match = FROM_REGEX.search(query)
+    return match.group(1).lower() if match else 'unknown'
+
+
+def query_ttl(query):
+    """TTL in seconds for a query, based on its resource and selected fields"""
+    ttl = RESOURCE_TTLS.get(query_resource(query), DEFAULT_TTL)
+    if 'metrics.' in query:
+        ttl = min(ttl, METRICS_TTL)
+    return ttl
+
+
+def enabled():
+    return os.environ.get('KIBO_GAQL_CACHE', '1') != '0'
+
+
+def _entry_path(query, customer_id):
+    normalized = normalize_query(query)
+    digest = hashlib.sha256(f'{customer_id}\n{normalized}'.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(CACHE_DIR, f'{query_resource(normalized)}-{digest}.pkl')
+
+
+def get(query, customer_id):
+    """Return cached serialized rows for a query, or None if missing/expired"""
+    if not enabled():
+        return None
+
+    ttl = query_ttl(query)
+    if ttl <= 0:
+        return None
+
+    path = _entry_path(query, customer_id)
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    if time.time() - entry['fetched_at'] > ttl:
+        return None
+
+    # Touch so size-based eviction drops least-recently-used entries first
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return entry['rows']
+
+
+def put(query, customer_id, rows):
+    """Store serialized rows for a query and evict old entries if over budget"""
+    if not enabled() or query_ttl(query) <= 0:
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _entry_path(query, customer_id)
+    tmp_path = path + '.tmp'
+
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({
+            'query': normalize_query(query),
+            'customer_id': customer_id,
+            'fetched_at': time.time(),
+            'rows': rows,
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    evict()
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Delete least-recently-used entries until the cache fits in max_bytes"""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith('.pkl'):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def invalidate(resource=None):
+    """Drop cached results for one FROM resource (e.g. after mutating it), or everything"""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+
+    removed = 0
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith('.pkl'):
+            continue
+        if resource and not name.startswith(f'{resource}-'):
+            continue
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+            removed += 1
+        except OSError:
+            continue
+
+    return removed
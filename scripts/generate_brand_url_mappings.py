@@ -4,50 +4,16 @@ Generate URL mappings for Brand keywords missing Final URLs
 This script:
 1. Loads active Brand keywords from the 60-day query
 2. Identifies keywords without Final URLs or with suboptimal URLs
-3. Applies brand-specific URL mapping logic
+3. Applies brand-specific URL mapping logic (brand rules in url_rules.json)
 4. Outputs mappings in the format expected by update_keyword_urls.py
 """
 
+from url_canon import UrlSet, same_url, split_final_urls
+from url_rules import BRAND_URL_RULES
 import csv
-import re
 
 BASE_URL = 'https://kibocommerce.com'
 
-# Brand keyword patterns and their recommended URLs
-# Order matters - more specific patterns should come first
-BRAND_KEYWORD_URL_PATTERNS = [
-    # High-intent conversion pages
-    (r'demo|trial|free trial', '/request-a-demo/'),
-    (r'pricing|cost|price', '/request-a-demo/'),
-    (r'contact|talk to|speak', '/speak-with-an-expert/'),
-
-    # Product-specific pages
-    (r'oms|order management|fulfillment', '/platform/order-management/'),
-    (r'inventory|stock', '/platform/inventory-visibility/'),
-    (r'subscription|recurring', '/platform/subscription/'),
-    (r'catalog|product information|pim', '/platform/catalog-price-promo/'),
-    (r'agentic|ai commerce|artificial intelligence', '/platform/agentic-commerce/'),
-    (r'connect|integration|api', '/platform/connect-hub/'),
-
-    # Solution pages
-    (r'b2b commerce|b2b platform|b2b ecommerce', '/solutions/b2b/'),
-    (r'b2c|consumer|retail', '/platform/commerce/'),
-    (r'unified commerce|omnichannel', '/platform/platform-commerce/'),
-
-    # Social proof / research intent
-    (r'review|comparison|vs|versus', '/customer-stories/'),
-    (r'case stud|success stor|testimonial', '/customer-stories/'),
-
-    # Industry verticals (if present in brand searches)
-    (r'wholesal', '/ppc/wholesale/'),
-    (r'manufactur', '/ppc/manufacturing/'),
-    (r'distribut', '/ppc/distributor/'),
-
-    # Generic brand - homepage
-    (r'kibo commerce|kibo platform', '/'),
-    (r'^kibo$', '/'),
-]
-
 # URLs that are considered optimal (don't need updating)
 OPTIMAL_URLS = [
     'https://kibocommerce.com/',
@@ -64,6 +30,7 @@ OPTIMAL_URLS = [
     'https://kibocommerce.com/customer-stories/',
     'https://kibocommerce.com/speak-with-an-expert/',
 ]
+OPTIMAL_URL_SET = UrlSet(OPTIMAL_URLS)
 
 
 def load_brand_keywords(filepath):
@@ -89,43 +56,36 @@ def load_brand_keywords(filepath):
 
 def get_url_for_brand_keyword(keyword_text):
     """
-    Determine the best URL for a brand keyword based on content.
+    Determine the best URL for a brand keyword based on content
+    (brand rules in url_rules.json).
     Returns (url_path, rationale)
     """
-    keyword_lower = keyword_text.lower()
-
-    # Check each pattern in order
-    for pattern, url_path in BRAND_KEYWORD_URL_PATTERNS:
-        if re.search(pattern, keyword_lower):
-            return url_path, f'Keyword matches "{pattern}" pattern'
+    path, _, rationale = BRAND_URL_RULES.resolve(keyword_text)
+    return path, rationale
 
-    # Default: homepage for pure brand terms
-    return '/', 'Default brand term - homepage'
 
-
-def is_url_optimal(current_url, keyword_text):
+def is_url_optimal(current_url, keyword_text, recommended_path=None):
     """
     Check if the current URL is already optimal for this keyword.
     Returns True if URL is good, False if it should be updated.
+    URLs are compared in canonical form (url_canon); pass recommended_path
+    if the keyword has already been resolved.
     """
     if not current_url:
         return False
 
     # Get the recommended URL for this keyword
-    recommended_path, _ = get_url_for_brand_keyword(keyword_text)
-    recommended_url = BASE_URL + recommended_path
+    if recommended_path is None:
+        recommended_path, _ = get_url_for_brand_keyword(keyword_text)
 
     # Check if current URL matches recommended
-    if current_url.rstrip('/') == recommended_url.rstrip('/'):
+    if same_url(current_url, BASE_URL + recommended_path):
         return True
 
     # Check if current URL is in the optimal list
-    if current_url.rstrip('/') in [u.rstrip('/') for u in OPTIMAL_URLS]:
-        # URL is valid, but may not be optimal for this specific keyword
-        # Only flag for update if recommended is significantly different
-        return True
-
-    return False
+    # URL is valid, but may not be optimal for this specific keyword
+    # Only flag for update if recommended is significantly different
+    return current_url in OPTIMAL_URL_SET
 
 
 def determine_priority(impressions, clicks):
@@ -142,18 +102,15 @@ def generate_brand_url_mappings(keywords):
     mappings = []
 
     for kw in keywords:
-        current_url = kw['final_urls'].split(';')[0] if kw['final_urls'] else ''
-
-        # Check if URL needs updating
-        if is_url_optimal(current_url, kw['keyword']):
-            continue
+        current_urls = split_final_urls(kw['final_urls'])
+        current_url = current_urls[0] if current_urls else ''
 
         # Get URL recommendation
         url_path, rationale = get_url_for_brand_keyword(kw['keyword'])
         full_url = BASE_URL + url_path
 
-        # Skip if recommended URL is same as current
-        if current_url.rstrip('/') == full_url.rstrip('/'):
+        # Check if URL needs updating
+        if is_url_optimal(current_url, kw['keyword'], url_path):
             continue
 
         # Determine priority based on impressions
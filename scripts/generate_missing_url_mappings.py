@@ -5,62 +5,16 @@ This script:
 1. Loads active keywords from the 60-day query
 2. Identifies keywords without Final URLs
 3. Applies URL mapping logic based on ad group and keyword content
+   (nonbrand rules in url_rules.json)
 4. Outputs mappings in the format expected by update_keyword_urls.py
 """
 
+from url_canon import split_final_urls
+from url_rules import NONBRAND_URL_RULES
 import csv
-import re
 
 BASE_URL = 'https://kibocommerce.com'
 
-# Ad Group to URL mapping (primary logic)
-AD_GROUP_URL_MAP = {
-    'B2B EComm': '/solutions/b2b/',
-    'OMS': '/platform/order-management/',
-    'B2C EComm': '/platform/commerce/',
-    'NB - Wholesalers': '/ppc/wholesale/',
-    'NB - Manufacturers': '/ppc/manufacturing/',
-    'NB - Distributors': '/ppc/distributor/',
-    'NB - General B2B': '/solutions/b2b/',
-    'Agentic Commerce': '/platform/agentic-commerce/',
-    'B2B Other Keywords': '/solutions/b2b/',  # Default, will be refined by keyword
-}
-
-# Keyword content patterns for URL refinement (secondary logic)
-KEYWORD_URL_PATTERNS = [
-    # Higher priority - specific product pages
-    (r'inventory', '/platform/inventory-visibility/'),
-    (r'catalog', '/platform/catalog-price-promo/'),
-    (r'subscription', '/platform/subscription/'),
-    (r'connect|integration', '/platform/connect-hub/'),
-    (r'agentic|ai commerce', '/platform/agentic-commerce/'),
-    # Generic patterns
-    (r'unified commerce', '/'),  # Homepage
-    (r'order management|oms', '/platform/order-management/'),
-    (r'wholesal', '/ppc/wholesale/'),
-    (r'manufactur', '/ppc/manufacturing/'),
-    (r'distributor|distribution', '/ppc/distributor/'),
-    (r'b2c|consumer', '/platform/commerce/'),
-]
-
-# Anchor sections for specific pages
-ANCHOR_MAP = {
-    '/ppc/wholesale/': {
-        'order management': '#order-management',
-        'b2b portal': '#b2b-commerce',
-        'b2b commerce': '#b2b-commerce',
-        'trade portal': '#b2b-commerce',
-    },
-    '/ppc/manufacturing/': {
-        'b2b commerce': '#b2b-commerce',
-        'dealer portal': '#b2b-commerce',
-        'order management': '#form',
-    },
-    '/ppc/distributor/': {
-        'inventory': '#form',
-    },
-}
-
 
 def load_active_keywords(filepath):
     """Load active keywords from the 60-day query CSV"""
@@ -85,34 +39,11 @@ def load_active_keywords(filepath):
 
 def get_url_for_keyword(keyword_text, ad_group_name):
     """
-    Determine the best URL for a keyword based on ad group and keyword content.
+    Determine the best URL for a keyword based on ad group and keyword content
+    (nonbrand rules in url_rules.json).
     Returns (url_path, anchor, rationale)
     """
-    keyword_lower = keyword_text.lower()
-
-    # Start with ad group default
-    base_path = AD_GROUP_URL_MAP.get(ad_group_name, '/solutions/b2b/')
-    anchor = ''
-    rationale = f'Ad group default: {ad_group_name}'
-
-    # Check keyword content for more specific URLs
-    for pattern, url_path in KEYWORD_URL_PATTERNS:
-        if re.search(pattern, keyword_lower):
-            # Only override if it's a more specific match
-            if url_path != base_path:
-                base_path = url_path
-                rationale = f'Keyword contains "{pattern}" pattern'
-            break
-
-    # Check for anchor opportunities
-    if base_path in ANCHOR_MAP:
-        for anchor_pattern, anchor_suffix in ANCHOR_MAP[base_path].items():
-            if anchor_pattern in keyword_lower:
-                anchor = anchor_suffix
-                rationale += f' with anchor for "{anchor_pattern}"'
-                break
-
-    return base_path, anchor, rationale
+    return NONBRAND_URL_RULES.resolve(keyword_text, ad_group_name)
 
 
 def determine_priority(impressions, clicks):
@@ -128,16 +59,11 @@ def generate_missing_url_mappings(keywords):
     """Generate URL mappings for keywords without Final URLs"""
     mappings = []
 
-    for kw in keywords:
-        # Skip keywords that already have URLs
-        if kw['final_urls']:
-            continue
+    # Skip keywords that already have URLs; resolve the rest in one batch
+    missing = [kw for kw in keywords if not split_final_urls(kw['final_urls'])]
+    routes = NONBRAND_URL_RULES.resolve_all((kw['keyword'], kw['ad_group_name']) for kw in missing)
 
-        # Get URL recommendation
-        url_path, anchor, rationale = get_url_for_keyword(
-            kw['keyword'],
-            kw['ad_group_name']
-        )
+    for kw, (url_path, anchor, rationale) in zip(missing, routes):
 
         full_url = BASE_URL + url_path + anchor
 
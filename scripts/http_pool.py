@@ -0,0 +1,231 @@
+"""
+Connection-pooled asyncio HTTP/1.1 client (stdlib only)
+
+Used by the site crawler and the final URL health checker, which fetch
+hundreds of pages from a handful of hosts. Connections are kept alive and
+reused per (scheme, host, port), and a per-host semaphore bounds how many
+requests run against one host at once, so a crawl is mostly one TLS
+handshake per connection rather than one per page.
+
+Supports GET/HEAD, Content-Length, chunked and read-to-close bodies, gzip,
+redirects (up to MAX_REDIRECTS) and conditional headers passed by the
+caller. A pooled connection the server has since closed is retried once
+on a fresh connection.
+
+Usage:
+    from http_pool import HttpPool
+
+    async with HttpPool(max_per_host=6) as pool:
+        response = await pool.fetch('https://kibocommerce.com/', headers={'If-None-Match': etag})
+        response.status, response.headers.get('etag'), response.text()
+"""
+
+import asyncio
+import gzip
+import ssl
+import zlib
+from urllib.parse import urljoin, urlsplit
+
+USER_AGENT = 'KiboAdsAudit/1.0 (+landing page audit)'
+
+MAX_PER_HOST = 6
+TIMEOUT = 20.0
+MAX_REDIRECTS = 5
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class HttpError(Exception):
+    """Connection, protocol or timeout failure (not an HTTP error status)"""
+
+
+class HttpResponse:
+    def __init__(self, url, status, reason, headers, body, redirects=()):
+        self.url = url                      # final URL after redirects
+        self.status = status
+        self.reason = reason
+        self.headers = headers              # lowercase name -> value
+        self.body = body
+        self.redirects = list(redirects)    # [(status, url), ...] followed to get here
+
+    def text(self):
+        charset = 'utf-8'
+        content_type = self.headers.get('content-type', '')
+        if 'charset=' in content_type:
+            charset = content_type.split('charset=', 1)[1].split(';')[0].strip() or charset
+        return self.body.decode(charset, errors='replace')
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpPool:
+    def __init__(self, max_per_host=MAX_PER_HOST, timeout=TIMEOUT, user_agent=USER_AGENT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.requests = 0
+        self.connections_opened = 0
+        self._idle = {}        # (scheme, host, port) -> [_Connection]
+        self._limits = {}      # (scheme, host, port) -> Semaphore
+        self._ssl = ssl.create_default_context()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+    async def fetch(self, url, method='GET', headers=None, follow_redirects=True):
+        """Send a request, following redirects; raises HttpError on failure"""
+        redirects = []
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request(url, method, headers or {})
+            location = response.headers.get('location')
+            if not (follow_redirects and response.status in REDIRECT_STATUSES and location):
+                response.redirects = redirects
+                return response
+            redirects.append((response.status, url))
+            url = urljoin(url, location)
+            if response.status == 303:
+                method = 'GET'
+        raise HttpError(f'More than {MAX_REDIRECTS} redirects from {redirects[0][1]}')
+
+    async def _request(self, url, method, headers):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise HttpError(f'Unsupported URL: {url}')
+        key = (parts.scheme, parts.hostname.lower(), parts.port or (443 if parts.scheme == 'https' else 80))
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+        limit = self._limits.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            for attempt in range(2):
+                connection = await self._acquire(key)
+                try:
+                    response, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, key, target, method, headers), self.timeout)
+                except (OSError, ValueError, zlib.error, asyncio.IncompleteReadError, asyncio.TimeoutError,
+                        HttpError) as e:
+                    connection.close()
+                    # A kept-alive connection may have been closed by the server meanwhile
+                    if connection.reused and attempt == 0 and not isinstance(e, asyncio.TimeoutError):
+                        continue
+                    raise HttpError(f'{type(e).__name__}: {e}' if str(e) else type(e).__name__) from e
+
+                self.requests += 1
+                if keep_alive:
+                    connection.reused = True
+                    self._idle.setdefault(key, []).append(connection)
+                else:
+                    connection.close()
+                response.url = url
+                return response
+
+    async def _acquire(self, key):
+        idle = self._idle.get(key)
+        if idle:
+            return idle.pop()
+        scheme, host, port = key
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self._ssl if scheme == 'https' else None,
+                                        server_hostname=host if scheme == 'https' else None),
+                self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise HttpError(f'Could not connect to {host}:{port} - {type(e).__name__}: {e}') from e
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def _exchange(self, connection, key, target, method, headers):
+        scheme, host, port = key
+        host_header = host if port in (80, 443) else f'{host}:{port}'
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {host_header}', f'User-Agent: {self.user_agent}',
+                 'Accept-Encoding: gzip, deflate', 'Connection: keep-alive']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        connection.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await connection.writer.drain()
+
+        reader = connection.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise HttpError('Connection closed before response')
+        try:
+            version, status, *reason = status_line.decode('latin-1').split(None, 2)
+            status = int(status)
+        except ValueError:
+            raise HttpError(f'Bad status line: {status_line[:100]!r}')
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            response_headers[name] = f'{response_headers[name]}, {value}' if name in response_headers else value
+
+        keep_alive = version == 'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif 'chunked' in response_headers.get('transfer-encoding', '').lower():
+            body = await self._read_chunked(reader)
+        elif 'content-length' in response_headers:
+            body = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            body = await self._read_to_close(reader)
+            keep_alive = False
+
+        encoding = response_headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+
+        return HttpResponse('', status, reason[0].strip() if reason else '', response_headers, body), keep_alive
+
+    @staticmethod
+    async def _read_to_close(reader):
+        chunks = []
+        size_total = 0
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+            size_total += len(chunk)
+            if size_total > MAX_BODY_BYTES:
+                raise HttpError('Response body too large')
+
+    @staticmethod
+    async def _read_chunked(reader):
+        chunks = []
+        size_total = 0
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                # Trailers end with a blank line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+            size_total += size
+            if size_total > MAX_BODY_BYTES:
+                raise HttpError('Response body too large')
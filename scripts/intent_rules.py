@@ -0,0 +1,233 @@
+"""
+Intent rule engine for routing NonBrand search terms to ad groups
+
+Rules are ordered (ad_group, patterns) lists; the first rule in the list
+that matches a term wins, and the winning pattern is returned alongside
+the ad group for explainability.
+
+Every rule's leading literal text (the whole pattern for substring rules,
+e.g. 'enterprise' for r'\\benterprise\\s*commerce') is compiled into one
+character-trie regex. A single scan of the term finds each position where
+some rule could start, and only those rules are checked there, highest
+priority first - so adding rules adds little to classification cost.
+
+Usage:
+    from intent_rules import INTENT_CLASSIFIER, ROUTING_CLASSIFIER
+
+    ad_group, rule = ROUTING_CLASSIFIER.classify('b2b order management')
+    # ('OMS', 'order management')
+"""
+
+import re
+
+# Regex intent rules used by the intent mapping report (analyze_search_terms)
+INTENT_RULES = [
+    ('B2B EComm', [
+        r'\bb2b\b(?!.*\b(d2c|b2c|consumer)\b)',
+        r'\benterprise\s*(ecommerce|commerce|platform)',
+        r'\bwholesale\s*ecommerce\b',
+    ]),
+    ('B2C EComm', [
+        r'\bb2c\b',
+        r'\bd2c\b',
+        r'\bdirect\s*to\s*consumer',
+        r'\bconsumer\s*(ecommerce|commerce)',
+        r'\bretail\s*(ecommerce|platform)',
+    ]),
+    ('OMS', [
+        r'\boms\b',
+        r'\border\s*management',
+        r'\bfulfillment',
+        r'\binventory\s*management',
+        r'\bwarehouse\s*management',
+        r'\border\s*orchestration',
+    ]),
+    ('NB - Manufacturers', [
+        r'\bmanufacturer',
+        r'\bmanufacturing\s*(ecommerce|commerce|platform)',
+    ]),
+    ('NB - Wholesalers', [
+        r'\bwholesaler',
+        r'\bwholesale\s*(platform|software|distribution)',
+    ]),
+    ('NB - Distributors', [
+        r'\bdistributor',
+        r'\bdistribution\s*(ecommerce|commerce|platform)',
+    ]),
+    ('B2B Other Keywords', [
+        r'\bunified\s*commerce',
+        r'\bcomposable\s*commerce',
+        r'\bheadless\s*(commerce|ecommerce)',
+        r'\bmach\s*(architecture|platform)',
+        r'\bapi\s*first\s*commerce',
+    ]),
+    ('Agentic Commerce', [
+        r'\bagentic',
+        r'\bai\s*commerce',
+        r'\bai\s*powered\s*(commerce|ecommerce)',
+    ]),
+]
+
+# Substring routing rules used by the traffic routing report
+# (analyze_search_terms_v2), highest priority first:
+# 1. OMS - order management, fulfillment, inventory terms
+# 2. Industry verticals - wholesale, distributor, manufacturer
+# 3. B2C - consumer/d2c terms
+# 4. B2B Other - composable, headless, unified
+# 5. Agentic - AI commerce terms
+# 6. B2B EComm - generic b2b ecommerce/commerce/platform
+# 7. NB - General B2B - catch-all b2b
+ROUTING_RULES = [
+    ('OMS', ['oms', 'order management', 'fulfillment', 'inventory management',
+             'inventory software', 'inventory system', 'warehouse management',
+             'returns management', 'reverse logistics', 'distributed order',
+             'order orchestration', 'ship from store']),
+    ('NB - Wholesalers', ['wholesaler', 'wholesale']),
+    ('NB - Distributors', ['distributor', 'distribution']),
+    ('NB - Manufacturers', ['manufacturer', 'manufacturing']),
+    ('B2C EComm', ['b2c', 'd2c', 'direct to consumer', 'consumer ecommerce']),
+    ('B2B Other Keywords', ['unified commerce', 'composable', 'headless', 'mach ']),
+    ('Agentic Commerce', ['agentic', 'ai commerce', 'ai-powered commerce']),
+    ('B2B EComm', ['b2b ecommerce', 'b2b e-commerce', 'b2b commerce platform',
+                   'b2b ecommerce platform', 'enterprise ecommerce',
+                   'business to business ecommerce', 'b2b online store']),
+    ('NB - General B2B', ['b2b']),
+]
+
+
+def _has_top_level_alternation(pattern):
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != ']'
+        elif ch == '[':
+            in_class = True
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def _literal_prefix(pattern):
+    """
+    Lowercase literal text every match of a regex rule starts with, after a
+    leading \b (e.g. r'\benterprise\s*commerce' -> 'enterprise'); '' if the
+    pattern does not start with plain text.
+    """
+    if pattern.startswith(r'\b'):
+        pattern = pattern[2:]
+    if _has_top_level_alternation(pattern):
+        return ''
+
+    literal = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            literal.append(pattern[i + 1])
+            i += 2
+        elif ch.isalnum() or ch in ' -\'':
+            literal.append(ch)
+            i += 1
+        else:
+            # A quantifier makes the character before it optional
+            if ch in '?*{' and literal:
+                literal.pop()
+            break
+    return ''.join(literal).lower()
+
+
+def _trie_regex(literals):
+    """Regex alternation shaped as a character trie, longest continuation first"""
+    trie = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A literal ending here is optional to extend, so the match is the longest literal
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class IntentClassifier:
+    """
+    Classifies search terms against an ordered rule set in one scan.
+    rules: [(ad_group, [pattern, ...]), ...], highest priority first.
+    Patterns are regexes, or plain lowercase substrings with phrases=True.
+    Terms are matched case-insensitively.
+    """
+
+    def __init__(self, rules, phrases=False):
+        self.rules = [(ad_group, pattern) for ad_group, patterns in rules for pattern in patterns]
+
+        if phrases:
+            self._verify = [None] * len(self.rules)
+            literals = [pattern.lower() for _, pattern in self.rules]
+        else:
+            self._verify = [re.compile(pattern, re.IGNORECASE) for _, pattern in self.rules]
+            literals = [_literal_prefix(pattern) for _, pattern in self.rules]
+
+        # Rules without a literal prefix are searched on every term
+        self._unanchored = [i for i, literal in enumerate(literals) if not literal]
+
+        # Everything the trie matches at one position is a prefix of the
+        # longest match there, so each literal maps to the rules of all its
+        # prefixes, in priority order
+        by_literal = {}
+        for i, literal in enumerate(literals):
+            if literal:
+                by_literal.setdefault(literal, []).append(i)
+        self._candidates = {
+            literal: sorted(i for prefix, ids in by_literal.items() if literal.startswith(prefix) for i in ids)
+            for literal in by_literal
+        }
+        self._scan = re.compile(f'(?=({_trie_regex(by_literal)}))') if by_literal else None
+
+    def classify(self, search_term):
+        """(ad_group, matching pattern) for the highest priority rule, or (None, None)"""
+        term = search_term.lower()
+        best = None
+
+        for i in self._unanchored:
+            if self._verify[i].search(term):
+                best = i
+                break
+
+        if self._scan is not None:
+            verify = self._verify
+            for match in self._scan.finditer(term):
+                for i in self._candidates[match.group(1)]:
+                    if best is not None and i >= best:
+                        break
+                    if verify[i] is None or verify[i].match(term, match.start()):
+                        best = i
+                        break
+
+        if best is None:
+            return None, None
+        return self.rules[best]
+
+    def expected_ad_group(self, search_term):
+        return self.classify(search_term)[0]
+
+
+INTENT_CLASSIFIER = IntentClassifier(INTENT_RULES)
+ROUTING_CLASSIFIER = IntentClassifier(ROUTING_RULES, phrases=True)
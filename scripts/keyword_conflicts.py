@@ -0,0 +1,155 @@
+"""
+Negative vs positive keyword conflict detection
+
+Finds ad group negatives that block positive keywords. Every negative in
+ad_group_negatives.csv is compiled into one NegativeMatcher (token index
+per match type), and each positive keyword's text from
+current_keywords_with_ids.csv (less the negatives it also lists) is
+looked up against it once - so the cost grows with the number of
+keywords, not keywords x negatives.
+
+A negative conflicts with a keyword when it blocks the keyword's own
+text, i.e. the query the keyword was built for. Severity follows the
+match types involved:
+- BLOCKED: every query the keyword can match is also blocked (e.g. an
+  EXACT keyword, or a PHRASE negative against a PHRASE keyword)
+- PARTIAL: only some of its queries are blocked (an EXACT negative
+  against a PHRASE/BROAD keyword, or any negative against a BROAD
+  keyword, which also serves queries without all of its words)
+
+Scope:
+- SELF: the negative sits in the keyword's own ad group - the keyword
+  is shut off (e.g. a "cart" BROAD negative next to a "cart software"
+  keyword)
+- CROSS_AD_GROUP: the negative sits in another ad group of the same
+  campaign - usually deliberate traffic shaping toward the keyword's ad
+  group, reported so it can be reviewed alongside self conflicts
+
+Usage:
+    python scripts/keyword_conflicts.py
+    python scripts/keyword_conflicts.py --self-only
+"""
+
+from negative_matcher import NegativeMatcher
+import csv
+from collections import Counter, defaultdict
+
+OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
+
+
+def conflict_severity(negative_match_type, keyword_match_type):
+    """BLOCKED or PARTIAL for a negative that blocks the keyword's own text"""
+    if keyword_match_type == 'BROAD':
+        return 'PARTIAL'
+    if negative_match_type == 'EXACT' and keyword_match_type != 'EXACT':
+        return 'PARTIAL'
+    return 'BLOCKED'
+
+
+def load_keywords(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def load_negatives(path):
+    """{(campaign_name, ad_group_name): {(keyword, match_type)}} from ad_group_negatives.csv"""
+    negatives = defaultdict(set)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            negatives[(row['campaign_name'], row['ad_group_name'])].add((row['keyword'], row['match_type']))
+    return negatives
+
+
+def drop_negatives(keywords, negatives):
+    """
+    Keyword rows that are not one of their ad group's negatives -
+    current_keywords_with_ids.csv has no negative flag and lists both
+    """
+    negative_keys = {(campaign_name, ad_group_name, text.lower(), match_type)
+                     for (campaign_name, ad_group_name), items in negatives.items()
+                     for text, match_type in items}
+    return [kw for kw in keywords
+            if (kw['campaign_name'], kw['ad_group_name'], kw['keyword'].lower(), kw['match_type']) not in negative_keys]
+
+
+def find_conflicts(keywords, negatives, include_cross=True):
+    """
+    keywords: rows with keyword, match_type, ad_group_name, campaign_name
+    negatives: {(campaign_name, ad_group_name): {(text, match_type)}}
+    Returns one dict per (keyword, blocking negative) pair.
+    """
+    matcher = NegativeMatcher(negatives)
+
+    conflicts = []
+    for kw in keywords:
+        for (campaign_name, ad_group_name), negative, neg_match_type in matcher.find(kw['keyword']):
+            if campaign_name != kw['campaign_name']:
+                continue
+            is_self = ad_group_name == kw['ad_group_name']
+            if not is_self and not include_cross:
+                continue
+
+            conflicts.append({
+                'scope': 'SELF' if is_self else 'CROSS_AD_GROUP',
+                'severity': conflict_severity(neg_match_type, kw['match_type']),
+                'campaign_name': campaign_name,
+                'keyword_ad_group': kw['ad_group_name'],
+                'keyword': kw['keyword'],
+                'keyword_match_type': kw['match_type'],
+                'criterion_id': kw.get('criterion_id', ''),
+                'negative_ad_group': ad_group_name,
+                'negative': negative,
+                'negative_match_type': neg_match_type,
+            })
+
+    conflicts.sort(key=lambda c: (c['scope'] != 'SELF', c['severity'] != 'BLOCKED',
+                                  c['campaign_name'], c['keyword_ad_group'], c['keyword']))
+    return conflicts
+
+
+def save_conflicts(conflicts, filename='keyword_conflicts.csv'):
+    filepath = f'{OUTPUT_DIR}/{filename}'
+    fieldnames = ['scope', 'severity', 'campaign_name', 'keyword_ad_group', 'keyword', 'keyword_match_type',
+                  'criterion_id', 'negative_ad_group', 'negative', 'negative_match_type']
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(conflicts)
+    print(f"  Saved: {filename} ({len(conflicts)} rows)")
+
+
+def main(self_only=False):
+    print("=" * 60)
+    print("NEGATIVE VS POSITIVE KEYWORD CONFLICTS")
+    print("=" * 60)
+
+    negatives = load_negatives(f'{OUTPUT_DIR}/ad_group_negatives.csv')
+    keywords = drop_negatives(load_keywords(f'{OUTPUT_DIR}/current_keywords_with_ids.csv'), negatives)
+    print(f"\nLoaded {len(keywords)} keywords and "
+          f"{sum(len(n) for n in negatives.values())} negatives across {len(negatives)} ad groups")
+
+    conflicts = find_conflicts(keywords, negatives, include_cross=not self_only)
+
+    counts = Counter((c['scope'], c['severity']) for c in conflicts)
+    print(f"\nFound {len(conflicts)} conflicts:")
+    for (scope, severity), count in sorted(counts.items()):
+        print(f"  {scope:<15} {severity:<8} {count}")
+
+    self_conflicts = [c for c in conflicts if c['scope'] == 'SELF']
+    if self_conflicts:
+        print("\n--- Self-blocking (negative blocks its own ad group's keyword) ---")
+        for c in self_conflicts:
+            print(f"  [{c['keyword_ad_group']}] {c['keyword']} ({c['keyword_match_type']}) "
+                  f"<- -{c['negative']} ({c['negative_match_type']})  {c['severity']}")
+
+    print("\nSaving output files...")
+    save_conflicts(conflicts)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--self-only', action='store_true', help='Only report negatives blocking their own ad group')
+    args = parser.parse_args()
+
+    main(self_only=args.self_only)
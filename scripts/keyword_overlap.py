@@ -0,0 +1,227 @@
+"""
+Keyword cannibalization / overlap analysis across ad groups
+
+Finds positive keywords in different ad groups that compete for the same
+queries. Each keyword is reduced to a signature - lowercased words,
+plurals singularized, stop words dropped, sorted - so "B2B ecommerce
+platforms" and "platform for b2b ecommerce" collide:
+- DUPLICATE: keywords in 2+ ad groups share a signature (one dict
+  lookup per keyword)
+- NEAR_DUPLICATE: one signature is another plus a single word, e.g.
+  "b2b ecommerce" vs "b2b ecommerce software". Found by looking up each
+  signature's one-word deletions, so the pass stays linear in keywords.
+
+The stored search term window is then joined in: each query is tied to
+an overlap through the keyword that triggered it (or its own signature),
+and the ad group that took the most impressions for it is reported as
+the winner.
+
+Output:
+- keyword_overlap.csv: one row per overlap with per-ad-group spend
+- keyword_overlap_queries.csv: one row per overlapping query with the
+  winning ad group and its impression share
+
+Usage:
+    python scripts/keyword_overlap.py
+    python scripts/keyword_overlap.py --days 30
+"""
+
+from keyword_conflicts import drop_negatives, load_negatives
+from ngram_miner import STOPWORDS
+import search_term_store
+import csv
+from collections import defaultdict
+
+OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
+
+
+def singularize(word):
+    if len(word) <= 3 or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'xes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def keyword_signature(text):
+    """Order-, case-, plural- and stop-word-insensitive form of a keyword or query"""
+    words = {singularize(w) for w in text.lower().split() if w not in STOPWORDS}
+    return tuple(sorted(words))
+
+
+class KeywordOverlaps:
+    """
+    Overlapping keyword groups across ad groups.
+    keywords: rows with keyword, match_type, ad_group_name, campaign_name
+    """
+
+    def __init__(self, keywords):
+        self.by_signature = defaultdict(list)   # signature -> keyword rows
+        for kw in keywords:
+            signature = keyword_signature(kw['keyword'])
+            if signature:
+                self.by_signature[signature].append(kw)
+
+        self.overlaps = []                       # overlap id -> dict
+        self.signature_overlaps = defaultdict(list)  # signature -> overlap ids
+
+        for signature, rows in self.by_signature.items():
+            if len({r['ad_group_name'] for r in rows}) > 1:
+                self._add('DUPLICATE', [signature])
+
+        # Near duplicates: drop each word of a 3+ word signature and look it up;
+        # 2-word signatures are skipped so every "b2b x" doesn't overlap "b2b"
+        for signature, rows in self.by_signature.items():
+            if len(signature) < 3:
+                continue
+            ad_groups = {r['ad_group_name'] for r in rows}
+            for i in range(len(signature)):
+                shorter = signature[:i] + signature[i + 1:]
+                other = self.by_signature.get(shorter)
+                if other and {r['ad_group_name'] for r in other} - ad_groups:
+                    self._add('NEAR_DUPLICATE', [shorter, signature])
+
+    def _add(self, overlap_type, signatures):
+        overlap_id = len(self.overlaps)
+        rows = [kw for s in signatures for kw in self.by_signature[s]]
+        self.overlaps.append({
+            'overlap_id': overlap_id,
+            'overlap_type': overlap_type,
+            'signature': ' | '.join(' '.join(s) for s in signatures),
+            'ad_groups': sorted({kw['ad_group_name'] for kw in rows}),
+            'keywords': sorted({f"{kw['keyword']} [{kw['match_type']}] ({kw['ad_group_name']})" for kw in rows}),
+        })
+        for s in signatures:
+            self.signature_overlaps[s].append(overlap_id)
+
+    def overlaps_for(self, search_term, keyword_text=''):
+        """Overlap ids a served query belongs to, via its triggering keyword or itself"""
+        ids = self.signature_overlaps.get(keyword_signature(keyword_text)) if keyword_text else None
+        return ids or self.signature_overlaps.get(keyword_signature(search_term), ())
+
+    def join_search_terms(self, rows):
+        """
+        Attach served traffic to overlaps. Returns per-query results sorted by
+        cost and fills each overlap's per-ad-group stats.
+        """
+        # (overlap id, query) -> ad group -> [impressions, clicks, cost, conversions]
+        served = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0, 0.0]))
+        for row in rows:
+            for overlap_id in self.overlaps_for(row['search_term'], row.get('keyword_text', '')):
+                s = served[(overlap_id, row['search_term'].lower())][row['ad_group_name']]
+                s[0] += row['impressions']
+                s[1] += row['clicks']
+                s[2] += row['cost'] if 'cost' in row else row['cost_micros'] / 1_000_000
+                s[3] += row['conversions']
+
+        for overlap in self.overlaps:
+            overlap['stats'] = defaultdict(lambda: [0, 0, 0.0, 0.0])
+
+        queries = []
+        for (overlap_id, query), by_ad_group in served.items():
+            overlap = self.overlaps[overlap_id]
+            for ad_group, s in by_ad_group.items():
+                totals = overlap['stats'][ad_group]
+                for i in range(4):
+                    totals[i] += s[i]
+
+            impressions = sum(s[0] for s in by_ad_group.values())
+            winner, stats = max(by_ad_group.items(), key=lambda item: (item[1][0], item[1][2]))
+            queries.append({
+                'overlap_id': overlap_id,
+                'overlap_type': overlap['overlap_type'],
+                'search_term': query,
+                'winning_ad_group': winner,
+                'impression_share': round(stats[0] / impressions, 3) if impressions else 0,
+                'ad_groups_served': len(by_ad_group),
+                'impressions': impressions,
+                'clicks': sum(s[1] for s in by_ad_group.values()),
+                'cost': round(sum(s[2] for s in by_ad_group.values()), 2),
+                'conversions': sum(s[3] for s in by_ad_group.values()),
+                'keyword_ad_groups': ', '.join(overlap['ad_groups']),
+            })
+
+        queries.sort(key=lambda q: (-q['cost'], q['search_term'], q['overlap_id']))
+        return queries
+
+
+def load_keywords(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def overlap_rows(overlaps):
+    rows = []
+    for overlap in overlaps:
+        stats = overlap.get('stats', {})
+        rows.append({
+            'overlap_id': overlap['overlap_id'],
+            'overlap_type': overlap['overlap_type'],
+            'signature': overlap['signature'],
+            'ad_groups': ', '.join(overlap['ad_groups']),
+            'keywords': '; '.join(overlap['keywords']),
+            'served_by': '; '.join(
+                f"{ag}: {s[0]} impr / ${s[2]:.2f}"
+                for ag, s in sorted(stats.items(), key=lambda item: -item[1][0])
+            ),
+            'cost': round(sum(s[2] for s in stats.values()), 2),
+        })
+    rows.sort(key=lambda r: (-r['cost'], r['overlap_id']))
+    return rows
+
+
+def save_csv(rows, fieldnames, filename):
+    filepath = f'{OUTPUT_DIR}/{filename}'
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"  Saved: {filename} ({len(rows)} rows)")
+
+
+def main(days=60):
+    print("=" * 60)
+    print("KEYWORD CANNIBALIZATION / OVERLAP ANALYSIS")
+    print("=" * 60)
+
+    # Negatives are traffic shaping, not competing keywords
+    negatives = load_negatives(f'{OUTPUT_DIR}/ad_group_negatives.csv')
+    keywords = drop_negatives(load_keywords(f'{OUTPUT_DIR}/current_keywords_with_ids.csv'), negatives)
+    overlaps = KeywordOverlaps(keywords)
+    print(f"\nLoaded {len(keywords)} keywords ({len(overlaps.by_signature)} distinct signatures)")
+    print(f"  {sum(o['overlap_type'] == 'DUPLICATE' for o in overlaps.overlaps)} duplicate groups, "
+          f"{sum(o['overlap_type'] == 'NEAR_DUPLICATE' for o in overlaps.overlaps)} near-duplicate pairs")
+
+    print(f"\nSyncing search term store (last {days} days)...")
+    search_term_store.sync(days=days)
+    queries = overlaps.join_search_terms(search_term_store.iter_window(days=days))
+    split = [q for q in queries if q['ad_groups_served'] > 1]
+    print(f"  {len(queries)} overlapping queries, {len(split)} served by more than one ad group")
+
+    rows = overlap_rows(overlaps.overlaps)
+    print("\n--- Top overlaps by spend ---")
+    for r in rows[:15]:
+        print(f"  [{r['overlap_type']}] {r['signature']}  ${r['cost']:.2f}")
+        print(f"      keywords: {r['keywords']}")
+        if r['served_by']:
+            print(f"      served:   {r['served_by']}")
+
+    print("\nSaving output files...")
+    save_csv(rows, ['overlap_id', 'overlap_type', 'signature', 'ad_groups', 'keywords', 'served_by', 'cost'],
+             'keyword_overlap.csv')
+    save_csv(queries, ['overlap_id', 'overlap_type', 'search_term', 'winning_ad_group', 'impression_share',
+                       'ad_groups_served', 'impressions', 'clicks', 'cost', 'conversions', 'keyword_ad_groups'],
+             'keyword_overlap_queries.csv')
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=60, help='Search term window in days (default: 60)')
+    args = parser.parse_args()
+
+    main(days=args.days)
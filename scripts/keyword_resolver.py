@@ -0,0 +1,117 @@
+"""
+Indexed keyword -> criterion ID resolver
+
+Maps (keyword, match type, ad group) rows from an audit or mapping CSV to
+the criteria in current_keywords_with_ids.csv. Lookups go through three
+indexes built once, so each row costs a few dict lookups rather than a
+scan of every keyword:
+1. exact (text, match type, ad group)
+2. (text, match type) - the keyword exists, but in another ad group
+3. normalized text, same match type - case, punctuation and spacing
+   differences ("B2B e-commerce" vs "b2b e commerce")
+
+When 2 or 3 return several criteria, candidates are ranked by how similar
+their ad group's name is to the requested one (shared words). A tie at
+the top is reported as AMBIGUOUS with every tied ad group rather than
+resolved to an arbitrary one.
+
+Usage:
+    from keyword_resolver import KeywordResolver
+
+    resolver = KeywordResolver(current_keywords)
+    resolution = resolver.resolve('b2b ecommerce', 'PHRASE', 'B2B EComm')
+    if resolution.status in ('EXACT', 'MATCHED'):
+        criterion = resolution.match
+"""
+
+from collections import defaultdict
+import re
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_keyword(text):
+    """Lowercase, match-type wrappers and punctuation stripped, single-spaced"""
+    return ' '.join(NON_WORD.split(text.lower())).strip()
+
+
+def name_words(name):
+    return frozenset(w for w in NON_WORD.split(name.lower()) if w)
+
+
+class Resolution:
+    """
+    Outcome of one lookup. status is EXACT, MATCHED (single best candidate
+    in another ad group), AMBIGUOUS (several equally good) or UNMATCHED.
+    match is the chosen keyword's data; candidates are (ad_group, data,
+    similarity) best first.
+    """
+
+    def __init__(self, status, match=None, candidates=(), method=''):
+        self.status = status
+        self.match = match
+        self.candidates = list(candidates)
+        self.method = method
+
+    @property
+    def ad_group(self):
+        return self.candidates[0][0] if self.candidates else None
+
+    def describe(self):
+        if self.status == 'EXACT':
+            return ''
+        if self.status == 'MATCHED':
+            return f'Matched to ad group: {self.ad_group} (by {self.method})'
+        if self.status == 'AMBIGUOUS':
+            tied = [ag for ag, _, score in self.candidates if score == self.candidates[0][2]]
+            return f'Ambiguous ({self.method}): {len(tied)} equally good ad groups - {", ".join(tied)}'
+        return 'No keyword with this text and match type'
+
+
+class KeywordResolver:
+    """
+    current_keywords: {(lowercase text, match type, ad group name): data},
+    as returned by update_keyword_urls.load_current_keywords
+    """
+
+    def __init__(self, current_keywords):
+        self.exact = current_keywords
+        self.by_text = defaultdict(list)        # (text, match type) -> [(ad group, data)]
+        self.by_normalized = defaultdict(list)  # (normalized text, match type) -> [(ad group, data)]
+        for (text, match_type, ad_group), data in current_keywords.items():
+            self.by_text[(text, match_type)].append((ad_group, data))
+            self.by_normalized[(normalize_keyword(text), match_type)].append((ad_group, data))
+        self._words = {}
+
+    def _similarity(self, a, b):
+        """Jaccard similarity of two ad group names' words"""
+        words = self._words
+        if a not in words:
+            words[a] = name_words(a)
+        if b not in words:
+            words[b] = name_words(b)
+        union = words[a] | words[b]
+        return len(words[a] & words[b]) / len(union) if union else 0.0
+
+    def _rank(self, entries, ad_group, method):
+        candidates = sorted(((ag, data, self._similarity(ag, ad_group)) for ag, data in entries),
+                            key=lambda c: (-c[2], c[0]))
+        if len(candidates) > 1 and candidates[0][2] == candidates[1][2]:
+            return Resolution('AMBIGUOUS', candidates=candidates, method=method)
+        return Resolution('MATCHED', candidates[0][1], candidates, method)
+
+    def resolve(self, keyword, match_type, ad_group):
+        text = keyword.lower()
+        data = self.exact.get((text, match_type, ad_group))
+        if data is not None:
+            return Resolution('EXACT', data, [(ad_group, data, 1.0)], 'exact')
+
+        entries = self.by_text.get((text, match_type))
+        if entries:
+            return self._rank(entries, ad_group, 'text and match type')
+
+        entries = self.by_normalized.get((normalize_keyword(text), match_type))
+        if entries:
+            return self._rank(entries, ad_group, 'normalized text')
+
+        return Resolution('UNMATCHED')
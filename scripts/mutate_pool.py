@@ -0,0 +1,251 @@
+"""
+Chunked, concurrent, partial-failure-aware mutate pipeline
+
+Splits a mutate's operations into chunks under the per-request operation
+limit and submits them on a bounded thread pool (query_pool), with
+partial_failure enabled so one bad operation no longer rejects the whole
+batch. Operations that fail transiently (internal, database/concurrent
+modification or quota errors, or a request rejected as unavailable or
+over quota) are retried on their own, with backoff between rounds;
+validation errors are final.
+
+A request whose outcome is unknown (a timeout or dropped connection may
+have applied it) is only resent for update/remove operations - resending
+a create could duplicate it (RSAs, negatives, assets), so those are
+reported as failed for the caller to check. An operation that came back
+with a result is never resent.
+
+The result is one MutateResult per call with results aligned to the
+input operations, so a large URL or negative rollout reports exactly
+which operations still failed instead of having to be rerun from scratch.
+
+batch=True runs the operations as an async BatchJobService job instead
+(see batch_jobs) for rollouts of tens of thousands of operations.
+
+Every call drops the mutated resource from gaql_cache (e.g.
+ad_group_criterion for AdGroupCriterionService), so no script reads its
+own writes back from a stale cache.
+
+Usage:
+    from mutate_pool import mutate
+
+    result = mutate('AdGroupCriterionService', 'mutate_ad_group_criteria', operations)
+    print(f"{result.succeeded} updated, {result.failed} failed")
+    for index, message in result.errors.items():
+        ...
+"""
+
+import re
+import time
+
+from ads_client import CUSTOMER_ID, get_client, get_googleads_service
+from query_pool import run_concurrently
+import gaql_cache
+
+# The API accepts up to 10,000 operations per request; staying well under
+# keeps requests small enough for heavy operations like RSAs
+MAX_OPERATIONS_PER_REQUEST = 5000
+
+# Concurrent mutate requests; more mostly adds CONCURRENT_MODIFICATION errors
+MAX_WORKERS = 4
+
+# Extra rounds for operations that failed, and the first backoff in seconds
+MAX_RETRIES = 2
+RETRY_BACKOFF = 2.0
+
+# GoogleAdsError.error_code fields worth retrying
+RETRYABLE_ERRORS = ('internal_error', 'database_error', 'quota_error')
+
+# Request exceptions (google.api_core class names) where the request was
+# turned away unapplied - safe to resend as is
+TRANSIENT_EXCEPTIONS = ('ServiceUnavailable', 'ResourceExhausted', 'TooManyRequests')
+
+# Request exceptions where it may or may not have been applied
+AMBIGUOUS_EXCEPTIONS = ('DeadlineExceeded', 'RetryError', 'InternalServerError', 'Unknown', 'Aborted')
+
+# Marks the error message of an operation that may have been applied
+OUTCOME_UNKNOWN = '(outcome unknown)'
+
+
+class MutateResult:
+    """
+    Consolidated outcome of a chunked mutate.
+    results[i] is the API result for operations[i], or None if it failed;
+    errors maps the index of every failed operation to its error message.
+    """
+
+    def __init__(self, count):
+        self.results = [None] * count
+        self.errors = {}
+        self.requests = 0
+
+    @property
+    def succeeded(self):
+        return sum(1 for r in self.results if r is not None)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def print_errors(self, limit=10):
+        for index, message in sorted(self.errors.items())[:limit]:
+            print(f"  Operation {index} failed: {message}")
+        if len(self.errors) > limit:
+            print(f"  ... and {len(self.errors) - limit} more")
+
+
+def service_resource(service_name):
+    """'AdGroupCriterionService' -> 'ad_group_criterion', the GAQL resource it mutates"""
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', service_name[:-len('Service')]).lower()
+
+
+def _request_type(method):
+    """'mutate_ad_group_criteria' -> 'MutateAdGroupCriteriaRequest'"""
+    return ''.join(part.title() for part in method.split('_')) + 'Request'
+
+
+def _is_retryable(error):
+    return any(kind in error.error_code for kind in RETRYABLE_ERRORS)
+
+
+def _is_create(operation):
+    return 'create' in operation
+
+
+def _exception_outcome(e):
+    """
+    'TRANSIENT' (not applied, resend), 'AMBIGUOUS' (may have been applied)
+    or 'FINAL' for an exception raised by a whole mutate request
+    """
+    failure = getattr(e, 'failure', None)
+    if failure is not None:
+        # GoogleAdsException: the request was rejected as a whole, nothing applied
+        errors = list(failure.errors)
+        return 'TRANSIENT' if errors and all(_is_retryable(error) for error in errors) else 'FINAL'
+    name = type(e).__name__
+    if name in TRANSIENT_EXCEPTIONS:
+        return 'TRANSIENT'
+    if name in AMBIGUOUS_EXCEPTIONS or isinstance(e, (TimeoutError, ConnectionError)):
+        return 'AMBIGUOUS'
+    return 'FINAL'
+
+
+def _partial_failures(client, response, count):
+    """
+    {operation index in the request: (error message, retryable)} from a
+    partial failure response. If the failure has no per-operation details,
+    operations without a result are failed, and not retried.
+    """
+    status = response.partial_failure_error
+    if not status or not status.code:
+        return {}
+
+    failure_type = type(client.get_type('GoogleAdsFailure'))
+    errors = {}
+    for detail in status.details:
+        failure = failure_type.deserialize(detail.value)
+        for error in failure.errors:
+            index = error.location.field_path_elements[0].index
+            retryable = _is_retryable(error)
+            if index in errors:
+                message, other_retryable = errors[index]
+                errors[index] = (f'{message}; {error.message}', retryable and other_retryable)
+            else:
+                errors[index] = (error.message, retryable)
+    if errors:
+        return errors
+    results = list(response.results)
+    return {index: (status.message, False) for index in range(count)
+            if index >= len(results) or not results[index].resource_name}
+
+
+def _send_chunk(client, service, method, customer_id, operations):
+    """Send one request; returns (results, {index in chunk: (error, retryable)})"""
+    request = client.get_type(_request_type(method))
+    request.customer_id = customer_id
+    request.operations.extend(operations)
+    request.partial_failure = True
+
+    try:
+        response = getattr(service, method)(request=request)
+    except Exception as e:
+        outcome = _exception_outcome(e)
+        message = f'{type(e).__name__}: {e}'
+        if outcome == 'AMBIGUOUS':
+            message += f' {OUTCOME_UNKNOWN}'
+        return [None] * len(operations), {
+            i: (message, outcome == 'TRANSIENT' or (outcome == 'AMBIGUOUS' and not _is_create(op)))
+            for i, op in enumerate(operations)
+        }
+
+    errors = _partial_failures(client, response, len(operations))
+    results = list(response.results)
+    results = [None if i in errors or i >= len(results) else results[i] for i in range(len(operations))]
+    return results, errors
+
+
+def _send_and_report(client, service, method, customer_id, operations, indices, on_chunk):
+    results, errors = _send_chunk(client, service, method, customer_id, [operations[i] for i in indices])
+    if on_chunk:
+        on_chunk(indices, results, {indices[position]: message for position, (message, _) in errors.items()})
+    return results, errors
+
+
+def mutate(service_name, method, operations, customer_id=CUSTOMER_ID,
+           chunk_size=MAX_OPERATIONS_PER_REQUEST, max_workers=MAX_WORKERS, retries=MAX_RETRIES,
+           batch=False, on_result=None, on_chunk=None):
+    """
+    Run service_name.method over operations in concurrent chunks and return
+    a MutateResult. Only operations that failed transiently are resubmitted.
+    on_result(index, result, error) is called once per operation with its
+    final outcome - as results stream in with batch=True, at the end otherwise.
+    on_chunk(indices, results, {index: error}) is called from the worker as
+    soon as each request returns, retries included (not used with batch=True).
+    """
+    # Cached reads of the resource go stale: dropped now (in case the run
+    # dies) and again at the end (for reads cached while it ran)
+    gaql_cache.invalidate(service_resource(service_name))
+
+    if batch:
+        from batch_jobs import run_batch_job
+        try:
+            return run_batch_job(service_name, operations, customer_id, on_result=on_result)
+        finally:
+            gaql_cache.invalidate(service_resource(service_name))
+
+    client = get_client()
+    service = get_googleads_service(service_name)
+    result = MutateResult(len(operations))
+
+    pending = list(range(len(operations)))
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+        chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+        outcomes = run_concurrently(
+            [(_send_and_report, client, service, method, customer_id, operations, chunk, on_chunk)
+             for chunk in chunks],
+            max_workers=max_workers, buffer_output=False,
+        )
+        result.requests += len(chunks)
+
+        pending = []
+        for chunk, (results, errors) in zip(chunks, outcomes):
+            for position, index in enumerate(chunk):
+                if position in errors:
+                    message, retryable = errors[position]
+                    result.errors[index] = message
+                    if retryable:
+                        pending.append(index)
+                else:
+                    result.results[index] = results[position]
+                    result.errors.pop(index, None)
+        if not pending:
+            break
+
+    gaql_cache.invalidate(service_resource(service_name))
+    if on_result:
+        for index, op_result in enumerate(result.results):
+            on_result(index, op_result, result.errors.get(index))
+    return result
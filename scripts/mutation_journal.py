@@ -0,0 +1,167 @@
+"""
+Write-ahead mutation journal for resuming large mutates
+
+If a long rollout dies halfway (crash, quota exhaustion, lost network)
+there is otherwise no record of which operations were applied. Here the
+calling script gives every operation a stable key (e.g. criterion + new
+URL, or the asset name) and the journal - an append-only JSON-lines file -
+records:
+1. before anything is sent: every planned operation and its chunk
+   (flushed and fsynced, so it is there even if the request never returns)
+2. as each request returns: every operation's server result, the
+   resource name or the error
+
+With resume=True the journal is replayed first:
+- APPLIED operations are skipped; the journaled resource name stands in
+  for their result
+- FAILED operations are sent again
+- operations planned but without a result (in flight when the run died,
+  or whose request timed out with its outcome unknown) are uncertain: verify(keys) re-checks them all with one bulk read and
+  returns {key: resource name} for the ones that did land. Only the rest
+  are resent; without verify they are all resent, which is only safe for
+  idempotent updates.
+
+Usage:
+    from mutation_journal import journaled_mutate
+
+    result = journaled_mutate('AdGroupCriterionService', 'mutate_ad_group_criteria',
+                              operations, keys, 'url_update_journal.jsonl',
+                              resume=True, verify=find_applied_updates)
+"""
+
+from collections import namedtuple
+from datetime import datetime
+import json
+import os
+import threading
+
+from mutate_pool import MAX_OPERATIONS_PER_REQUEST, OUTCOME_UNKNOWN, MutateResult, mutate
+
+# Stand-in result for an operation applied by an earlier run
+JournaledResult = namedtuple('JournaledResult', ['resource_name'])
+
+
+def load_journal(path):
+    """{key: (status, resource name, error)} from a journal; the last record for a key wins"""
+    state = {}
+    if not os.path.exists(path):
+        return state
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # line cut short when the process died
+            event = record.get('event')
+            if event == 'planned':
+                state[record['key']] = ('PLANNED', None, None)
+            elif event == 'applied':
+                state[record['key']] = ('APPLIED', record.get('resource_name'), None)
+            elif event == 'failed':
+                state[record['key']] = ('FAILED', None, record.get('error'))
+            elif event == 'uncertain':
+                state[record['key']] = ('PLANNED', None, record.get('error'))
+    return state
+
+
+class MutationJournal:
+    """Append-only journal file; a new run truncates it unless resuming"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.state = load_journal(path) if resume else {}
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write('\n')  # close off a record cut short by a crash
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def write(self, records, sync=False):
+        with self._lock:
+            for record in records:
+                self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def _outcome(key, result, error):
+    if error and error.endswith(OUTCOME_UNKNOWN):
+        # May have been applied: re-checked on resume rather than resent
+        return {'event': 'uncertain', 'key': key, 'error': error}
+    if error:
+        return {'event': 'failed', 'key': key, 'error': error}
+    return {'event': 'applied', 'key': key, 'resource_name': getattr(result, 'resource_name', '')}
+
+
+def journaled_mutate(service_name, method, operations, keys, journal_path, resume=False, verify=None,
+                     batch=False, on_result=None, chunk_size=MAX_OPERATIONS_PER_REQUEST, **kwargs):
+    """
+    mutate_pool.mutate with a write-ahead journal. keys[i] identifies
+    operations[i] across runs. Returns a MutateResult over all operations,
+    with JournaledResult entries for ones applied by an earlier run;
+    on_result is called for those too, so logs stay complete.
+    """
+    journal = MutationJournal(journal_path, resume)
+    result = MutateResult(len(operations))
+    pending = list(range(len(operations)))
+
+    if resume:
+        state = journal.state
+        uncertain = sorted({key for key in keys if state.get(key, ('',))[0] == 'PLANNED'})
+        verified = verify(uncertain) if verify and uncertain else {}
+        journal.write([{'event': 'applied', 'key': key, 'resource_name': resource_name, 'verified': True}
+                       for key, resource_name in verified.items()])
+        for key, resource_name in verified.items():
+            state[key] = ('APPLIED', resource_name, None)
+
+        pending = []
+        for index, key in enumerate(keys):
+            status, resource_name, _ = state.get(key, ('', None, None))
+            if status == 'APPLIED':
+                result.results[index] = JournaledResult(resource_name)
+                if on_result:
+                    on_result(index, result.results[index], None)
+            else:
+                pending.append(index)
+
+        print(f"  Journal: {len(operations) - len(pending)} already applied "
+              f"({len(verified)} of {len(uncertain)} uncertain confirmed by re-check), {len(pending)} to send")
+
+    if batch:
+        from batch_jobs import MAX_OPERATIONS_PER_UPLOAD
+        chunk_size = MAX_OPERATIONS_PER_UPLOAD
+    journal.write([{'event': 'run', 'service': service_name, 'method': method, 'operations': len(pending),
+                    'resume': resume, 'started': datetime.now().isoformat(timespec='seconds')}] +
+                  [{'event': 'planned', 'key': keys[index], 'chunk': position // chunk_size}
+                   for position, index in enumerate(pending)], sync=True)
+
+    def record_chunk(indices, results, errors):
+        journal.write([_outcome(keys[pending[i]], r, errors.get(i)) for i, r in zip(indices, results)], sync=True)
+
+    def record_result(index, op_result, error):
+        if batch:
+            journal.write([_outcome(keys[pending[index]], op_result, error)])
+        if on_result:
+            on_result(pending[index], op_result, error)
+
+    try:
+        sent = mutate(service_name, method, [operations[i] for i in pending], batch=batch,
+                      on_result=record_result, on_chunk=record_chunk, chunk_size=chunk_size, **kwargs)
+    finally:
+        journal.close()
+
+    for position, index in enumerate(pending):
+        result.results[index] = sent.results[position]
+        if position in sent.errors:
+            result.errors[index] = sent.errors[position]
+    result.requests = sent.requests
+    return result
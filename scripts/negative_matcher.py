@@ -0,0 +1,159 @@
+"""
+Match-type-aware index of ad group negative keywords
+
+Applies Google Ads negative keyword semantics at the token level:
+- EXACT:  the search term is exactly the negative's words, nothing more
+- PHRASE: the negative's words appear in the term, in order and adjacent
+- BROAD:  every word of the negative appears in the term, in any order
+Negatives do not match close variants, so "cart" does not block
+"cartography" or "carts".
+
+Each match type has its own structure so a term is checked against all
+negatives at once rather than one by one:
+- exact negatives are a dict lookup on the term's token tuple
+- phrase negatives are a token-level Aho-Corasick automaton, one pass
+  over the term's tokens finds every adjacent in-order occurrence
+- broad negatives are token postings lists; a negative matches once all
+  of its distinct tokens have been counted
+
+Usage:
+    from negative_matcher import NegativeMatcher
+
+    matcher = NegativeMatcher(get_ad_group_negatives())
+    for ad_group, negative, match_type in matcher.find('b2b ecommerce platform'):
+        ...
+"""
+
+from collections import defaultdict, deque
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over sequences of hashable symbols (the
+    characters of a string, or a list of tokens).
+    search() returns the ids of the patterns that occur in a sequence.
+    """
+
+    def __init__(self, patterns):
+        # Trie: per-node transition dicts, failure links and output pattern ids
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for symbol in pattern:
+                nxt = self._goto[node].get(symbol)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][symbol] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] = self._out[node] + (pattern_id,)
+
+        # Breadth-first failure links; each node's outputs include those of
+        # its failure target, so matching never has to walk the chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and symbol not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(symbol, 0)
+                self._fail[child] = target if target != child else 0
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, sequence):
+        """Set of pattern ids occurring anywhere in sequence"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for symbol in sequence:
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+def tokenize(text):
+    """Lowercased words of a search term or keyword"""
+    return tuple(text.lower().split())
+
+
+class NegativeMatcher:
+    """
+    All ad group negatives compiled into one index.
+    ad_group_negatives: {ad_group_name: iterable of (text, match_type)};
+    a bare string is treated as a PHRASE negative.
+    """
+
+    def __init__(self, ad_group_negatives):
+        self._hits = []          # hit id -> (ad_group, text, match_type)
+        self._exact = defaultdict(list)
+        phrases = {}             # token tuple -> phrase pattern id
+        self._phrase_hits = []   # phrase pattern id -> hit ids
+        self._broad_postings = defaultdict(list)
+        self._broad_sizes = []   # broad pattern id -> distinct tokens needed
+        self._broad_hits = []    # broad pattern id -> hit ids
+        broads = {}
+
+        for ag_name, negatives in ad_group_negatives.items():
+            for neg in negatives:
+                text, match_type = (neg, 'PHRASE') if isinstance(neg, str) else neg
+                tokens = tokenize(text)
+                if not tokens:
+                    continue
+                hit_id = len(self._hits)
+                self._hits.append((ag_name, text.lower(), match_type))
+
+                if match_type == 'EXACT':
+                    self._exact[tokens].append(hit_id)
+                elif match_type == 'BROAD':
+                    key = frozenset(tokens)
+                    pattern_id = broads.get(key)
+                    if pattern_id is None:
+                        pattern_id = broads[key] = len(self._broad_sizes)
+                        self._broad_sizes.append(len(key))
+                        self._broad_hits.append([])
+                        for token in key:
+                            self._broad_postings[token].append(pattern_id)
+                    self._broad_hits[pattern_id].append(hit_id)
+                else:
+                    pattern_id = phrases.setdefault(tokens, len(phrases))
+                    if pattern_id == len(self._phrase_hits):
+                        self._phrase_hits.append([])
+                    self._phrase_hits[pattern_id].append(hit_id)
+
+        self._phrase = AhoCorasick(list(phrases))
+
+    def find(self, search_term):
+        """
+        (ad_group, negative, match_type) for every negative that blocks
+        search_term, in the order the negatives were given
+        """
+        tokens = tokenize(search_term)
+        hit_ids = list(self._exact.get(tokens, ()))
+
+        for pattern_id in self._phrase.search(tokens):
+            hit_ids.extend(self._phrase_hits[pattern_id])
+
+        if self._broad_sizes:
+            counts = defaultdict(int)
+            for token in set(tokens):
+                for pattern_id in self._broad_postings.get(token, ()):
+                    counts[pattern_id] += 1
+            for pattern_id, count in counts.items():
+                if count == self._broad_sizes[pattern_id]:
+                    hit_ids.extend(self._broad_hits[pattern_id])
+
+        hit_ids.sort()
+        return [self._hits[hit_id] for hit_id in hit_ids]
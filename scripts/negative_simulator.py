@@ -0,0 +1,201 @@
+"""
+What-if simulator for proposed negative keywords
+
+Builds an inverted token index over the locally stored search term
+report (search_term_store), so a proposed negative can be evaluated in
+milliseconds instead of rescanning every row:
+- EXACT:  one dict lookup on the negative's token tuple
+- PHRASE: intersect the postings of its tokens, then check word order
+- BROAD:  intersect the postings of its tokens
+
+For each negative it reports the historical impressions, clicks, spend
+and conversions it would have blocked in its ad group, and where that
+traffic would likely go instead - the other ad group in the same
+campaign that served the most of the blocked terms and is not blocked
+for them by its own negatives.
+
+Usage:
+    python scripts/negative_simulator.py --ad-group "NB - General B2B" --negative "b2b ecommerce"
+    python scripts/negative_simulator.py --ad-group OMS --negative "free" --match-type BROAD
+    python scripts/negative_simulator.py --candidates negative_candidates.csv
+
+    from negative_simulator import SearchTermIndex
+    index = SearchTermIndex.from_store(days=60)
+    impact = index.simulate('NB - General B2B', 'b2b ecommerce', 'PHRASE')
+"""
+
+import csv
+from collections import defaultdict
+
+from negative_matcher import tokenize
+import search_term_store
+
+
+class SearchTermIndex:
+    """Inverted token index over search term report rows"""
+
+    def __init__(self):
+        self.rows = []                       # row id -> report row
+        self.tokens = []                     # row id -> token tuple
+        self.postings = defaultdict(list)    # token -> ascending row ids
+        self.exact = defaultdict(list)       # token tuple -> row ids (every ad group)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: dicts with search_term, campaign_name, ad_group_name and metrics (cost or cost_micros)"""
+        index = cls()
+        for row in rows:
+            index.add(row)
+        return index
+
+    @classmethod
+    def from_store(cls, days=60, store_dir=search_term_store.STORE_DIR):
+        """Index the stored search term window without calling the API"""
+        return cls.from_rows(search_term_store.iter_window(days=days, store_dir=store_dir))
+
+    def add(self, row):
+        row_id = len(self.rows)
+        if 'cost' not in row:
+            row = dict(row, cost=row['cost_micros'] / 1_000_000)
+        tokens = tokenize(row['search_term'])
+        self.rows.append(row)
+        self.tokens.append(tokens)
+        for token in set(tokens):
+            self.postings[token].append(row_id)
+        self.exact[tokens].append(row_id)
+
+    def match(self, negative, match_type='PHRASE'):
+        """Row ids of every search term the negative would block (any ad group)"""
+        neg_tokens = tokenize(negative)
+        if not neg_tokens:
+            return []
+        if match_type == 'EXACT':
+            return list(self.exact.get(neg_tokens, ()))
+
+        # Intersect postings, rarest token first
+        lists = sorted((self.postings.get(t, ()) for t in set(neg_tokens)), key=len)
+        if not lists[0]:
+            return []
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates.intersection_update(postings)
+            if not candidates:
+                return []
+
+        if match_type == 'BROAD':
+            return sorted(candidates)
+
+        n = len(neg_tokens)
+        return sorted(
+            row_id for row_id in candidates
+            if any(self.tokens[row_id][i:i + n] == neg_tokens
+                   for i in range(len(self.tokens[row_id]) - n + 1))
+        )
+
+    def simulate(self, ad_group_name, negative, match_type='PHRASE', negative_matcher=None):
+        """
+        Traffic the negative would have blocked in ad_group_name, and where it moves.
+        negative_matcher (NegativeMatcher of existing negatives) rules out
+        destination ad groups that already block a term.
+        """
+        blocked = [r for r in self.match(negative, match_type) if self.rows[r]['ad_group_name'] == ad_group_name]
+
+        impact = {
+            'ad_group': ad_group_name,
+            'keyword': negative,
+            'match_type': match_type,
+            'terms': len(blocked),
+            'impressions': 0,
+            'clicks': 0,
+            'cost': 0.0,
+            'conversions': 0.0,
+            'moves_to': {},
+            'top_terms': [],
+        }
+        moves_to = defaultdict(float)
+
+        for row_id in blocked:
+            row = self.rows[row_id]
+            impact['impressions'] += row['impressions']
+            impact['clicks'] += row['clicks']
+            impact['cost'] += row['cost']
+            impact['conversions'] += row['conversions']
+
+            # Other ad groups in the campaign that served the same term
+            best, best_impressions = None, -1
+            for other_id in self.exact.get(self.tokens[row_id], ()):
+                other = self.rows[other_id]
+                if other['ad_group_name'] == ad_group_name or other['campaign_name'] != row['campaign_name']:
+                    continue
+                if negative_matcher and any(ag == other['ad_group_name']
+                                            for ag, _, _ in negative_matcher.find(row['search_term'])):
+                    continue
+                if other['impressions'] > best_impressions:
+                    best, best_impressions = other['ad_group_name'], other['impressions']
+            moves_to[best or '(no other ad group served it)'] += row['cost']
+
+        impact['cost'] = round(impact['cost'], 2)
+        impact['moves_to'] = dict(sorted(moves_to.items(), key=lambda x: -x[1]))
+        impact['top_terms'] = [
+            self.rows[r]['search_term']
+            for r in sorted(blocked, key=lambda r: -self.rows[r]['cost'])[:5]
+        ]
+        return impact
+
+
+def print_impact(impact):
+    print(f"  [{impact['ad_group']}] {impact['keyword']} ({impact['match_type']}): "
+          f"{impact['terms']} terms, {impact['clicks']} clicks, ${impact['cost']:.2f}, "
+          f"{impact['conversions']:.1f} conv")
+    for ad_group, cost in impact['moves_to'].items():
+        print(f"      -> {ad_group}: ${cost:.2f}")
+    if impact['conversions']:
+        print(f"      WARNING: would have blocked {impact['conversions']:.1f} conversions")
+
+
+def simulate_negatives(ad_group_name, negatives, index=None, negative_matcher=None, days=60):
+    """
+    Print the simulated impact of adding negatives ({'keyword', 'match_type'}
+    dicts) to one ad group; returns the impacts. Uses the local store only.
+    """
+    if index is None:
+        index = SearchTermIndex.from_store(days=days)
+    if not index.rows:
+        print("  (no stored search terms - run search_term_store.py to enable impact simulation)")
+        return []
+
+    impacts = []
+    for neg in negatives:
+        impact = index.simulate(ad_group_name, neg['keyword'], neg.get('match_type', 'PHRASE'), negative_matcher)
+        print_impact(impact)
+        impacts.append(impact)
+    return impacts
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=60, help='Window length in days (default: 60)')
+    parser.add_argument('--ad-group', help='Ad group the negative would be added to')
+    parser.add_argument('--negative', action='append', default=[], help='Negative keyword text (repeatable)')
+    parser.add_argument('--match-type', default='PHRASE', choices=['EXACT', 'PHRASE', 'BROAD'])
+    parser.add_argument('--candidates', help='CSV with ad_group, keyword, match_type columns (e.g. negative_candidates.csv)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NEGATIVE KEYWORD WHAT-IF SIMULATION")
+    print("=" * 60)
+
+    index = SearchTermIndex.from_store(days=args.days)
+    print(f"\nIndexed {len(index.rows)} stored search terms ({len(index.postings)} distinct tokens)\n")
+
+    proposals = defaultdict(list)
+    if args.candidates:
+        with open(args.candidates, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                proposals[row['ad_group']].append(row)
+    for negative in args.negative:
+        proposals[args.ad_group].append({'keyword': negative, 'match_type': args.match_type})
+
+    for ad_group_name, negatives in proposals.items():
+        simulate_negatives(ad_group_name, negatives, index=index)
@@ -5,17 +5,14 @@ Fixes:
 2. Unified commerce terms should route to B2B Other Keywords (add negatives to NB - General B2B)
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
+from analyze_search_terms_v2 import get_ad_group_negatives
+from negative_matcher import NegativeMatcher
+from negative_simulator import simulate_negatives
+from reconcile import AD_GROUP_NEGATIVE_KEYWORDS, reconcile
 import csv
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
 
 # Negatives to add to NB - General B2B ad group
@@ -54,64 +51,47 @@ def get_ad_group_id(ad_group_name):
     return None
 
 
-def check_existing_negatives(ad_group_id):
-    """Get existing negatives for an ad group"""
-    ga_service = get_googleads_service('GoogleAdsService')
+def negative_key(ad_group_id, neg):
+    """Reconciler key for a negative: (ad_group_id, lowercase text, match type)"""
+    return (str(ad_group_id), neg['keyword'].lower(), neg['match_type'])
 
-    query = f'''
-    SELECT
-        ad_group_criterion.keyword.text,
-        ad_group_criterion.keyword.match_type
-    FROM ad_group_criterion
-    WHERE ad_group.id = {ad_group_id}
-    AND ad_group_criterion.negative = TRUE
-    AND ad_group_criterion.type = 'KEYWORD'
-    '''
 
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
-    existing = set()
-    for row in response:
-        kw = row.ad_group_criterion.keyword.text.lower()
-        existing.add(kw)
-    return existing
+def plan_negatives(ad_group_id, negatives):
+    """Split negatives into (to_add, already_exists) against the ad group's current negatives"""
+    desired = {negative_key(ad_group_id, neg): {} for neg in negatives}
+    diff, _ = reconcile(AD_GROUP_NEGATIVE_KEYWORDS, desired, where=f'ad_group.id = {ad_group_id}')
+    creates = {key for key, _ in diff.creates}
+    to_add = [neg for neg in negatives if negative_key(ad_group_id, neg) in creates]
+    already_exists = [neg for neg in negatives if negative_key(ad_group_id, neg) not in creates]
+    return to_add, already_exists
 
 
 def add_negative_keywords(ad_group_id, negatives):
-    """Add negative keywords to an ad group"""
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
-    ad_group_criterion_service = client.get_service('AdGroupCriterionService')
-
-    operations = []
-    for neg in negatives:
-        operation = client.get_type('AdGroupCriterionOperation')
-        criterion = operation.create
-
-        criterion.ad_group = client.get_service("AdGroupService").ad_group_path(
-            CUSTOMER_ID, ad_group_id
-        )
-        criterion.negative = True
-        criterion.keyword.text = neg['keyword']
-
-        match_type_enum = client.enums.KeywordMatchTypeEnum
-        if neg['match_type'] == 'PHRASE':
-            criterion.keyword.match_type = match_type_enum.PHRASE
-        elif neg['match_type'] == 'EXACT':
-            criterion.keyword.match_type = match_type_enum.EXACT
-        else:
-            criterion.keyword.match_type = match_type_enum.BROAD
-
-        operations.append(operation)
-
-    if operations:
-        response = ad_group_criterion_service.mutate_ad_group_criteria(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
-        return len(response.results)
-    return 0
-
-
-def main():
+    """Add negative keywords to an ad group; returns the negatives that were added"""
+    by_key = {negative_key(ad_group_id, neg): neg for neg in negatives}
+    diff, response = reconcile(AD_GROUP_NEGATIVE_KEYWORDS, {key: {} for key in by_key},
+                               where=f'ad_group.id = {ad_group_id}', dry_run=False)
+    if response is None:
+        return []
+
+    # Operations follow diff.creates order
+    created = [by_key[key] for key, _ in diff.creates]
+    for index, message in sorted(response.errors.items()):
+        print(f"  FAILED: {created[index]['keyword']} ({created[index]['match_type']}) - {message}")
+    return [neg for neg, result in zip(created, response.results) if result is not None]
+
+
+def load_negative_candidates(path, ad_group_name):
+    """Mined negatives for one ad group from an ngram_miner.py negative_candidates.csv"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [
+            {'keyword': row['keyword'], 'match_type': row['match_type'], 'reason': row['reason']}
+            for row in csv.DictReader(f)
+            if row['ad_group'] == ad_group_name
+        ]
+
+
+def main(candidates_path=None):
     print("=" * 60)
     print("NEGATIVE KEYWORD ADDITIONS FOR TRAFFIC SHAPING")
     print("=" * 60)
@@ -126,23 +106,18 @@ def main():
 
     print(f"Found ad group ID: {general_b2b_id}")
 
-    # Check existing negatives
+    negatives = NEGATIVES_FOR_GENERAL_B2B
+    if candidates_path:
+        negatives = load_negative_candidates(candidates_path, 'NB - General B2B')
+        print(f"Loaded {len(negatives)} mined candidates from {candidates_path}")
+
+    # Diff against the ad group's existing negatives (text + match type)
     print("\nChecking existing negatives...")
-    existing = check_existing_negatives(general_b2b_id)
-    print(f"Found {len(existing)} existing negatives")
-
-    # Filter out already-existing negatives
-    to_add = []
-    already_exists = []
-    for neg in NEGATIVES_FOR_GENERAL_B2B:
-        if neg['keyword'].lower() in existing:
-            already_exists.append(neg)
-        else:
-            to_add.append(neg)
+    to_add, already_exists = plan_negatives(general_b2b_id, negatives)
 
     print(f"\nNegatives already present: {len(already_exists)}")
     for neg in already_exists:
-        print(f"  - [{neg['keyword']}] (already exists)")
+        print(f"  - [{neg['keyword']}] ({neg['match_type']}) (already exists)")
 
     print(f"\nNegatives to add: {len(to_add)}")
     for neg in to_add:
@@ -152,20 +127,25 @@ def main():
         print("\nNo new negatives to add.")
         return
 
+    # Show what these would have blocked over the stored search term history
+    print("\nSimulated impact (last 60 days):")
+    # Existing negatives, so traffic is not shown moving into ad groups that block it
+    simulate_negatives('NB - General B2B', to_add, negative_matcher=NegativeMatcher(get_ad_group_negatives()))
+
     # Confirm before adding
     print("\n" + "-" * 40)
     response = input("Add these negatives? (yes/no): ").strip().lower()
 
     if response == 'yes':
         print("\nAdding negatives...")
-        count = add_negative_keywords(general_b2b_id, to_add)
-        print(f"Successfully added {count} negative keywords to NB - General B2B")
+        added = add_negative_keywords(general_b2b_id, to_add)
+        print(f"Successfully added {len(added)} negative keywords to NB - General B2B")
 
         # Save record of what was added
         with open(f'{OUTPUT_DIR}/negatives_added_log.csv', 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=['ad_group', 'keyword', 'match_type', 'reason'])
             writer.writeheader()
-            for neg in to_add:
+            for neg in added:
                 writer.writerow({
                     'ad_group': 'NB - General B2B',
                     'keyword': neg['keyword'],
@@ -191,4 +171,9 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candidates', help='negative_candidates.csv from ngram_miner.py (replaces the built-in list)')
+    args = parser.parse_args()
+
+    main(candidates_path=args.candidates)
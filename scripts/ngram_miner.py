@@ -0,0 +1,258 @@
+"""
+Search term n-gram mining for negative keyword discovery
+
+Streams search term rows and accumulates impressions, clicks, cost and
+conversions for every 1-, 2- and 3-word n-gram, per campaign and ad
+group. Grams that never converted are ranked by wasted spend as
+candidate phrase negatives.
+
+Memory is bounded: once more than MAX_GRAMS grams are tracked, the
+lower-spend half is pruned (lossy counting). A pruned gram that shows
+up again restarts from zero, so a reported total can be low by at most
+max_pruned_cost - and only for grams far below the candidates that
+matter.
+
+Candidates skip grams that would block one of the ad group's own
+keywords, brand grams, stopword-only grams, grams already covered by an
+existing negative, and grams containing a smaller candidate already
+chosen for the same ad group.
+
+Output (negative_candidates.csv) uses the ad_group / keyword /
+match_type / reason columns of negatives_recommended.csv and can be
+passed to negatives_to_add.py --candidates.
+
+Usage:
+    python scripts/ngram_miner.py
+    python scripts/ngram_miner.py --days 30 --min-clicks 3 --top 100
+"""
+
+from ads_client import search
+from analyze_search_terms_v2 import BRAND_REGEX, get_ad_group_negatives
+from negative_matcher import NegativeMatcher
+import search_term_store
+import csv
+from collections import defaultdict
+
+OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
+
+MAX_N = 3
+
+# Grams tracked before the lowest-spend half is pruned
+MAX_GRAMS = 200_000
+
+# Grams made only of these words are never suggested as negatives
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'best', 'by', 'can', 'do', 'for',
+    'from', 'how', 'i', 'in', 'is', 'it', 'my', 'near', 'of', 'on', 'or', 'the',
+    'to', 'top', 'vs', 'what', 'with', 'you', 'your',
+}
+
+# impressions, clicks, cost, conversions, distinct terms
+IMPRESSIONS, CLICKS, COST, CONVERSIONS, TERMS = range(5)
+
+
+def term_ngrams(search_term, max_n=MAX_N):
+    """Distinct word n-grams (1..max_n) of a search term"""
+    tokens = search_term.lower().split()
+    grams = set(tokens)
+    if max_n >= 2:
+        grams.update(map(' '.join, zip(tokens, tokens[1:])))
+    if max_n >= 3:
+        grams.update(map(' '.join, zip(tokens, tokens[1:], tokens[2:])))
+    for n in range(4, max_n + 1):
+        grams.update(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return grams
+
+
+class NgramMiner:
+    """Bounded-memory n-gram aggregator over search term rows"""
+
+    def __init__(self, max_n=MAX_N, max_grams=MAX_GRAMS):
+        self.max_n = max_n
+        self.max_grams = max_grams
+        self.stats = defaultdict(dict)   # (campaign, ad_group) -> {gram: [impr, clicks, cost, conv, terms]}
+        self.ad_group_ids = {}           # (campaign, ad_group) -> ad_group_id
+        self.size = 0
+        self.rows = 0
+        self.max_pruned_cost = 0.0
+
+    def add(self, search_term, campaign_name, ad_group_name, impressions, clicks, cost, conversions,
+            ad_group_id=None):
+        scope = (campaign_name, ad_group_name)
+        if ad_group_id is not None:
+            self.ad_group_ids[scope] = ad_group_id
+
+        grams = self.stats[scope]
+        for gram in term_ngrams(search_term, self.max_n):
+            s = grams.get(gram)
+            if s is None:
+                grams[gram] = [impressions, clicks, cost, conversions, 1]
+                self.size += 1
+            else:
+                s[IMPRESSIONS] += impressions
+                s[CLICKS] += clicks
+                s[COST] += cost
+                s[CONVERSIONS] += conversions
+                s[TERMS] += 1
+
+        self.rows += 1
+        if self.size > self.max_grams:
+            self._prune()
+
+    def add_rows(self, rows):
+        """Add analyzer-style rows (search_term, campaign_name, ad_group_name, cost, ...)"""
+        for row in rows:
+            self.add(row['search_term'], row['campaign_name'], row['ad_group_name'],
+                     row['impressions'], row['clicks'], row['cost'], row['conversions'],
+                     ad_group_id=row.get('ad_group_id'))
+        return self
+
+    def _prune(self):
+        """Drop the lower-spend half of all tracked grams"""
+        costs = sorted(s[COST] for grams in self.stats.values() for s in grams.values())
+        threshold = costs[len(costs) // 2]
+        self.max_pruned_cost = max(self.max_pruned_cost, threshold)
+
+        size = 0
+        for scope, grams in self.stats.items():
+            kept = {gram: s for gram, s in grams.items() if s[COST] > threshold}
+            self.stats[scope] = kept
+            size += len(kept)
+        self.size = size
+
+    def candidates(self, min_clicks=2, min_cost=0.0, exclude=None):
+        """
+        Zero-conversion grams ranked by wasted spend, one dict per candidate.
+        exclude(campaign, ad_group, gram) -> True drops a gram.
+        """
+        ranked = sorted(
+            (((campaign_name, ad_group_name, gram), s)
+             for (campaign_name, ad_group_name), grams in self.stats.items()
+             for gram, s in grams.items()
+             if s[CONVERSIONS] == 0 and s[CLICKS] >= min_clicks and s[COST] >= min_cost),
+            key=lambda item: (-item[1][COST], item[0]),
+        )
+
+        chosen = defaultdict(set)
+        results = []
+        for (campaign_name, ad_group_name, gram), s in ranked:
+            if all(w in STOPWORDS for w in gram.split()):
+                continue
+            if exclude and exclude(campaign_name, ad_group_name, gram):
+                continue
+            # A smaller gram already chosen here blocks everything this one would
+            scope_chosen = chosen[(campaign_name, ad_group_name)]
+            if any(sub in scope_chosen for sub in term_ngrams(gram, self.max_n) if sub != gram):
+                continue
+            scope_chosen.add(gram)
+
+            results.append({
+                'campaign_name': campaign_name,
+                'ad_group': ad_group_name,
+                'ad_group_id': self.ad_group_ids.get((campaign_name, ad_group_name), ''),
+                'keyword': gram,
+                'match_type': 'PHRASE',
+                'reason': f"${s[COST]:.2f} wasted across {s[TERMS]} terms, 0 conversions",
+                'terms': s[TERMS],
+                'impressions': s[IMPRESSIONS],
+                'clicks': s[CLICKS],
+                'cost': round(s[COST], 2),
+            })
+        return results
+
+
+def contains_phrase(text, gram):
+    """True if gram's words appear adjacent and in order in text's words"""
+    return f' {gram} ' in f' {" ".join(text.lower().split())} '
+
+
+def build_exclude(keywords_by_ag, negatives_by_ag, brand_regex=None):
+    """
+    Exclusion check for NgramMiner.candidates:
+    keywords_by_ag: {ad_group: [positive keyword text]} - never block these
+    negatives_by_ag: {ad_group: {(text, match_type)}} - already negated
+    """
+    matcher = NegativeMatcher(negatives_by_ag)
+
+    def exclude(campaign_name, ad_group_name, gram):
+        if brand_regex is not None and brand_regex.search(gram):
+            return True
+        if any(contains_phrase(kw, gram) for kw in keywords_by_ag.get(ad_group_name, ())):
+            return True
+        # A phrase/broad negative blocking the gram blocks every term containing it
+        return any(ag == ad_group_name and match_type != 'EXACT'
+                   for ag, _, match_type in matcher.find(gram))
+
+    return exclude
+
+
+def get_ad_group_keywords():
+    """Enabled positive keyword text per ad group"""
+    query = '''
+    SELECT
+        ad_group.name,
+        ad_group_criterion.keyword.text
+    FROM ad_group_criterion
+    WHERE ad_group_criterion.type = 'KEYWORD'
+    AND ad_group_criterion.negative = FALSE
+    AND ad_group_criterion.status = 'ENABLED'
+    '''
+
+    keywords = defaultdict(list)
+    for row in search(query):
+        keywords[row.ad_group.name].append(row.ad_group_criterion.keyword.text.lower())
+    return keywords
+
+
+def save_candidates(candidates, filename='negative_candidates.csv'):
+    filepath = f'{OUTPUT_DIR}/{filename}'
+    fieldnames = ['ad_group', 'keyword', 'match_type', 'reason', 'campaign_name', 'ad_group_id',
+                  'terms', 'impressions', 'clicks', 'cost']
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(candidates)
+    print(f"  Saved: {filename} ({len(candidates)} rows)")
+
+
+def main(days=60, min_clicks=2, top=50):
+    print("=" * 60)
+    print("N-GRAM NEGATIVE KEYWORD MINING")
+    print("=" * 60)
+
+    print(f"\nSyncing search term store (last {days} days)...")
+    search_term_store.sync(days=days)
+
+    print("Mining n-grams...")
+    miner = NgramMiner()
+    for row in search_term_store.iter_window(days=days):
+        miner.add(row['search_term'], row['campaign_name'], row['ad_group_name'],
+                  row['impressions'], row['clicks'], row['cost_micros'] / 1_000_000, row['conversions'],
+                  ad_group_id=row['ad_group_id'])
+    print(f"  {miner.rows} terms, {miner.size} grams tracked")
+    if miner.max_pruned_cost:
+        print(f"  (pruned grams below ${miner.max_pruned_cost:.2f} spend)")
+
+    print("\nLoading keywords and existing negatives...")
+    exclude = build_exclude(get_ad_group_keywords(), get_ad_group_negatives(), BRAND_REGEX)
+
+    candidates = miner.candidates(min_clicks=min_clicks, exclude=exclude)
+    print(f"Found {len(candidates)} candidate negatives\n")
+
+    for c in candidates[:top]:
+        print(f"  {c['ad_group']:<22} \"{c['keyword']}\"  ${c['cost']:>8.2f}  "
+              f"{c['clicks']} clicks / {c['terms']} terms")
+
+    print("\nSaving output files...")
+    save_candidates(candidates)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=60, help='Window length in days (default: 60)')
+    parser.add_argument('--min-clicks', type=int, default=2, help='Minimum clicks for a candidate (default: 2)')
+    parser.add_argument('--top', type=int, default=50, help='Candidates to print (default: 50)')
+    args = parser.parse_args()
+
+    main(days=args.days, min_clicks=args.min_clicks, top=args.top)
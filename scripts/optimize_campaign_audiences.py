@@ -4,18 +4,15 @@ Optimize Campaign-Level Audiences for Search - NonBrand
 This script:
 1. Re-enables 8 paused audiences that are relevant
 2. Adds ~10 valuable missing audiences at campaign level
-"""
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
+Both lists are the desired state; reconcile diffs them against the
+campaign's current audiences, so rerunning it changes nothing.
+"""
 
-from google.ads.googleads.client import GoogleAdsClient
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
+from reconcile import CAMPAIGN_USER_LISTS, reconcile
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 # Campaign ID for Search - NonBrand
 def get_campaign_id():
@@ -59,164 +56,54 @@ NEW_AUDIENCES_TO_ADD = [
     {'user_list_id': '8661834992', 'name': 'Order Management Page Visits Last 90 days - GA4', 'size': 40},
 ]
 
-def get_paused_criterion_ids():
-    """Get criterion IDs for paused audiences"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
-    query = '''
-    SELECT
-        campaign_criterion.criterion_id,
-        campaign_criterion.user_list.user_list,
-        campaign_criterion.status
-    FROM campaign_criterion
-    WHERE campaign.name = 'Search - NonBrand'
-    AND campaign_criterion.type = 'USER_LIST'
-    AND campaign_criterion.status = 'PAUSED'
-    '''
-
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
-
-    paused = {}
-    for row in response:
-        if row.campaign_criterion.user_list and row.campaign_criterion.user_list.user_list:
-            parts = row.campaign_criterion.user_list.user_list.split('/')
-            if len(parts) >= 4:
-                user_list_id = parts[-1]
-                paused[user_list_id] = row.campaign_criterion.criterion_id
-
-    return paused
-
-def get_existing_user_list_ids():
-    """Get user list IDs already targeted at campaign level"""
-    ga_service = get_googleads_service('GoogleAdsService')
-
-    query = '''
-    SELECT
-        campaign_criterion.user_list.user_list
-    FROM campaign_criterion
-    WHERE campaign.name = 'Search - NonBrand'
-    AND campaign_criterion.type = 'USER_LIST'
-    '''
-
-    response = ga_service.search(customer_id=CUSTOMER_ID, query=query)
-
-    existing = set()
-    for row in response:
-        if row.campaign_criterion.user_list and row.campaign_criterion.user_list.user_list:
-            parts = row.campaign_criterion.user_list.user_list.split('/')
-            if len(parts) >= 4:
-                existing.add(parts[-1])
-
-    return existing
-
-def enable_paused_audiences(client, campaign_id, paused_criterion_ids, dry_run=True):
-    """Re-enable paused audiences"""
-    operations = []
-    to_enable = []
-
-    for aud in PAUSED_AUDIENCES_TO_ENABLE:
-        user_list_id = aud['user_list_id']
-        criterion_id = paused_criterion_ids.get(user_list_id)
-
-        if not criterion_id:
-            print(f"  WARNING: Could not find criterion ID for {aud['name']}, skipping")
-            continue
-
-        # Create update operation
-        operation = client.get_type("CampaignCriterionOperation")
-        criterion = operation.update
-
-        # Set the resource name
-        criterion.resource_name = client.get_service("CampaignCriterionService").campaign_criterion_path(
-            CUSTOMER_ID, campaign_id, criterion_id
-        )
-
-        # Set status to ENABLED
-        criterion.status = client.enums.CampaignCriterionStatusEnum.ENABLED
-
-        # Set update mask
-        operation.update_mask.paths.append("status")
-
-        operations.append(operation)
-        to_enable.append(aud)
-
-    if dry_run:
-        print(f"\n[DRY RUN] Would re-enable {len(operations)} paused audiences:")
-        for aud in to_enable:
-            print(f"  + {aud['name']}")
+def desired_audiences(campaign_id):
+    """Desired campaign audience state {(campaign_id, user_list_id): fields} and names by user list"""
+    desired = {}
+    names = {}
+    for aud in PAUSED_AUDIENCES_TO_ENABLE + NEW_AUDIENCES_TO_ADD:
+        # Bid modifier 1.0 = no adjustment (gather data first); only used on create
+        desired[(campaign_id, aud['user_list_id'])] = {'status': 'ENABLED', 'bid_modifier': 1.0}
+        names[aud['user_list_id']] = aud['name']
+    return desired, names
+
+def optimize_audiences(campaign_id, dry_run=True):
+    """
+    Reconcile campaign audiences: paused ones are re-enabled (update) and
+    missing ones added (create) in a single mutate; audiences already
+    enabled are left alone
+    """
+    desired, names = desired_audiences(campaign_id)
+    diff, response = reconcile(CAMPAIGN_USER_LISTS, desired, where=f"campaign.id = {campaign_id}",
+                               dry_run=dry_run)
+
+    prefix = "[DRY RUN] Would re-enable" if dry_run else "Re-enabling"
+    print(f"\n{prefix} {len(diff.updates)} paused audiences:")
+    for (_, user_list_id), _, _ in diff.updates:
+        print(f"  + {names[user_list_id]}")
+
+    prefix = "[DRY RUN] Would add" if dry_run else "Adding"
+    print(f"\n{prefix} {len(diff.creates)} new audiences:")
+    sizes = {aud['user_list_id']: aud['size'] for aud in NEW_AUDIENCES_TO_ADD}
+    for (_, user_list_id), _ in diff.creates:
+        size_str = f"{sizes[user_list_id]:,}" if sizes.get(user_list_id) else "N/A"
+        print(f"  + {names[user_list_id]} (Size: {size_str})")
+
+    if diff.unchanged:
+        print(f"\n  Skipped {len(diff.unchanged)} (already enabled):")
+        for _, user_list_id in diff.unchanged:
+            print(f"    - {names[user_list_id]}")
+
+    if response is None:
+        if not dry_run:
+            print("\n  Nothing to change (all audiences already enabled)")
         return None
-    else:
-        if not operations:
-            print("\n  No paused audiences to enable")
-            return None
-
-        campaign_criterion_service = client.get_service("CampaignCriterionService")
-        response = campaign_criterion_service.mutate_campaign_criteria(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
-        return response, to_enable
-
-def add_new_audiences(client, campaign_id, existing_ids, dry_run=True):
-    """Add new audiences at campaign level"""
-    operations = []
-    to_add = []
-    skipped = []
-
-    for aud in NEW_AUDIENCES_TO_ADD:
-        user_list_id = aud['user_list_id']
-
-        # Skip if already exists
-        if user_list_id in existing_ids:
-            skipped.append(aud)
-            continue
-
-        # Create operation
-        operation = client.get_type("CampaignCriterionOperation")
-        criterion = operation.create
 
-        # Set campaign
-        criterion.campaign = client.get_service("CampaignService").campaign_path(
-            CUSTOMER_ID, campaign_id
-        )
-
-        # Set user list
-        criterion.user_list.user_list = client.get_service("UserListService").user_list_path(
-            CUSTOMER_ID, user_list_id
-        )
-
-        # Set status to ENABLED
-        criterion.status = client.enums.CampaignCriterionStatusEnum.ENABLED
-
-        # Set bid modifier to 1.0 (no adjustment - gather data first)
-        criterion.bid_modifier = 1.0
-
-        operations.append(operation)
-        to_add.append(aud)
-
-    if dry_run:
-        print(f"\n[DRY RUN] Would add {len(operations)} new audiences:")
-        for aud in to_add:
-            size_str = f"{aud['size']:,}" if aud['size'] else "N/A"
-            print(f"  + {aud['name']} (Size: {size_str})")
-
-        if skipped:
-            print(f"\n  Skipped {len(skipped)} (already exist):")
-            for aud in skipped:
-                print(f"    - {aud['name']}")
-
-        return None
-    else:
-        if not operations:
-            print("\n  No new audiences to add (all already exist)")
-            return None
-
-        campaign_criterion_service = client.get_service("CampaignCriterionService")
-        response = campaign_criterion_service.mutate_campaign_criteria(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
-        return response, to_add, skipped
+    # Operations are the diff's creates followed by its updates
+    labels = [key for key, _ in diff.creates] + [key for key, _, _ in diff.updates]
+    print(f"\nApplied {response.succeeded} of {len(labels)} changes")
+    for index, message in sorted(response.errors.items()):
+        print(f"  [FAILED] {names[labels[index][1]]} - {message}")
+    return response
 
 if __name__ == '__main__':
     import argparse
@@ -229,50 +116,17 @@ if __name__ == '__main__':
     print("Campaign: Search - NonBrand")
     print("=" * 70)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
-
     # Get campaign ID
     print("\nFetching campaign ID...")
     campaign_id = get_campaign_id()
     print(f"  Campaign ID: {campaign_id}")
 
-    # Get paused criterion IDs
-    print("\nFetching paused audience criterion IDs...")
-    paused_ids = get_paused_criterion_ids()
-    print(f"  Found {len(paused_ids)} paused audiences")
-
-    # Get existing user list IDs
-    print("\nFetching existing audience targeting...")
-    existing_ids = get_existing_user_list_ids()
-    print(f"  Found {len(existing_ids)} existing audiences")
-
     if args.execute:
         print("\n" + "=" * 70)
-        print("PART 1: RE-ENABLING PAUSED AUDIENCES")
-        print("=" * 70)
-
-        result1 = enable_paused_audiences(client, campaign_id, paused_ids, dry_run=False)
-
-        if result1:
-            response, enabled = result1
-            print(f"\nSuccessfully re-enabled {len(response.results)} audiences:")
-            for aud in enabled:
-                print(f"  [OK] {aud['name']}")
-
-        print("\n" + "=" * 70)
-        print("PART 2: ADDING NEW AUDIENCES")
+        print("RE-ENABLING PAUSED AUDIENCES AND ADDING NEW AUDIENCES")
         print("=" * 70)
 
-        result2 = add_new_audiences(client, campaign_id, existing_ids, dry_run=False)
-
-        if result2:
-            response, added, skipped = result2
-            print(f"\nSuccessfully added {len(response.results)} new audiences:")
-            for aud in added:
-                print(f"  [OK] {aud['name']}")
-
-            if skipped:
-                print(f"\nSkipped {len(skipped)} (already existed)")
+        optimize_audiences(campaign_id, dry_run=False)
 
         print("\n" + "=" * 70)
         print("OPTIMIZATION COMPLETE")
@@ -287,11 +141,7 @@ if __name__ == '__main__':
         print("DRY RUN MODE (use --execute to apply changes)")
         print("=" * 70)
 
-        print("\n--- PART 1: RE-ENABLE PAUSED AUDIENCES ---")
-        enable_paused_audiences(client, campaign_id, paused_ids, dry_run=True)
-
-        print("\n--- PART 2: ADD NEW AUDIENCES ---")
-        add_new_audiences(client, campaign_id, existing_ids, dry_run=True)
+        optimize_audiences(campaign_id, dry_run=True)
 
         print("\n" + "-" * 70)
         print("Run with --execute to apply these changes")
@@ -2,16 +2,10 @@
 Pause thematic ads (Gartner, Forrester, Migration Guide) in NonBrand campaigns
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
+from ads_client import get_client, get_googleads_service
 from google.protobuf import field_mask_pb2
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 # Ad IDs to pause (thematic ads)
 THEMATIC_AD_IDS = [
@@ -26,7 +20,6 @@ THEMATIC_AD_IDS = [
 
 def pause_ads(client, dry_run=True):
     """Pause the thematic ads"""
-    from ads_mcp.utils import get_googleads_service
 
     # First get the ad group IDs for these ads
     ga_service = get_googleads_service('GoogleAdsService')
@@ -69,7 +62,7 @@ def pause_ads(client, dry_run=True):
         operation = client.get_type("AdGroupAdOperation")
         ad_obj = operation.update
 
-        ad_obj.resource_name = client.get_service("AdGroupAdService").ad_group_ad_path(
+        ad_obj.resource_name = get_googleads_service("AdGroupAdService").ad_group_ad_path(
             CUSTOMER_ID, ad['ad_group_id'], ad['ad_id']
         )
         ad_obj.status = client.enums.AdGroupAdStatusEnum.PAUSED
@@ -81,7 +74,7 @@ def pause_ads(client, dry_run=True):
         operations.append(operation)
 
     # Execute
-    ad_group_ad_service = client.get_service("AdGroupAdService")
+    ad_group_ad_service = get_googleads_service("AdGroupAdService")
     response = ad_group_ad_service.mutate_ad_group_ads(
         customer_id=CUSTOMER_ID,
         operations=operations
@@ -99,7 +92,7 @@ if __name__ == '__main__':
     print("Pause Thematic Ads Script")
     print("=" * 60)
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     if args.execute:
         print("\nPausing thematic ads...")
@@ -5,12 +5,7 @@ with impressions > 0 in the last 60 days.
 This identifies Brand keywords that are actively serving but may be missing Final URLs.
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
 import csv
 from datetime import datetime, timedelta
 
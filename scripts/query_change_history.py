@@ -3,21 +3,15 @@ Query Google Ads change history for keyword URL changes
 to determine when keyword-level Final URLs were modified
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
+from ads_client import get_client, get_googleads_service
 import csv
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def query_keyword_url_changes():
     """Query change history for keyword Final URL changes"""
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
-    ga_service = client.get_service("GoogleAdsService")
+    client = get_client()
+    ga_service = get_googleads_service("GoogleAdsService")
 
     # Query change events for ad_group_criterion changes (keyword-level URL changes)
     query = '''
@@ -133,8 +127,7 @@ def query_keyword_changes_alternative(client, ga_service):
 
 def query_campaign_status_changes():
     """Query when the campaign was unpaused"""
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
-    ga_service = client.get_service("GoogleAdsService")
+    ga_service = get_googleads_service("GoogleAdsService")
 
     query = '''
     SELECT
@@ -3,21 +3,14 @@ Query current quality scores for Kibo Commerce keywords
 and compare with historical Oct-Dec data for pre/post analysis
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from google.ads.googleads.client import GoogleAdsClient
+from ads_client import get_googleads_service
 import csv
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def query_current_quality_scores():
     """Query current quality scores for all enabled NonBrand keywords"""
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
-    ga_service = client.get_service("GoogleAdsService")
+    ga_service = get_googleads_service("GoogleAdsService")
 
     # Query current QS + recent metrics
     query = '''
@@ -69,8 +62,7 @@ def query_current_quality_scores():
 
 def query_recent_metrics():
     """Query impression/click data for the last 7 days (since campaign was unpaused)"""
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
-    ga_service = client.get_service("GoogleAdsService")
+    ga_service = get_googleads_service("GoogleAdsService")
 
     query = '''
     SELECT
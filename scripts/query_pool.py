@@ -0,0 +1,102 @@
+"""
+Concurrent executor for independent GAQL queries
+
+Runs independent query functions on a thread pool and returns their
+results in call order, so a report's total latency is set by its slowest
+query rather than the sum of all of them. The shared service stub from
+ads_client is thread-safe, so every worker reuses the same gRPC channel.
+
+Anything a function prints is buffered per call and replayed in call
+order once it finishes, so console reports read exactly as they would
+when run one after another.
+
+Usage:
+    from query_pool import run_concurrently
+
+    user_lists, ad_groups = run_concurrently([query_user_lists, query_ad_group_info])
+    rows = run_concurrently([(fetch_day, day) for day in days])
+"""
+
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+
+
+class _ThreadLocalStdout:
+    """sys.stdout stand-in that routes writes to a per-thread buffer when one is set"""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def set_buffer(self, buffer):
+        self._local.buffer = buffer
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._default).write(text)
+
+    def flush(self):
+        buffer = getattr(self._local, 'buffer', None)
+        (buffer or self._default).flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+def _normalize(call):
+    if callable(call):
+        return call, ()
+    return call[0], tuple(call[1:])
+
+
+def run_concurrently(calls, max_workers=MAX_WORKERS, buffer_output=True):
+    """
+    Run independent calls in parallel and return their results in order.
+
+    calls: list of callables, or (callable, arg1, arg2, ...) tuples.
+    If a call raises, output is replayed up to and including that call and
+    its exception is re-raised - the same console output a sequential run
+    would have produced before failing.
+    """
+    calls = [_normalize(c) for c in calls]
+    if not calls:
+        return []
+
+    proxy = None
+    if buffer_output:
+        proxy = _ThreadLocalStdout(sys.stdout)
+        sys.stdout = proxy
+
+    def run(func, args):
+        buffer = io.StringIO() if proxy else None
+        if proxy:
+            proxy.set_buffer(buffer)
+        try:
+            return func(*args), None, buffer
+        except Exception as e:
+            return None, e, buffer
+        finally:
+            if proxy:
+                proxy.set_buffer(None)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+            futures = [pool.submit(run, func, args) for func, args in calls]
+            outcomes = [f.result() for f in futures]
+    finally:
+        if proxy:
+            sys.stdout = proxy._default
+
+    results = []
+    for result, error, buffer in outcomes:
+        if buffer is not None:
+            sys.stdout.write(buffer.getvalue())
+        if error is not None:
+            raise error
+        results.append(result)
+
+    return results
@@ -0,0 +1,343 @@
+"""
+Desired-state reconciler for idempotent mutate scripts
+
+Scripts declare what should exist - {key: {field: value}} built from a
+CSV or a mapping - instead of each one querying "what already exists"
+its own way. The reconciler:
+1. fetches the actual state of that resource kind in one bulk query
+2. indexes it by the same hashable key the desired state uses
+3. diffs the two: keys only in desired are creates, keys whose managed
+   fields differ are updates (masked to just those fields), and with
+   prune=True keys only in actual are removes
+4. sends only those operations, in one mutate_pool call
+
+A run that applies changes (dry_run=False) always reads the live state -
+a cached read could re-create rows just added by another script or try
+to remove ones already gone. Dry runs go through gaql_cache, so repeating
+one is served from the cache; pass fresh=True to re-read (e.g. after
+edits made in the UI). mutate_pool drops the cached resource after every
+mutate.
+
+Usage:
+    from reconcile import AD_GROUP_NEGATIVE_KEYWORDS, reconcile
+
+    desired = {(ad_group_id, 'free', 'PHRASE'): {}}
+    diff, result = reconcile(AD_GROUP_NEGATIVE_KEYWORDS, desired,
+                             where=f'ad_group.id = {ad_group_id}', dry_run=False)
+"""
+
+from ads_client import CUSTOMER_ID, get_client, get_googleads_service, search
+from mutate_pool import mutate
+import gaql_cache
+
+
+class ResourceSpec:
+    """
+    How one kind of resource is fetched, keyed, compared and mutated.
+    query: bulk GAQL for the actual state (conditions may be appended)
+    key(row) -> hashable key; fields(row) -> {managed field: value}
+    resource_name(row) -> resource name for updates and removes
+    create(client, resource, key, desired) and update(client, resource,
+    changed) fill in the create/update message of an operation.
+    Desired fields that fields() does not return (e.g. a bid modifier) are
+    only used on create and never cause an update.
+    """
+
+    def __init__(self, name, query, key, resource_name, create, service_name, method,
+                 fields=None, update=None):
+        self.name = name
+        self.query = query
+        self.key = key
+        self.resource_name = resource_name
+        self.create = create
+        self.update = update
+        self.fields = fields or (lambda row: {})
+        self.service_name = service_name
+        self.method = method
+        self.resource = gaql_cache.query_resource(query)
+        self.operation_type = f"{service_name[:-len('Service')]}Operation"
+
+
+class Diff:
+    """Minimal changes from actual to desired state"""
+
+    def __init__(self):
+        self.creates = []     # (key, desired fields)
+        self.updates = []     # (key, resource name, {field: desired value})
+        self.removes = []     # (key, resource name)
+        self.unchanged = []   # keys already as desired
+
+    def __bool__(self):
+        return bool(self.creates or self.updates or self.removes)
+
+    def __len__(self):
+        return len(self.creates) + len(self.updates) + len(self.removes)
+
+    def summary(self):
+        return (f"{len(self.creates)} to create, {len(self.updates)} to update, "
+                f"{len(self.removes)} to remove, {len(self.unchanged)} unchanged")
+
+
+def fetch_actual(spec, where=None, fresh=False):
+    """{key: (resource name, fields)} for every existing resource in scope"""
+    query = spec.query
+    if where:
+        query = f'{query}\n    AND {where}'
+
+    actual = {}
+    for row in search(query, use_cache=not fresh):
+        actual[spec.key(row)] = (spec.resource_name(row), spec.fields(row))
+    return actual
+
+
+def diff_state(desired, actual, prune=False):
+    """Diff desired {key: fields} against actual {key: (resource name, fields)}"""
+    diff = Diff()
+    for key, fields in desired.items():
+        existing = actual.get(key)
+        if existing is None:
+            diff.creates.append((key, fields))
+            continue
+        resource_name, actual_fields = existing
+        changed = {f: v for f, v in fields.items() if f in actual_fields and actual_fields[f] != v}
+        if changed:
+            diff.updates.append((key, resource_name, changed))
+        else:
+            diff.unchanged.append(key)
+
+    if prune:
+        diff.removes = [(key, resource_name) for key, (resource_name, _) in actual.items() if key not in desired]
+    return diff
+
+
+def build_operations(client, spec, diff):
+    """Operations for a diff, plus (action, key) labels aligned with them"""
+    operations = []
+    labels = []
+    for key, fields in diff.creates:
+        operation = client.get_type(spec.operation_type)
+        spec.create(client, operation.create, key, fields)
+        operations.append(operation)
+        labels.append(('CREATE', key))
+    for key, resource_name, changed in diff.updates:
+        operation = client.get_type(spec.operation_type)
+        operation.update.resource_name = resource_name
+        spec.update(client, operation.update, changed)
+        operation.update_mask.paths.extend(sorted(changed))
+        operations.append(operation)
+        labels.append(('UPDATE', key))
+    for key, resource_name in diff.removes:
+        operation = client.get_type(spec.operation_type)
+        operation.remove = resource_name
+        operations.append(operation)
+        labels.append(('REMOVE', key))
+    return operations, labels
+
+
+def reconcile(spec, desired, where=None, prune=False, dry_run=True, fresh=False, batch=False):
+    """
+    Bring spec's resources in scope (where) to the desired state.
+    Returns (diff, MutateResult or None); nothing is sent when the diff is
+    empty or dry_run is set.
+    """
+    diff = diff_state(desired, fetch_actual(spec, where, fresh or not dry_run), prune)
+    if dry_run or not diff:
+        return diff, None
+
+    client = get_client()
+    operations, _ = build_operations(client, spec, diff)
+    return diff, mutate(spec.service_name, spec.method, operations, batch=batch)
+
+
+# ---------------------------------------------------------------------------
+# Resource specs
+# ---------------------------------------------------------------------------
+
+def _user_list_id(resource_name):
+    """'customers/123/userLists/456' -> '456'"""
+    return resource_name.rsplit('/', 1)[-1]
+
+
+def _ad_group_criterion_path(row):
+    return get_googleads_service("AdGroupCriterionService").ad_group_criterion_path(
+        CUSTOMER_ID, row.ad_group.id, row.ad_group_criterion.criterion_id
+    )
+
+
+def _create_negative_keyword(client, criterion, key, fields):
+    ad_group_id, text, match_type = key
+    criterion.ad_group = get_googleads_service("AdGroupService").ad_group_path(CUSTOMER_ID, ad_group_id)
+    criterion.negative = True
+    criterion.keyword.text = text
+    criterion.keyword.match_type = getattr(client.enums.KeywordMatchTypeEnum, match_type)
+
+
+# Ad group negative keywords, key (ad_group_id, lowercase text, match type)
+AD_GROUP_NEGATIVE_KEYWORDS = ResourceSpec(
+    name='ad group negative keywords',
+    query='''
+    SELECT
+        ad_group.id,
+        ad_group_criterion.criterion_id,
+        ad_group_criterion.keyword.text,
+        ad_group_criterion.keyword.match_type
+    FROM ad_group_criterion
+    WHERE ad_group_criterion.type = 'KEYWORD'
+    AND ad_group_criterion.negative = TRUE
+    AND ad_group_criterion.status != 'REMOVED'
+    ''',
+    key=lambda row: (str(row.ad_group.id), row.ad_group_criterion.keyword.text.lower(),
+                     row.ad_group_criterion.keyword.match_type.name),
+    resource_name=_ad_group_criterion_path,
+    create=_create_negative_keyword,
+    service_name='AdGroupCriterionService',
+    method='mutate_ad_group_criteria',
+)
+
+
+def _create_ad_group_user_list(client, criterion, key, fields):
+    ad_group_id, user_list_id = key
+    criterion.ad_group = get_googleads_service("AdGroupService").ad_group_path(CUSTOMER_ID, ad_group_id)
+    criterion.status = client.enums.AdGroupCriterionStatusEnum.ENABLED
+    criterion.bid_modifier = fields.get('bid_modifier', 1.0)
+    criterion.user_list.user_list = get_googleads_service("UserListService").user_list_path(
+        CUSTOMER_ID, user_list_id
+    )
+
+
+# Ad group audience (user list) targeting, key (ad_group_id, user_list_id)
+AD_GROUP_USER_LISTS = ResourceSpec(
+    name='ad group audiences',
+    query='''
+    SELECT
+        ad_group.id,
+        ad_group_criterion.criterion_id,
+        ad_group_criterion.user_list.user_list
+    FROM ad_group_criterion
+    WHERE ad_group_criterion.type = 'USER_LIST'
+    AND ad_group_criterion.status != 'REMOVED'
+    ''',
+    key=lambda row: (str(row.ad_group.id), _user_list_id(row.ad_group_criterion.user_list.user_list)),
+    resource_name=_ad_group_criterion_path,
+    create=_create_ad_group_user_list,
+    service_name='AdGroupCriterionService',
+    method='mutate_ad_group_criteria',
+)
+
+
+def _create_campaign_user_list(client, criterion, key, fields):
+    campaign_id, user_list_id = key
+    criterion.campaign = get_googleads_service("CampaignService").campaign_path(CUSTOMER_ID, campaign_id)
+    criterion.user_list.user_list = get_googleads_service("UserListService").user_list_path(
+        CUSTOMER_ID, user_list_id
+    )
+    criterion.status = getattr(client.enums.CampaignCriterionStatusEnum, fields.get('status', 'ENABLED'))
+    criterion.bid_modifier = fields.get('bid_modifier', 1.0)
+
+
+def _update_campaign_user_list(client, criterion, changed):
+    if 'status' in changed:
+        criterion.status = getattr(client.enums.CampaignCriterionStatusEnum, changed['status'])
+
+
+# Campaign audience (user list) targeting, key (campaign_id, user_list_id);
+# status is managed, so a paused audience that should be ENABLED is updated
+CAMPAIGN_USER_LISTS = ResourceSpec(
+    name='campaign audiences',
+    query='''
+    SELECT
+        campaign.id,
+        campaign_criterion.criterion_id,
+        campaign_criterion.user_list.user_list,
+        campaign_criterion.status
+    FROM campaign_criterion
+    WHERE campaign_criterion.type = 'USER_LIST'
+    AND campaign_criterion.status != 'REMOVED'
+    ''',
+    key=lambda row: (str(row.campaign.id), _user_list_id(row.campaign_criterion.user_list.user_list)),
+    resource_name=lambda row: get_googleads_service("CampaignCriterionService").campaign_criterion_path(
+        CUSTOMER_ID, row.campaign.id, row.campaign_criterion.criterion_id
+    ),
+    fields=lambda row: {'status': row.campaign_criterion.status.name},
+    create=_create_campaign_user_list,
+    update=_update_campaign_user_list,
+    service_name='CampaignCriterionService',
+    method='mutate_campaign_criteria',
+)
+
+
+def _create_negative_keyword_shared_set(client, shared_set, key, fields):
+    shared_set.name = key
+    shared_set.type_ = client.enums.SharedSetTypeEnum.NEGATIVE_KEYWORDS
+
+
+# Shared negative keyword lists, key shared_set.name (unique per account)
+NEGATIVE_KEYWORD_SHARED_SETS = ResourceSpec(
+    name='shared negative keyword lists',
+    query='''
+    SELECT
+        shared_set.resource_name,
+        shared_set.name
+    FROM shared_set
+    WHERE shared_set.type = 'NEGATIVE_KEYWORDS'
+    AND shared_set.status != 'REMOVED'
+    ''',
+    key=lambda row: row.shared_set.name,
+    resource_name=lambda row: row.shared_set.resource_name,
+    create=_create_negative_keyword_shared_set,
+    service_name='SharedSetService',
+    method='mutate_shared_sets',
+)
+
+
+def _create_shared_negative_keyword(client, criterion, key, fields):
+    shared_set, text, match_type = key
+    criterion.shared_set = shared_set
+    criterion.keyword.text = text
+    criterion.keyword.match_type = getattr(client.enums.KeywordMatchTypeEnum, match_type)
+
+
+# Keywords in shared lists, key (shared set resource name, lowercase text, match type)
+SHARED_NEGATIVE_KEYWORDS = ResourceSpec(
+    name='shared negative keywords',
+    query='''
+    SELECT
+        shared_set.resource_name,
+        shared_criterion.resource_name,
+        shared_criterion.keyword.text,
+        shared_criterion.keyword.match_type
+    FROM shared_criterion
+    WHERE shared_criterion.type = 'KEYWORD'
+    ''',
+    key=lambda row: (row.shared_set.resource_name, row.shared_criterion.keyword.text.lower(),
+                     row.shared_criterion.keyword.match_type.name),
+    resource_name=lambda row: row.shared_criterion.resource_name,
+    create=_create_shared_negative_keyword,
+    service_name='SharedCriterionService',
+    method='mutate_shared_criteria',
+)
+
+
+def _create_campaign_shared_set(client, campaign_shared_set, key, fields):
+    campaign_id, shared_set = key
+    campaign_shared_set.campaign = get_googleads_service("CampaignService").campaign_path(CUSTOMER_ID, campaign_id)
+    campaign_shared_set.shared_set = shared_set
+
+
+# Shared lists attached to campaigns, key (campaign_id, shared set resource name)
+CAMPAIGN_SHARED_SETS = ResourceSpec(
+    name='campaign shared lists',
+    query='''
+    SELECT
+        campaign.id,
+        campaign_shared_set.resource_name,
+        campaign_shared_set.shared_set
+    FROM campaign_shared_set
+    WHERE campaign_shared_set.status != 'REMOVED'
+    ''',
+    key=lambda row: (str(row.campaign.id), row.campaign_shared_set.shared_set),
+    resource_name=lambda row: row.campaign_shared_set.resource_name,
+    create=_create_campaign_shared_set,
+    service_name='CampaignSharedSetService',
+    method='mutate_campaign_shared_sets',
+)
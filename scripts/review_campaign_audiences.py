@@ -7,12 +7,7 @@ This script:
 3. Makes recommendations for optimization
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service
+from ads_client import get_googleads_service
 from datetime import datetime
 
 CUSTOMER_ID = '9948697111'
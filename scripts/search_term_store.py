@@ -0,0 +1,244 @@
+"""
+Incremental, date-partitioned local mirror of search_term_view
+
+Each day of the search term report is stored as its own CSV partition
+(search_terms_YYYY-MM-DD.csv). A sync only queries days that have no
+partition yet, plus a short trailing window that is always re-pulled so
+late-attributed conversions are picked up. Analyzers then read their
+window (e.g. last 60 days) from disk instead of re-downloading it.
+
+Partitions are written sorted by row key, so a multi-day window can be
+aggregated with a streaming k-way merge instead of loading every day
+into memory.
+
+Usage:
+    python scripts/search_term_store.py                  # sync last 60 days
+    python scripts/search_term_store.py --refresh-days 7 # re-pull last 7 days
+    python scripts/search_term_store.py --rebuild        # re-pull whole window
+"""
+
+from ads_client import CUSTOMER_ID, search_stream
+import csv
+import heapq
+import os
+from datetime import datetime, timedelta
+from itertools import groupby
+
+STORE_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data/search_term_store'
+
+# Days always re-fetched on sync - conversions can be attributed to a click
+# several days after it happened, so recent partitions are not final
+LATE_CONVERSION_DAYS = 3
+
+# Partitions older than this are deleted on sync
+RETENTION_DAYS = 120
+
+FIELDNAMES = [
+    'search_term', 'status', 'campaign_id', 'campaign_name',
+    'ad_group_id', 'ad_group_name', 'keyword_text', 'match_type',
+    'impressions', 'clicks', 'cost_micros', 'conversions', 'conversions_value',
+]
+
+# Columns that identify one aggregated report row
+KEY_FIELDS = ['search_term', 'campaign_id', 'ad_group_id', 'keyword_text', 'match_type']
+
+
+def row_key(row):
+    return tuple(row[f] for f in KEY_FIELDS)
+
+
+def partition_path(day, store_dir=STORE_DIR):
+    return f"{store_dir}/search_terms_{day.strftime('%Y-%m-%d')}.csv"
+
+
+def window_dates(days, end_date=None):
+    """Dates covered by a `days`-long window ending at end_date (inclusive)"""
+    end_date = end_date or datetime.now().date()
+    start_date = end_date - timedelta(days=days)
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def stored_dates(store_dir=STORE_DIR):
+    """Dates that already have a partition on disk"""
+    if not os.path.isdir(store_dir):
+        return set()
+    dates = set()
+    for name in os.listdir(store_dir):
+        if name.startswith('search_terms_') and name.endswith('.csv'):
+            try:
+                dates.add(datetime.strptime(name[13:23], '%Y-%m-%d').date())
+            except ValueError:
+                continue
+    return dates
+
+
+def fetch_day(day, customer_id=CUSTOMER_ID):
+    """Stream one day of search_term_view rows from the API as flat dicts"""
+    day_str = day.strftime('%Y-%m-%d')
+
+    query = f'''
+    SELECT
+        search_term_view.search_term,
+        search_term_view.status,
+        campaign.id,
+        campaign.name,
+        ad_group.id,
+        ad_group.name,
+        segments.keyword.info.text,
+        segments.keyword.info.match_type,
+        metrics.impressions,
+        metrics.clicks,
+        metrics.cost_micros,
+        metrics.conversions,
+        metrics.conversions_value
+    FROM search_term_view
+    WHERE segments.date = '{day_str}'
+    AND campaign.advertising_channel_type = 'SEARCH'
+    AND metrics.impressions > 0
+    '''
+
+    for row in search_stream(query, customer_id=customer_id):
+        yield {
+            'search_term': row.search_term_view.search_term,
+            'status': row.search_term_view.status.name if row.search_term_view.status else 'UNKNOWN',
+            'campaign_id': str(row.campaign.id),
+            'campaign_name': row.campaign.name,
+            'ad_group_id': str(row.ad_group.id),
+            'ad_group_name': row.ad_group.name,
+            'keyword_text': row.segments.keyword.info.text if row.segments.keyword.info.text else '',
+            'match_type': row.segments.keyword.info.match_type.name if row.segments.keyword.info.match_type else '',
+            'impressions': row.metrics.impressions,
+            'clicks': row.metrics.clicks,
+            'cost_micros': row.metrics.cost_micros,
+            'conversions': row.metrics.conversions,
+            'conversions_value': row.metrics.conversions_value,
+        }
+
+
+def write_partition(day, rows, store_dir=STORE_DIR):
+    """Write one day's rows (sorted by key) atomically; returns row count"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = partition_path(day, store_dir)
+    tmp_path = path + '.tmp'
+
+    rows = sorted(rows, key=row_key)
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+    return len(rows)
+
+
+def prune(retention_days=RETENTION_DAYS, store_dir=STORE_DIR):
+    """Delete partitions older than the retention window"""
+    cutoff = datetime.now().date() - timedelta(days=retention_days)
+    removed = 0
+    for day in stored_dates(store_dir):
+        if day < cutoff:
+            os.remove(partition_path(day, store_dir))
+            removed += 1
+    return removed
+
+
+def sync(days=60, refresh_days=LATE_CONVERSION_DAYS, rebuild=False, store_dir=STORE_DIR, fetch=fetch_day):
+    """
+    Bring the store up to date for the last `days` days.
+    Fetches missing days plus the trailing `refresh_days`; returns the dates fetched.
+    """
+    dates = window_dates(days)
+    have = stored_dates(store_dir)
+    trailing = set(dates[-refresh_days:]) if refresh_days > 0 else set()
+
+    to_fetch = [d for d in dates if rebuild or d not in have or d in trailing]
+
+    for day in to_fetch:
+        count = write_partition(day, fetch(day), store_dir)
+        print(f"  Synced {day.strftime('%Y-%m-%d')}: {count} rows")
+
+    prune(max(RETENTION_DAYS, days + 1), store_dir)
+    return to_fetch
+
+
+def _read_partition(day, store_dir):
+    with open(partition_path(day, store_dir), 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def iter_window(days=60, store_dir=STORE_DIR):
+    """
+    Yield one aggregated row per (search term, campaign, ad group, keyword,
+    match type) over the last `days` days, merging partitions in key order.
+    Metrics are summed; names/status come from the most recent day.
+    """
+    have = stored_dates(store_dir)
+    dates = [d for d in window_dates(days) if d in have]
+
+    # Newest partition first so groupby sees the latest name/status first
+    readers = [_read_partition(d, store_dir) for d in reversed(dates)]
+    merged = heapq.merge(*readers, key=row_key)
+
+    for key, group in groupby(merged, key=row_key):
+        group = list(group)
+        latest = group[0]
+        yield {
+            'search_term': latest['search_term'],
+            'status': latest['status'],
+            'campaign_id': int(latest['campaign_id']),
+            'campaign_name': latest['campaign_name'],
+            'ad_group_id': int(latest['ad_group_id']),
+            'ad_group_name': latest['ad_group_name'],
+            'keyword_text': latest['keyword_text'],
+            'match_type': latest['match_type'],
+            'impressions': sum(int(r['impressions']) for r in group),
+            'clicks': sum(int(r['clicks']) for r in group),
+            'cost_micros': sum(int(r['cost_micros']) for r in group),
+            'conversions': sum(float(r['conversions']) for r in group),
+            'conversions_value': sum(float(r['conversions_value']) for r in group),
+        }
+
+
+def tee_csv(rows, filepath):
+    """Write rows to CSV as they stream past, yielding each row onward"""
+    filename = os.path.basename(filepath)
+    count = 0
+    f = None
+    writer = None
+
+    try:
+        for row in rows:
+            if writer is None:
+                f = open(filepath, 'w', newline='', encoding='utf-8')
+                writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+            yield row
+    finally:
+        if f:
+            f.close()
+
+    if count:
+        print(f"  Saved: {filename} ({count} rows)")
+    else:
+        print(f"  No data to save for {filename}")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=60, help='Window length in days (default: 60)')
+    parser.add_argument('--refresh-days', type=int, default=LATE_CONVERSION_DAYS,
+                        help=f'Trailing days always re-fetched (default: {LATE_CONVERSION_DAYS})')
+    parser.add_argument('--rebuild', action='store_true', help='Re-fetch every day in the window')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Search Term Store Sync")
+    print("=" * 60)
+    print(f"\nStore: {STORE_DIR}")
+
+    fetched = sync(days=args.days, refresh_days=args.refresh_days, rebuild=args.rebuild)
+    print(f"\nFetched {len(fetched)} of {args.days + 1} days from the API")
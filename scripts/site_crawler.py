@@ -0,0 +1,373 @@
+"""
+Concurrent landing page crawler that rebuilds site_crawl_inventory.csv
+
+Crawls kibocommerce.com's landing pages over a pooled keep-alive asyncio
+HTTP client (http_pool) and regenerates the page inventory the URL
+mappers and audits read:
+1. seeds: the homepage plus every URL already in the inventory
+2. follows links to other landing pages (INVENTORY_PREFIXES or URLs
+   already in the inventory), CONCURRENCY pages at a time
+3. extracts page title, headings, id anchors and CTA links
+4. writes one inventory row per page
+
+Every page's ETag / Last-Modified is kept in a crawl state file, and a
+re-crawl sends them back as If-None-Match / If-Modified-Since. Unchanged
+pages answer 304 with no body and their stored extraction is reused, so
+after a site update only the changed pages are downloaded and parsed.
+
+Hand-curated inventory columns (Intent Level, Primary Topic, Personas)
+are kept for pages already in the inventory; for new pages they are
+derived from the CTAs and H1.
+
+Usage:
+    python scripts/site_crawler.py
+    python scripts/site_crawler.py --full        # ignore stored ETags
+    python scripts/site_crawler.py --base-url http://127.0.0.1:8000   # e.g. fake_site.py
+"""
+
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from http_pool import HttpError, HttpPool
+
+OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
+
+SITE_URL = 'https://kibocommerce.com'
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.kibo_site_cache')
+STATE_FILE = os.path.join(CACHE_DIR, 'crawl_state.json')
+
+# Paths whose pages belong in the inventory (besides ones already listed)
+INVENTORY_PREFIXES = ('/platform/', '/solutions/', '/ppc/')
+
+MAX_PAGES = 300
+CONCURRENCY = 8
+
+# Crawls with more errors than this share of pages attempted are not saved
+MAX_ERROR_SHARE = 0.5
+
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip', '.mp4', '.css', '.js', '.xml')
+
+# Link / button text that counts as a call to action
+CTA_REGEX = re.compile(r'\b(demo|talk to|speak with|contact|expert|sales|download|trial|get started|'
+                       r'learn more|explore|view stories|browse)\b', re.IGNORECASE)
+MAX_CTA_LENGTH = 40
+
+# CTAs that make a page a conversion (HIGH intent) page
+CONVERSION_CTA_REGEX = re.compile(r'\b(demo|sales|expert|contact|trial)\b', re.IGNORECASE)
+CONTENT_PREFIXES = ('/blog/', '/resources/', '/resource-center/')
+
+# Ids worth listing as anchors: on these tags, and not auto-generated
+ANCHOR_TAGS = {'section', 'article', 'main', 'form', 'div', 'h1', 'h2', 'h3', 'h4', 'a'}
+GENERATED_ID_REGEX = re.compile(r'\d{4,}|^(wp|elementor|hs|hbspt)[-_]')
+
+# Site-wide chrome: its links are followed, but are not this page's CTAs
+CHROME_TAGS = ('nav', 'header', 'footer')
+
+INVENTORY_COLUMNS = ['URL', 'Full URL with Anchors Available', 'Intent Level', 'Primary Topic',
+                     'Secondary Topics', 'CTA Type', 'Personas', 'Page Title']
+
+
+class PageParser(HTMLParser):
+    """Title, headings, ids, links and CTA texts from one HTML page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.headings = []       # (level, text)
+        self.ids = []            # every id attribute, in page order
+        self.anchors = []        # ids on ANCHOR_TAGS that look hand-written
+        self.links = []
+        self.ctas = []
+        self._text = None        # (tag, [text]) being collected
+        self._in_title = False
+        self._chrome_depth = 0   # open CHROME_TAGS elements
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        element_id = attrs.get('id') or (attrs.get('name') if tag == 'a' else None)
+        if element_id:
+            self.ids.append(element_id)
+            if tag in ANCHOR_TAGS and not GENERATED_ID_REGEX.search(element_id):
+                self.anchors.append(element_id)
+
+        if tag in CHROME_TAGS:
+            self._chrome_depth += 1
+        if tag == 'title':
+            self._in_title = True
+        elif tag in ('h1', 'h2', 'h3', 'a', 'button'):
+            if tag == 'a' and attrs.get('href'):
+                self.links.append(attrs['href'])
+            self._text = (tag, [])
+
+    def handle_endtag(self, tag):
+        if tag in CHROME_TAGS and self._chrome_depth:
+            self._chrome_depth -= 1
+        if tag == 'title':
+            self._in_title = False
+        elif self._text and tag == self._text[0]:
+            text = ' '.join(''.join(self._text[1]).split())
+            if text:
+                if tag in ('a', 'button'):
+                    if not self._chrome_depth and len(text) <= MAX_CTA_LENGTH and CTA_REGEX.search(text):
+                        self.ctas.append(text)
+                else:
+                    self.headings.append((int(tag[1]), text))
+            self._text = None
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._text:
+            self._text[1].append(data)
+
+
+def parse_page(html):
+    """Extraction stored in the crawl state for one page"""
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+    return {
+        'title': ' '.join(parser.title.split()),
+        'headings': parser.headings,
+        'ids': list(dict.fromkeys(parser.ids)),
+        'anchors': list(dict.fromkeys(parser.anchors)),
+        'links': list(dict.fromkeys(parser.links)),
+        'ctas': list(dict.fromkeys(c.title() if c.islower() else c for c in parser.ctas)),
+    }
+
+
+def load_state(path=STATE_FILE):
+    """{url: {'etag', 'last_modified', 'status', 'page'}} from the last crawl"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def load_inventory(path):
+    """{path: row} from an existing site_crawl_inventory.csv, in file order"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return {(urlsplit(row['URL']).path or '/'): row for row in csv.DictReader(f)}
+
+
+def in_scope(path, known_paths):
+    return path in known_paths or path == '/' or path.startswith(INVENTORY_PREFIXES)
+
+
+class SiteCrawler:
+    """
+    Crawl from base_url over landing pages; results keyed by URL path.
+    state is the previous crawl state (load_state); full=True ignores its
+    validators and downloads everything.
+    """
+
+    def __init__(self, base_url=SITE_URL, known_paths=(), state=None, full=False,
+                 max_pages=MAX_PAGES, concurrency=CONCURRENCY):
+        self.base_url = base_url.rstrip('/')
+        self.host = urlsplit(self.base_url).netloc.lower()
+        self.known_paths = set(known_paths)
+        self.state = state if state is not None else {}
+        self.full = full
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.pages = {}           # path -> extraction
+        self.errors = {}          # path -> status or error message
+        self.stats = {'fetched': 0, 'not_modified': 0, 'errors': 0}
+
+    def _scoped_path(self, url, href):
+        """Crawlable landing page path for a link, or None"""
+        target, _ = urldefrag(urljoin(url, href))
+        parts = urlsplit(target)
+        if parts.scheme not in ('http', 'https') or parts.netloc.lower() != self.host:
+            return None
+        path = parts.path or '/'
+        if path.lower().endswith(SKIP_EXTENSIONS) or not in_scope(path, self.known_paths):
+            return None
+        return path
+
+    async def _fetch(self, pool, path):
+        url = self.base_url + path
+        cached = self.state.get(url)
+        headers = {}
+        if cached and not self.full and cached.get('page') is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            response = await pool.fetch(url, headers=headers)
+        except HttpError as e:
+            self.errors[path] = str(e)
+            self.stats['errors'] += 1
+            return None
+
+        if response.status == 304 and cached:
+            self.stats['not_modified'] += 1
+            return cached['page']
+
+        if response.status != 200 or 'html' not in response.headers.get('content-type', 'text/html'):
+            self.errors[path] = f'HTTP {response.status}'
+            self.stats['errors'] += 1
+            self.state.pop(url, None)
+            return None
+
+        self.stats['fetched'] += 1
+        page = parse_page(response.text())
+        self.state[url] = {
+            'etag': response.headers.get('etag', ''),
+            'last_modified': response.headers.get('last-modified', ''),
+            'status': response.status,
+            'page': page,
+        }
+        return page
+
+    async def crawl(self, seeds=('/',)):
+        queue = asyncio.Queue()
+        seen = set()
+        for path in list(seeds) + sorted(self.known_paths):
+            if path not in seen:
+                seen.add(path)
+                queue.put_nowait(path)
+
+        async def worker(pool):
+            while True:
+                path = await queue.get()
+                try:
+                    try:
+                        page = await self._fetch(pool, path)
+                    except Exception as e:
+                        self.errors[path] = f'{type(e).__name__}: {e}'
+                        self.stats['errors'] += 1
+                        continue
+                    if page is None:
+                        continue
+                    self.pages[path] = page
+                    for href in page['links']:
+                        link = self._scoped_path(self.base_url + path, href)
+                        if link and link not in seen and len(seen) < self.max_pages:
+                            seen.add(link)
+                            queue.put_nowait(link)
+                finally:
+                    queue.task_done()
+
+        async with HttpPool(max_per_host=self.concurrency) as pool:
+            workers = [asyncio.ensure_future(worker(pool)) for _ in range(self.concurrency)]
+            await queue.join()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats['requests'] = pool.requests
+            self.stats['connections'] = pool.connections_opened
+        return self.pages
+
+
+def intent_level(path, ctas):
+    if path.startswith(CONTENT_PREFIXES):
+        return 'LOW'
+    if any(CONVERSION_CTA_REGEX.search(cta) for cta in ctas):
+        return 'HIGH'
+    return 'MEDIUM'
+
+
+def inventory_rows(pages, existing, site_url=SITE_URL):
+    """
+    Inventory rows for crawled pages; listed pages first, in their existing
+    order. Listed pages the crawl did not reach keep their row unchanged.
+    """
+    ordered = list(existing) + sorted(p for p in pages if p not in existing)
+    rows = []
+    for path in ordered:
+        page = pages.get(path)
+        if page is None:
+            rows.append({column: existing[path].get(column, '') for column in INVENTORY_COLUMNS})
+            continue
+        if path not in existing and not path.startswith(INVENTORY_PREFIXES):
+            continue
+        curated = existing.get(path, {})
+        h1 = next((text for level, text in page['headings'] if level == 1), '')
+        h2s = [text for level, text in page['headings'] if level == 2]
+        ctas = page['ctas'][:3]
+        rows.append({
+            'URL': site_url + path,
+            'Full URL with Anchors Available': ', '.join([path] + [f'{path}#{a}' for a in page['anchors']]),
+            'Intent Level': curated.get('Intent Level') or intent_level(path, ctas),
+            'Primary Topic': curated.get('Primary Topic') or h1 or page['title'].split('|')[0].strip(),
+            'Secondary Topics': '; '.join(h2s[:6]) or curated.get('Secondary Topics', ''),
+            'CTA Type': '; '.join(ctas) or curated.get('CTA Type', ''),
+            'Personas': curated.get('Personas', ''),
+            'Page Title': page['title'] or curated.get('Page Title', ''),
+        })
+    return rows
+
+
+def main(base_url=SITE_URL, full=False, max_pages=MAX_PAGES, state_path=STATE_FILE, output_dir=OUTPUT_DIR):
+    print("=" * 60)
+    print("LANDING PAGE CRAWL")
+    print("=" * 60)
+
+    inventory_path = f'{output_dir}/site_crawl_inventory.csv'
+    existing = load_inventory(inventory_path)
+    state = {} if full else load_state(state_path)
+    print(f"\n{len(existing)} pages in the current inventory, {len(state)} in the crawl state")
+
+    crawler = SiteCrawler(base_url, existing, state, full=full, max_pages=max_pages)
+    start = time.perf_counter()
+    pages = asyncio.run(crawler.crawl())
+    stats = crawler.stats
+    print(f"\nCrawled {len(pages)} pages from {base_url} in {time.perf_counter() - start:.1f}s")
+    print(f"  {stats['fetched']} downloaded, {stats['not_modified']} unchanged (304), {stats['errors']} errors")
+    print(f"  {stats['requests']} requests over {stats['connections']} connections")
+
+    missing = [path for path in existing if path not in pages]
+    if missing:
+        print(f"\nInventory pages not reachable ({len(missing)}) - kept unchanged:")
+        for path in missing:
+            print(f"  - {path}: {crawler.errors.get(path, 'not reached')}")
+
+    # A site outage or network failure must not overwrite the curated inventory
+    attempted = len(pages) + stats['errors']
+    if not pages or stats['errors'] > attempted * MAX_ERROR_SHARE:
+        print(f"\nNot saving: {stats['errors']} of {attempted} pages failed - inventory left as is")
+        return
+
+    save_state(crawler.state, state_path)
+
+    rows = inventory_rows(pages, existing)
+    added = [r for r in rows if (urlsplit(r['URL']).path or '/') not in existing]
+    with open(inventory_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=INVENTORY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nSaved: site_crawl_inventory.csv ({len(rows)} pages, {len(added)} new)")
+    for r in added[:10]:
+        print(f"  + {r['URL']} [{r['Intent Level']}] {r['Page Title']}")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default=SITE_URL, help=f'Site to crawl (default: {SITE_URL})')
+    parser.add_argument('--full', action='store_true', help='Ignore stored ETags and re-download every page')
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES, help=f'Crawl limit (default: {MAX_PAGES})')
+    args = parser.parse_args()
+
+    main(base_url=args.base_url, full=args.full, max_pages=args.max_pages)
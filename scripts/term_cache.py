@@ -0,0 +1,152 @@
+"""
+Persistent per-term classification cache
+
+Search terms repeat day after day, so brand detection, intent
+classification and negative blocking results are kept on disk between
+runs. Each cache is keyed by the normalized term (lowercased, whitespace
+collapsed) and lives in a file named after a hash of the rules that
+produced it - change BRAND_PATTERNS, an intent rule or the negatives
+snapshot and the old file is simply never read again (and is deleted on
+the next save).
+
+Caches are written once at interpreter exit, not per lookup.
+
+Usage:
+    import term_cache
+
+    @term_cache.memoize('brand', BRAND_PATTERNS)
+    def is_brand_term(search_term):
+        ...
+
+    blocks = term_cache.TermCache('negative_blocks', term_cache.rules_version(negatives))
+    hits = blocks.lookup(search_term, matcher.find)
+
+Set KIBO_TERM_CACHE=0 in the environment to disable the cache entirely.
+"""
+
+import atexit
+import functools
+import hashlib
+import os
+import pickle
+import threading
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.kibo_term_cache')
+
+# Bump when the stored value format changes
+CACHE_FORMAT = 1
+
+_open_caches = []
+_lock = threading.Lock()
+
+
+def enabled():
+    return os.environ.get('KIBO_TERM_CACHE', '1') != '0'
+
+
+def normalize_term(search_term):
+    return ' '.join(search_term.lower().split())
+
+
+def _canonical(value):
+    """Order-independent form of sets/dicts so equal rule sets hash equally"""
+    if isinstance(value, dict):
+        return sorted((repr(k), _canonical(v)) for k, v in value.items())
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(_canonical(v)) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def rules_version(*rule_sets):
+    """Short hash identifying a set of rules (patterns, rule lists, negatives)"""
+    digest = hashlib.sha256(repr((CACHE_FORMAT, _canonical(rule_sets))).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class TermCache:
+    """
+    {normalized term: result} for one classifier at one rules version.
+    Loaded lazily on first lookup and saved at exit if anything was added.
+    """
+
+    def __init__(self, name, version, cache_dir=CACHE_DIR):
+        self.name = name
+        self.version = version
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, f'{name}-{version}.pkl')
+        self._entries = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        self._entries = {}
+        if not enabled():
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                self._entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+        with _lock:
+            if not _open_caches:
+                atexit.register(save_all)
+            _open_caches.append(self)
+
+    def lookup(self, search_term, compute):
+        """Cached compute(normalized term), computing and storing it on a miss"""
+        if self._entries is None:
+            self._load()
+
+        key = normalize_term(search_term)
+        try:
+            result = self._entries[key]
+        except KeyError:
+            result = self._entries[key] = compute(key)
+            self._dirty = True
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def save(self):
+        """Write the cache atomically and drop files left by older rule versions"""
+        if not self._dirty or not enabled():
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f'{self.name}-') and name.endswith('.pkl') and name != os.path.basename(self.path):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+
+
+def save_all():
+    with _lock:
+        caches = list(_open_caches)
+    for cache in caches:
+        cache.save()
+
+
+def memoize(name, *rule_sets):
+    """Decorator caching a one-argument term classifier across runs"""
+    def decorator(func):
+        cache = TermCache(name, rules_version(*rule_sets))
+
+        @functools.wraps(func)
+        def wrapper(search_term):
+            return cache.lookup(search_term, func)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -7,16 +7,16 @@ This script:
 3. Updates Final URLs in bulk using the Google Ads API
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
+from ads_client import get_client, get_googleads_service, search
+from keyword_resolver import KeywordResolver
+from mutate_pool import mutate
+from mutation_journal import journaled_mutate
+from url_canon import same_url, split_final_urls
+from url_health import gate_final_urls
 import csv
-from google.ads.googleads.client import GoogleAdsClient
+import sys
 
 CUSTOMER_ID = '9948697111'
-YAML_PATH = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
 
 def load_audit_recommendations(filepath):
     """Load keyword landing page recommendations from CSV"""
@@ -51,45 +51,85 @@ def load_current_keywords(filepath):
     return keywords
 
 def match_recommendations_to_ids(recommendations, current_keywords):
-    """Match audit recommendations to keyword criterion IDs"""
+    """
+    Match audit recommendations to keyword criterion IDs. Misses on the
+    exact (keyword, match type, ad group) key are resolved through
+    KeywordResolver's indexes; ambiguous ones are left unmatched with a note.
+    """
+    resolver = KeywordResolver(current_keywords)
     matched = []
     unmatched = []
 
     for rec in recommendations:
-        # Try to find matching keyword
-        key = (rec['keyword'].lower(), rec['match_type'], rec['ad_group'])
-
-        if key in current_keywords:
-            matched.append({
-                **rec,
-                'criterion_id': current_keywords[key]['criterion_id'],
-                'ad_group_id': current_keywords[key]['ad_group_id'],
-                'current_urls': current_keywords[key]['current_urls']
-            })
-        else:
-            # Try fuzzy match - just keyword and match type
-            found = False
-            for (kw, mt, ag), data in current_keywords.items():
-                if kw == rec['keyword'].lower() and mt == rec['match_type']:
-                    matched.append({
-                        **rec,
-                        'criterion_id': data['criterion_id'],
-                        'ad_group_id': data['ad_group_id'],
-                        'current_urls': data['current_urls'],
-                        'note': f'Matched to ad group: {ag}'
-                    })
-                    found = True
-                    break
-            if not found:
-                unmatched.append(rec)
+        resolution = resolver.resolve(rec['keyword'], rec['match_type'], rec['ad_group'])
+        if resolution.match is None:
+            unmatched.append({**rec, 'status': resolution.status, 'note': resolution.describe()})
+            continue
+
+        item = {
+            **rec,
+            'criterion_id': resolution.match['criterion_id'],
+            'ad_group_id': resolution.match['ad_group_id'],
+            'current_urls': resolution.match['current_urls']
+        }
+        if resolution.status != 'EXACT':
+            item['note'] = resolution.describe()
+        matched.append(item)
 
     return matched, unmatched
 
-def update_keyword_urls(matched_keywords, dry_run=True):
-    """Update Final URLs for matched keywords using Google Ads API"""
+def split_already_correct(matched_keywords):
+    """(to_update, already_correct): keywords whose only Final URL is already the recommended one are skipped"""
+    to_update = []
+    already_correct = []
+    for kw in matched_keywords:
+        current = split_final_urls(kw['current_urls'])
+        if len(current) == 1 and same_url(current[0], kw['recommended_url']):
+            already_correct.append(kw)
+        else:
+            to_update.append(kw)
+    return to_update, already_correct
+
+def journal_key(kw):
+    """Journal key for one URL update: criterion plus the URL it is set to"""
+    return f"{kw['ad_group_id']}~{kw['criterion_id']} -> {kw['recommended_url']}"
+
+def find_applied_updates(keys):
+    """Of the given journal keys, those whose keyword already has the new URL (one bulk read)"""
+    query = '''
+    SELECT
+        ad_group.id,
+        ad_group_criterion.criterion_id,
+        ad_group_criterion.final_urls
+    FROM ad_group_criterion
+    WHERE ad_group_criterion.type = 'KEYWORD'
+    AND ad_group_criterion.negative = FALSE
+    AND ad_group_criterion.status != 'REMOVED'
+    '''
+
+    wanted = set(keys)
+    applied = {}
+    for row in search(query, use_cache=False):
+        agc = row.ad_group_criterion
+        for url in list(agc.final_urls)[:1]:
+            key = f"{row.ad_group.id}~{agc.criterion_id} -> {url}"
+            if key in wanted:
+                applied[key] = get_googleads_service("AdGroupCriterionService").ad_group_criterion_path(
+                    CUSTOMER_ID, row.ad_group.id, agc.criterion_id
+                )
+    return applied
+
+def update_keyword_urls(matched_keywords, dry_run=True, batch=False, log_path=None, journal_path=None,
+                        resume=False):
+    """
+    Update Final URLs for matched keywords using Google Ads API.
+    batch=True runs the updates as an async batch job; log_path gets one
+    row per keyword as its result comes back. journal_path records every
+    update and its result; resume=True skips those already applied.
+    """
     from google.protobuf import field_mask_pb2
 
-    client = GoogleAdsClient.load_from_storage(YAML_PATH)
+    client = get_client()
 
     operations = []
 
@@ -99,7 +139,7 @@ def update_keyword_urls(matched_keywords, dry_run=True):
         criterion = operation.update
 
         # Set the resource name
-        criterion.resource_name = client.get_service("AdGroupCriterionService").ad_group_criterion_path(
+        criterion.resource_name = get_googleads_service("AdGroupCriterionService").ad_group_criterion_path(
             CUSTOMER_ID, kw['ad_group_id'], kw['criterion_id']
         )
 
@@ -121,19 +161,47 @@ def update_keyword_urls(matched_keywords, dry_run=True):
             print(f"  ... and {len(matched_keywords) - 10} more")
         return None
     else:
-        # Execute the updates
-        ad_group_criterion_service = client.get_service("AdGroupCriterionService")
-        response = ad_group_criterion_service.mutate_ad_group_criteria(
-            customer_id=CUSTOMER_ID,
-            operations=operations
-        )
-        return response
+        # Execute the updates in chunks; failed keywords are reported, not fatal
+        def run(on_result=None):
+            if journal_path:
+                return journaled_mutate("AdGroupCriterionService", "mutate_ad_group_criteria", operations,
+                                        [journal_key(kw) for kw in matched_keywords], journal_path,
+                                        resume=resume, verify=find_applied_updates, batch=batch,
+                                        on_result=on_result)
+            return mutate("AdGroupCriterionService", "mutate_ad_group_criteria", operations, batch=batch,
+                          on_result=on_result)
+
+        if not log_path:
+            return run()
+
+        with open(log_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['keyword', 'ad_group', 'criterion_id', 'recommended_url',
+                                                   'status', 'error'])
+            writer.writeheader()
+
+            def log_result(index, result, error):
+                kw = matched_keywords[index]
+                writer.writerow({
+                    'keyword': kw['keyword'],
+                    'ad_group': kw['ad_group'],
+                    'criterion_id': kw['criterion_id'],
+                    'recommended_url': kw['recommended_url'],
+                    'status': 'FAILED' if error else 'UPDATED',
+                    'error': error or '',
+                })
+
+            return run(on_result=log_result)
 
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--execute', action='store_true', help='Execute updates (default is dry run)')
     parser.add_argument('--input', type=str, help='Path to input CSV with URL mappings (default: keyword_landing_page_audit.csv)')
+    parser.add_argument('--batch', action='store_true', help='Run updates as an async batch job (large rollouts)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted --execute run from its journal (skips applied updates)')
+    parser.add_argument('--skip-url-check', action='store_true',
+                        help='Execute even if recommended URLs are broken or missing their #anchor')
     args = parser.parse_args()
 
     print("=" * 60)
@@ -155,16 +223,21 @@ if __name__ == '__main__':
 
     print("\nMatching recommendations to keyword IDs...")
     matched, unmatched = match_recommendations_to_ids(recommendations, current_keywords)
-    print(f"  Matched: {len(matched)} keywords")
-    print(f"  Unmatched: {len(unmatched)} keywords")
+    ambiguous = [kw for kw in unmatched if kw['status'] == 'AMBIGUOUS']
+    print(f"  Matched: {len(matched)} keywords ({sum('note' in kw for kw in matched)} in another ad group)")
+    print(f"  Unmatched: {len(unmatched)} keywords ({len(ambiguous)} ambiguous)")
 
     if unmatched:
         print("\n  Unmatched keywords (may need manual review):")
         for kw in unmatched[:5]:
-            print(f"    - [{kw['keyword']}] ({kw['match_type']}) in {kw['ad_group']}")
+            print(f"    - [{kw['keyword']}] ({kw['match_type']}) in {kw['ad_group']} - {kw['note']}")
         if len(unmatched) > 5:
             print(f"    ... and {len(unmatched) - 5} more")
 
+    # Drop keywords already on the recommended URL (canonical comparison)
+    matched, already_correct = split_already_correct(matched)
+    print(f"\n  Already at recommended URL (skipped): {len(already_correct)}")
+
     # Show matched keywords by priority
     high_priority = [k for k in matched if k['priority'] == 'High']
     medium_priority = [k for k in matched if k['priority'] == 'Medium']
@@ -177,16 +250,28 @@ if __name__ == '__main__':
 
     # Update URLs
     if args.execute:
+        if not args.skip_url_check and gate_final_urls([kw['recommended_url'] for kw in matched]):
+            print("\nNot updating: fix the URLs above (or pass --skip-url-check)")
+            sys.exit(1)
+
         print("\n" + "=" * 60)
         print("EXECUTING URL UPDATES")
         print("=" * 60)
-        response = update_keyword_urls(matched, dry_run=False)
+        log_file = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data/keyword_url_update_log.csv'
+        journal_file = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data/keyword_url_update_journal.jsonl'
+        response = update_keyword_urls(matched, dry_run=False, batch=args.batch, log_path=log_file,
+                                       journal_path=journal_file, resume=args.resume)
         if response:
-            print(f"\nSuccessfully updated {len(response.results)} keywords!")
-            for result in response.results[:5]:
+            print(f"\nSuccessfully updated {response.succeeded} keywords!")
+            updated = [result for result in response.results if result is not None]
+            for result in updated[:5]:
                 print(f"  Updated: {result.resource_name}")
-            if len(response.results) > 5:
-                print(f"  ... and {len(response.results) - 5} more")
+            if len(updated) > 5:
+                print(f"  ... and {len(updated) - 5} more")
+            if response.failed:
+                print(f"\n{response.failed} keywords failed to update:")
+                for index, message in sorted(response.errors.items())[:10]:
+                    print(f"  [{matched[index]['keyword']}] {message}")
     else:
         print("\n" + "=" * 60)
         print("DRY RUN MODE (use --execute to apply changes)")
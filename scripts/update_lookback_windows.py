@@ -5,12 +5,7 @@ Changes click-through lookback window from 30 days to 90 days
 for B2B lead cycle attribution.
 """
 
-import sys
-sys.path.insert(0, 'C:/Users/shawh/google-ads-mcp')
-import os
-os.environ['GOOGLE_ADS_YAML_PATH'] = 'C:/Users/shawh/google-ads-mcp/google-ads.yaml'
-
-from ads_mcp.utils import get_googleads_service, _get_googleads_client as get_googleads_client
+from ads_client import get_client, get_googleads_service
 from google.protobuf import field_mask_pb2
 from datetime import datetime
 
@@ -28,8 +23,8 @@ NEW_LOOKBACK_DAYS = 90
 def update_lookback_window(conversion_action_id, name):
     """Update the click-through lookback window for a conversion action"""
 
-    client = get_googleads_client()
-    conversion_action_service = client.get_service("ConversionActionService")
+    client = get_client()
+    conversion_action_service = get_googleads_service("ConversionActionService")
 
     resource_name = f"customers/{CUSTOMER_ID}/conversionActions/{conversion_action_id}"
 
@@ -0,0 +1,109 @@
+"""
+URL canonicalization and interned URL sets
+
+Final URLs come from CSV exports, audits and hand-written mappings in
+slightly different spellings of the same page. canonical_url() reduces a
+URL to one form:
+- scheme: http and https compare equal (https)
+- host: lowercased, leading "www." and default ports dropped
+- path: trailing slashes dropped ("/" for the homepage)
+- query: tracking parameters (utm_*, gclid, ...) dropped, the rest sorted
+- anchor: kept by default, since it picks a page section; keep_anchor=False
+  drops it
+
+Results are memoized and interned, so a UrlSet built once turns "is this
+URL in the list" and "is this already the recommended URL" into single
+hash lookups.
+
+Usage:
+    from url_canon import UrlSet, same_url
+
+    OPTIMAL = UrlSet(['https://kibocommerce.com/solutions/b2b/'])
+    'http://www.kibocommerce.com/solutions/b2b?utm_source=x' in OPTIMAL  # True
+"""
+
+from functools import lru_cache
+import ast
+import sys
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Query parameters that never change the page served
+TRACKING_PARAMS = frozenset({'gclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'hsa_acc', '_hsenc', '_hsmi'})
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _is_tracking(param):
+    return param.startswith(('utm_', 'hsa_')) or param in TRACKING_PARAMS
+
+
+@lru_cache(maxsize=65536)
+def canonical_url(url, keep_anchor=True):
+    """Canonical, interned form of a URL (see module docstring); '' for blank input"""
+    url = url.strip()
+    if not url:
+        return ''
+
+    parts = urlsplit(url if '//' in url else '//' + url)
+    original_scheme = parts.scheme.lower()
+    scheme = 'https' if original_scheme in ('http', 'https', '') else original_scheme
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(original_scheme or scheme):
+        host = f'{host}:{port}'
+
+    path = parts.path.rstrip('/') or '/'
+
+    query = ''
+    if parts.query:
+        params = sorted(p for p in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(p[0].lower()))
+        query = '?' + urlencode(params) if params else ''
+
+    anchor = '#' + parts.fragment if keep_anchor and parts.fragment else ''
+    return sys.intern(f'{scheme}://{host}{path}{query}{anchor}')
+
+
+def same_url(a, b, keep_anchor=True):
+    return canonical_url(a, keep_anchor) == canonical_url(b, keep_anchor)
+
+
+def split_final_urls(value):
+    """
+    Final URLs from a CSV cell: "['https://...']" (list repr) or
+    "https://...;https://..."; [] for blank or "Not specified"
+    """
+    value = (value or '').strip()
+    if not value or value == 'Not specified':
+        return []
+    if value.startswith('['):
+        try:
+            return [u for u in ast.literal_eval(value) if u]
+        except (ValueError, SyntaxError):
+            value = value.strip('[]')
+    return [u.strip().strip('\'"') for u in value.split(';') if u.strip()]
+
+
+class UrlSet:
+    """Set of URLs compared by canonical form; membership is one hash lookup"""
+
+    def __init__(self, urls=(), keep_anchor=True):
+        self.keep_anchor = keep_anchor
+        self._urls = {canonical_url(u, keep_anchor) for u in urls} - {''}
+
+    def add(self, url):
+        self._urls.add(canonical_url(url, self.keep_anchor))
+
+    def __contains__(self, url):
+        return canonical_url(url, self.keep_anchor) in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+    def __iter__(self):
+        return iter(self._urls)
@@ -0,0 +1,266 @@
+"""
+Final URL health check for keywords, sitelinks and RSAs
+
+Checks that every Final URL the mutate scripts write actually resolves:
+1. collects the Final URLs from the URL audits/mappings (keywords),
+   sitelink_mapping.csv (sitelinks) and ad_copy_recommendations.csv (RSAs)
+2. dedupes them by canonical URL (url_canon), and fetches each page once
+   however many anchors / keywords point at it
+3. fetches pages concurrently over pooled keep-alive connections (http_pool)
+4. checks the status, redirects, and that every #anchor is an id on the page
+
+Results are cached per page in ~/.kibo_site_cache/url_health.json: healthy
+pages for OK_TTL, failures for ERROR_TTL. An expired page with an ETag is
+re-checked with If-None-Match, so a 304 refreshes it without a download.
+
+Status per URL:
+- OK
+- REDIRECT: resolves, but via a redirect (fix the URL; not blocking)
+- MISSING_ANCHOR: the page has no element with the #anchor id (blocking)
+- BROKEN: HTTP error or unreachable (blocking)
+
+update_keyword_urls.py, create_sitelinks.py and create_new_rsas.py run
+gate_final_urls() before --execute; --skip-url-check bypasses it.
+
+Usage:
+    python scripts/url_health.py
+    python scripts/url_health.py --fresh                        # ignore cached results
+    python scripts/url_health.py --base-url http://127.0.0.1:8000   # e.g. fake_site.py
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+from urllib.parse import unquote, urlsplit
+
+from http_pool import HttpError, HttpPool
+from site_crawler import CACHE_DIR, SITE_URL, parse_page
+from url_canon import canonical_url, split_final_urls
+
+OUTPUT_DIR = 'C:/Users/shawh/OneDrive/Desktop/Kibo Commerce/data'
+
+CACHE_FILE = os.path.join(CACHE_DIR, 'url_health.json')
+
+OK_TTL = 6 * 60 * 60
+ERROR_TTL = 15 * 60
+
+CONCURRENCY = 8
+
+# (kind, file in OUTPUT_DIR, column holding the Final URL)
+SOURCES = [
+    ('keyword', 'keyword_landing_page_audit.csv', 'Recommended URL (with anchor if applicable)'),
+    ('keyword', 'brand_url_mappings.csv', 'Recommended URL (with anchor if applicable)'),
+    ('keyword', 'missing_url_mappings.csv', 'Recommended URL (with anchor if applicable)'),
+    ('keyword', 'keyword_gap_opportunities.csv', 'Recommended URL (with anchor)'),
+    ('sitelink', 'sitelink_mapping.csv', 'final_url'),
+    ('rsa', 'ad_copy_recommendations.csv', 'Landing Page URL'),
+]
+
+BLOCKING_STATUSES = ('BROKEN', 'MISSING_ANCHOR')
+
+UrlCheck = namedtuple('UrlCheck', ['url', 'status', 'detail'])
+
+
+def collect_final_urls(data_dir=OUTPUT_DIR, sources=SOURCES):
+    """{canonical url: {'url': first spelling seen, 'sources': {(kind, file)}}}"""
+    urls = {}
+    for kind, filename, column in sources:
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for url in split_final_urls(row.get(column)):
+                    if not url.startswith('http'):
+                        continue
+                    entry = urls.setdefault(canonical_url(url), {'url': url, 'sources': set()})
+                    entry['sources'].add((kind, filename))
+    return urls
+
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def _fetch_url(page_url, base_url):
+    """page_url with the live site's origin swapped for base_url (stand-in servers)"""
+    if not base_url:
+        return page_url
+    parts = urlsplit(page_url)
+    if canonical_url(f'{parts.scheme}://{parts.netloc}') != canonical_url(SITE_URL):
+        return page_url
+    return base_url.rstrip('/') + (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+
+def _is_fresh(entry, now):
+    ttl = OK_TTL if entry.get('error') is None and entry.get('status', 0) < 400 else ERROR_TTL
+    return now - entry.get('checked_at', 0) < ttl
+
+
+async def _check_page(pool, fetch_url, cached):
+    """Cache entry for one page: status, ids, redirect target or error"""
+    headers = {}
+    if cached and cached.get('etag') and cached.get('status') == 200:
+        headers['If-None-Match'] = cached['etag']
+
+    try:
+        response = await pool.fetch(fetch_url, headers=headers)
+    except HttpError as e:
+        return {'status': 0, 'error': str(e), 'checked_at': time.time()}
+
+    if response.status == 304 and headers:
+        return {**cached, 'checked_at': time.time()}
+
+    entry = {
+        'status': response.status,
+        'error': None,
+        'etag': response.headers.get('etag', ''),
+        'redirected_to': response.url if response.redirects else None,
+        'ids': [],
+        'checked_at': time.time(),
+    }
+    if response.status == 200 and 'html' in response.headers.get('content-type', 'text/html'):
+        entry['ids'] = parse_page(response.text())['ids']
+    return entry
+
+
+async def _check_pages(pages, cache, fresh, concurrency):
+    """Re-check the pages whose cache entry is missing or expired; returns the count fetched"""
+    now = time.time()
+    stale = [page for page in pages if fresh or page not in cache or not _is_fresh(cache[page], now)]
+    if not stale:
+        return 0
+
+    async with HttpPool(max_per_host=concurrency) as pool:
+        entries = await asyncio.gather(*[
+            _check_page(pool, page, None if fresh else cache.get(page)) for page in stale
+        ])
+    cache.update(zip(stale, entries))
+    return len(stale)
+
+
+def url_status(url, entry):
+    """UrlCheck for one Final URL from its page's cache entry"""
+    if entry.get('error'):
+        return UrlCheck(url, 'BROKEN', entry['error'])
+    if entry['status'] >= 400 or entry['status'] < 200:
+        return UrlCheck(url, 'BROKEN', f"HTTP {entry['status']}")
+
+    anchor = unquote(urlsplit(url).fragment)
+    if anchor and anchor not in entry['ids']:
+        return UrlCheck(url, 'MISSING_ANCHOR', f'no id="{anchor}" on the page')
+    if entry.get('redirected_to'):
+        return UrlCheck(url, 'REDIRECT', f"redirects to {entry['redirected_to']}")
+    return UrlCheck(url, 'OK', '')
+
+
+def check_final_urls(urls, base_url=None, fresh=False, concurrency=CONCURRENCY, cache_path=CACHE_FILE):
+    """
+    {url: UrlCheck} for the given Final URLs. Each page is fetched at most
+    once (anchors share their page) and only when its cached result has
+    expired; fresh=True re-checks everything. base_url points checks of
+    kibocommerce.com URLs at another server (e.g. fake_site.py).
+    """
+    # One fetch per canonical page; cached under the URL actually fetched, so
+    # results from a stand-in server never mix with the live site's
+    pages = {}
+    page_of = {}
+    for url in urls:
+        if url:
+            fetch_url = _fetch_url(urlsplit(url)._replace(fragment='').geturl(), base_url)
+            page_of[url] = pages.setdefault(canonical_url(fetch_url, keep_anchor=False), fetch_url)
+    cache = load_cache(cache_path)
+    fetched = asyncio.run(_check_pages(sorted(pages.values()), cache, fresh, concurrency))
+    if fetched:
+        save_cache(cache, cache_path)
+    return {url: url_status(url, cache[page]) for url, page in page_of.items()}
+
+
+def gate_final_urls(urls, base_url=None):
+    """
+    Check Final URLs before a mutate run; prints the problems and returns
+    the blocking UrlChecks (empty list: safe to proceed).
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    print(f"\nChecking {len(urls)} Final URLs...")
+    checks = check_final_urls(urls, base_url=base_url)
+
+    blocking = [c for c in checks.values() if c.status in BLOCKING_STATUSES]
+    redirects = [c for c in checks.values() if c.status == 'REDIRECT']
+    for check in blocking + redirects:
+        print(f"  {check.status}: {check.url} - {check.detail}")
+    if not blocking and not redirects:
+        print("  All Final URLs resolve")
+    return blocking
+
+
+def main(base_url=None, fresh=False, data_dir=OUTPUT_DIR, output_dir=OUTPUT_DIR):
+    print("=" * 60)
+    print("FINAL URL HEALTH CHECK")
+    print("=" * 60)
+
+    urls = collect_final_urls(data_dir)
+    pages = {canonical_url(u, keep_anchor=False) for u in urls}
+    by_kind = {}
+    for entry in urls.values():
+        for kind in {kind for kind, _ in entry['sources']}:
+            by_kind[kind] = by_kind.get(kind, 0) + 1
+    print(f"\n{len(urls)} unique Final URLs on {len(pages)} pages "
+          f"(used by {', '.join(f'{kind}s: {n}' for kind, n in sorted(by_kind.items()))})")
+
+    start = time.time()
+    checks = check_final_urls([e['url'] for e in urls.values()], base_url=base_url, fresh=fresh)
+    print(f"Checked in {time.time() - start:.1f}s")
+
+    counts = {}
+    for check in checks.values():
+        counts[check.status] = counts.get(check.status, 0) + 1
+    print("\nBy status:")
+    for status in ('OK', 'REDIRECT', 'MISSING_ANCHOR', 'BROKEN'):
+        print(f"  {status}: {counts.get(status, 0)}")
+
+    problems = sorted((c for c in checks.values() if c.status != 'OK'), key=lambda c: (c.status, c.url))
+    if problems:
+        print("\nProblems:")
+        for check in problems:
+            print(f"  {check.status}: {check.url} - {check.detail}")
+
+    output_file = os.path.join(output_dir, 'final_url_health.csv')
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['url', 'status', 'detail', 'sources'])
+        writer.writeheader()
+        for canonical, entry in sorted(urls.items()):
+            check = checks[entry['url']]
+            writer.writerow({
+                'url': entry['url'],
+                'status': check.status,
+                'detail': check.detail,
+                'sources': '; '.join(sorted(f'{kind}: {name}' for kind, name in entry['sources'])),
+            })
+    print(f"\nSaved: {os.path.basename(output_file)}")
+    return checks
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', type=str, help='Check against another server (e.g. fake_site.py)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore cached results and re-check every page')
+    args = parser.parse_args()
+
+    main(base_url=args.base_url, fresh=args.fresh)
@@ -0,0 +1,113 @@
+"""
+Landing page routing rules shared by the brand and NonBrand URL mappers
+
+The URL rules, ad group default pages and section anchors live in
+url_rules.json, one rule set per mapper. Each rule set is compiled once:
+- keyword rules (regexes, first match wins) into an IntentClassifier,
+  so a keyword is matched against all of them in one scan
+- each page's anchor phrases into a phrase IntentClassifier
+
+A keyword then resolves to (path, anchor, rationale) in one pass:
+1. start from its ad group's default page (or the rule set default)
+2. the highest priority keyword rule that matches picks the page
+   (override_only_if_different: a rule pointing at the default page
+   keeps the default rationale)
+3. the first anchor phrase for that page found in the keyword adds the anchor
+
+resolve_all() resolves a whole keyword list, resolving each distinct
+(keyword, ad group) once.
+
+Usage:
+    from url_rules import NONBRAND_URL_RULES, BRAND_URL_RULES
+
+    path, anchor, rationale = NONBRAND_URL_RULES.resolve('wholesale b2b portal', 'NB - Wholesalers')
+    # ('/ppc/wholesale/', '#b2b-commerce', 'Ad group default: NB - Wholesalers with anchor for "b2b portal"')
+
+    NONBRAND_URL_RULES.resolve('wholesale order management', 'NB - Wholesalers')
+    # ('/platform/order-management/', '', 'Keyword contains "order management|oms" pattern')
+    # since the "order management|oms" rule ranks above "wholesal"
+"""
+
+from collections import namedtuple
+import json
+import os
+
+from intent_rules import IntentClassifier
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'url_rules.json')
+
+UrlRoute = namedtuple('UrlRoute', ['path', 'anchor', 'rationale'])
+
+
+class UrlRuleSet:
+    """One compiled rule set from url_rules.json"""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.default_path = config['default_path']
+        self.default_rationale = config['default_rationale']
+        self.rule_rationale = config['rule_rationale']
+        self.override_only_if_different = config.get('override_only_if_different', False)
+        self.ad_group_defaults = config.get('ad_group_defaults', {})
+
+        # Rules are labelled by index; the rationale quotes all of a rule's alternatives
+        rules = config['keyword_rules']
+        self.rule_paths = [rule['path'] for rule in rules]
+        self.rule_patterns = ['|'.join(rule['match']) for rule in rules]
+        self._keyword_rules = IntentClassifier([(i, rule['match']) for i, rule in enumerate(rules)])
+
+        self.anchor_rationale = config.get('anchor_rationale', '')
+        self._anchors = {
+            path: IntentClassifier([(anchor, [phrase]) for phrase, anchor in phrases], phrases=True)
+            for path, phrases in config.get('anchors', {}).items()
+        }
+
+    def resolve(self, keyword_text, ad_group_name=''):
+        """UrlRoute(path, anchor, rationale) for a keyword"""
+        path = self.ad_group_defaults.get(ad_group_name, self.default_path)
+        rationale = self.default_rationale.format(ad_group=ad_group_name)
+
+        rule, _ = self._keyword_rules.classify(keyword_text)
+        if rule is not None:
+            rule_path = self.rule_paths[rule]
+            if not (self.override_only_if_different and rule_path == path):
+                path = rule_path
+                rationale = self.rule_rationale.format(pattern=self.rule_patterns[rule])
+
+        anchor = ''
+        anchors = self._anchors.get(path)
+        if anchors is not None:
+            anchor, phrase = anchors.classify(keyword_text)
+            if anchor:
+                rationale += self.anchor_rationale.format(phrase=phrase)
+            else:
+                anchor = ''
+
+        return UrlRoute(path, anchor, rationale)
+
+    def resolve_all(self, keywords):
+        """
+        Resolve [(keyword, ad_group), ...] -> [UrlRoute, ...]; repeated
+        keyword/ad group pairs are resolved once
+        """
+        resolved = {}
+        routes = []
+        for keyword_text, ad_group_name in keywords:
+            key = (keyword_text.lower(), ad_group_name)
+            route = resolved.get(key)
+            if route is None:
+                route = resolved[key] = self.resolve(keyword_text, ad_group_name)
+            routes.append(route)
+        return routes
+
+
+def load_url_rules(path=RULES_PATH):
+    """{rule set name: UrlRuleSet} from a rules file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return {name: UrlRuleSet(name, rule_set) for name, rule_set in config.items()}
+
+
+URL_RULES = load_url_rules()
+NONBRAND_URL_RULES = URL_RULES['nonbrand']
+BRAND_URL_RULES = URL_RULES['brand']